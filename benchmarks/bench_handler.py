@@ -0,0 +1,221 @@
+"""
+Load test for home_app.main.lambda_handler, run in-process with synthetic
+API Gateway payload format 2.0 events.
+
+    python benchmarks/bench_handler.py [--requests 2000] [--threads 8] [--cold 10]
+    python benchmarks/bench_handler.py --json after.json --compare before.json
+
+Scenarios: a static asset (identity and gzip), the 404 page, an OPTIONS
+preflight and decrypt submissions (to an in-memory SQLite store, so no AWS is
+needed). Each is run serially and from a thread pool, reporting latency
+percentiles and requests/sec; a tracemalloc pass reports allocations per
+request. --cold times a fresh interpreter importing home_app.main and
+answering its first request.
+
+--json writes the results; --compare reads an earlier --json file and exits 1
+if any p50 is more than --tolerance slower.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, dirname, join
+from typing import Any, Callable, Dict, List
+
+CODE_DIR = join(dirname(dirname(abspath(__file__))), "iga_236")
+sys.path.insert(0, CODE_DIR)
+os.environ.setdefault("SUBMISSIONS_DB", ":memory:")
+os.environ.setdefault("METRICS_SAMPLE_RATE", "0")     # records are still kept; just not printed
+
+STATIC_PATH = "/static/lab1_crypto/assets/index-BHXZtTcA.js"
+
+
+def event(method: str, path: str, headers: Dict[str, str] = None, body: str = None) -> Dict[str, Any]:
+    """A payload format 2.0 event like API Gateway sends"""
+    e = {"version": "2.0", "routeKey": "$default", "rawPath": path, "rawQueryString": "",
+         "headers": {"host": "localhost", "user-agent": "bench_handler", **(headers or {})},
+         "requestContext": {"http": {"method": method, "path": path, "protocol": "HTTP/1.1",
+                                     "sourceIp": "127.0.0.1", "userAgent": "bench_handler"},
+                            "requestId": "bench", "stage": "$default", "timeEpoch": 0},
+         "isBase64Encoded": False}
+    if body is not None:
+        e["body"] = body
+    return e
+
+
+def submit_event() -> Dict[str, Any]:
+    """A decrypt submission with a fresh GUID, so every one is recorded"""
+    return event("POST", "/api/v1/decrypt/submit", {"content-type": "application/json"},
+                 json.dumps({"user_id": "bench@example.com", "guid": str(uuid.uuid4()), "level": 1}))
+
+
+# name -> function returning the next event
+SCENARIOS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "static": lambda: event("GET", STATIC_PATH),
+    "static_gzip": lambda: event("GET", STATIC_PATH, {"accept-encoding": "gzip, deflate"}),
+    "not_found": lambda: event("GET", "/no/such/page"),
+    "options": lambda: event("OPTIONS", "/api/v1/decrypt/submit"),
+    "decrypt_submit": submit_event,
+}
+
+# Runs in the child interpreter for --cold. Prints the timings as JSON.
+COLD_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from home_app import main
+t1 = time.perf_counter()
+sys.path.insert(0, {bench_dir!r})
+from bench_handler import SCENARIOS
+resp = main.lambda_handler(SCENARIOS[{scenario!r}](), None)
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1e3, "first_request_ms": (t2 - t1) * 1e3,
+                  "total_ms": (t2 - t0) * 1e3, "status": resp["statusCode"]}}))
+"""
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of latencies in ms"""
+    q = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {"p50_ms": round(q[49], 4), "p95_ms": round(q[94], 4), "p99_ms": round(q[98], 4),
+            "mean_ms": round(statistics.fmean(samples_ms), 4), "max_ms": round(max(samples_ms), 4)}
+
+
+def timed_calls(handler, events: List[Dict[str, Any]]) -> List[float]:
+    """Latency of handler on each event, in ms"""
+    out = []
+    for e in events:
+        t0 = time.perf_counter_ns()
+        handler(e, None)
+        out.append((time.perf_counter_ns() - t0) / 1e6)
+    return out
+
+
+def run_serial(handler, make_event, n: int) -> Dict[str, Any]:
+    events = [make_event() for _ in range(n)]
+    t0 = time.perf_counter()
+    samples = timed_calls(handler, events)
+    wall = time.perf_counter() - t0
+    return {**percentiles(samples), "requests": n, "rps": round(n / wall, 1)}
+
+
+def run_threaded(handler, make_event, n: int, threads: int) -> Dict[str, Any]:
+    per_thread = [[make_event() for _ in range(n // threads)] for _ in range(threads)]
+    with ThreadPoolExecutor(threads) as pool:
+        t0 = time.perf_counter()
+        results = list(pool.map(lambda events: timed_calls(handler, events), per_thread))
+        wall = time.perf_counter() - t0
+    samples = [s for r in results for s in r]
+    return {**percentiles(samples), "requests": len(samples), "threads": threads,
+            "rps": round(len(samples) / wall, 1)}
+
+
+def run_alloc(handler, make_event, n: int) -> Dict[str, Any]:
+    """Bytes allocated per request: net growth and peak above the starting point"""
+    events = [make_event() for _ in range(n)]
+    tracemalloc.start()
+    try:
+        peaks, growth = [], []
+        for e in events:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            handler(e, None)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            growth.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes_mean": round(statistics.fmean(peaks)), "peak_bytes_max": max(peaks),
+            "retained_bytes_mean": round(statistics.fmean(growth), 1), "requests": n}
+
+
+def run_cold(scenario: str, samples: int) -> Dict[str, Any]:
+    """Fresh interpreter per sample: import home_app.main and answer one request"""
+    child = COLD_CHILD.format(bench_dir=dirname(abspath(__file__)), scenario=scenario)
+    child_env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    runs = []
+    for _ in range(samples):
+        out = subprocess.run([sys.executable, "-c", child], cwd=CODE_DIR, env=child_env,
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: round(statistics.median(r[key] for r in runs), 3)
+            for key in ("import_ms", "first_request_ms", "total_ms")} | {"samples": samples}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> List[str]:
+    """p50 regressions of more than tolerance (a fraction) between two result files"""
+    regressions = []
+    for scenario, modes in new["scenarios"].items():
+        for mode, result in modes.items():
+            if not isinstance(result, dict):
+                continue
+            before = old.get("scenarios", {}).get(scenario, {}).get(mode, {}).get("p50_ms")
+            after = result.get("p50_ms")
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"{scenario}/{mode}: p50 {before:.4f} -> {after:.4f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario and mode")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--alloc-requests", type=int, default=200)
+    parser.add_argument("--cold", type=int, default=0, metavar="N",
+                        help="also time N fresh interpreters per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--compare", help="results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)           # the handler's per-request logging is not what we measure
+    from home_app import main as app        # pylint: disable=import-outside-toplevel
+    handler = app.lambda_handler
+
+    results: Dict[str, Any] = {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "git": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=CODE_DIR, check=False).stdout.strip(),
+        "scenarios": {}}
+    print(f"{'scenario':<15} {'mode':<9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for name in args.scenario or SCENARIOS:
+        make_event = SCENARIOS[name]
+        status = handler(make_event(), None)["statusCode"]     # warm up caches and templates
+        modes = {"serial": run_serial(handler, make_event, args.requests),
+                 "threaded": run_threaded(handler, make_event, args.requests, args.threads),
+                 "alloc": run_alloc(handler, make_event, args.alloc_requests)}
+        if args.cold:
+            modes["cold"] = run_cold(name, args.cold)
+        results["scenarios"][name] = {"status": status, **modes}
+        for mode in ("serial", "threaded"):
+            r = modes[mode]
+            print(f"{name:<15} {mode:<9} {r['p50_ms']:>9.4f} {r['p95_ms']:>9.4f} "
+                  f"{r['p99_ms']:>9.4f} {r['rps']:>9.0f}")
+        print(f"{name:<15} {'alloc':<9} peak {modes['alloc']['peak_bytes_mean']} B/request")
+        if args.cold:
+            print(f"{name:<15} {'cold':<9} import {modes['cold']['import_ms']:.1f} ms, "
+                  f"first request {modes['cold']['first_request_ms']:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
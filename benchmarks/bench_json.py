@@ -0,0 +1,81 @@
+"""
+Cost of serializing API responses: the old json.dumps(body, default=str)
+against home_app.fastjson (orjson if installed, else the standard library),
+for dicts and for the pydantic response models.
+
+    python benchmarks/bench_json.py [--submissions 50] [--users 200] [--number 2000]
+
+Payloads: one user's dashboard (as DynamoDB returns it, with Decimals), and a
+class-wide list of dashboards.
+"""
+import argparse
+import json
+import sys
+import timeit
+import uuid
+from decimal import Decimal
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "iga_236"))
+# pylint: disable=wrong-import-position
+from home_app import fastjson
+from home_app.dashboard import summarize
+
+
+def dynamo_items(n: int, user_id: str = "student@example.edu"):
+    """n decrypt items the way DynamoDB returns them"""
+    return [{"user_id": user_id, "sk": f"decrypt#{uuid.UUID(int=i)}", "guid": str(uuid.UUID(int=i)),
+             "level": Decimal(i % 4), "submitted_at": Decimal(f"{1757000000 + i * 61}.{i % 1000:03d}"),
+             "elapsed_seconds": Decimal(f"{i * 7}.25")} for i in range(n)]
+
+
+def as_dict(items):
+    """The dashboard dict main.py used to build"""
+    submissions = sorted(({k: item[k] for k in ("guid", "level", "submitted_at", "elapsed_seconds")}
+                          for item in items), key=lambda s: s["submitted_at"])
+    return {"user_id": items[0]["user_id"], "submissions": submissions,
+            "levels_solved": sorted({s["level"] for s in submissions})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark")
+    parser.add_argument("--submissions", type=int, default=50, help="submissions per user")
+    parser.add_argument("--users", type=int, default=200, help="users in the class-wide payload")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = dynamo_items(args.submissions)
+    one_dict = as_dict(items)
+    one_model = summarize(items[0]["user_id"], items)
+    class_dicts = [one_dict] * args.users
+    class_models = [one_model] * args.users
+
+    cases = {
+        "dashboard": {
+            "json default=str (before)": lambda: json.dumps(one_dict, default=str),
+            f"fastjson dict ({fastjson.BACKEND})": lambda: fastjson.dumps(one_dict),
+            "model -> dict -> json": lambda: json.dumps(one_model.model_dump(mode="json")),
+            "fastjson model": lambda: fastjson.dumps(one_model),
+        },
+        "class": {
+            "json default=str (before)": lambda: json.dumps(class_dicts, default=str),
+            f"fastjson dict ({fastjson.BACKEND})": lambda: fastjson.dumps(class_dicts),
+            "fastjson list of models": lambda: fastjson.dumps(class_models),
+        },
+    }
+    number = {"dashboard": args.number, "class": max(1, args.number // args.users)}
+    results = {}
+    for payload, funcs in cases.items():
+        print(f"{payload}: {len(funcs[next(iter(funcs))]())} bytes, us per call")
+        results[payload] = {}
+        for name, func in funcs.items():
+            us = timeit.timeit(func, number=number[payload]) / number[payload] * 1e6
+            results[payload][name] = round(us, 2)
+            print(f"  {name:<32} {us:>10.2f}")
+    if fastjson.orjson is None:
+        print("orjson is not installed; `pip install orjson` to compare")
+    print(json.dumps({"backend": fastjson.BACKEND, "us_per_call": results}))
+
+
+if __name__ == "__main__":
+    main()
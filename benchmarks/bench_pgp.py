@@ -0,0 +1,53 @@
+"""
+Messages/sec for the lab's password-encrypted messages: one gpg process per
+message (the old random_quotes.encrypt) against pgp_symmetric in-process,
+at gpg's default S2K count and at a small one.
+
+    python benchmarks/bench_pgp.py [--messages 20]
+"""
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "etc"))
+import pgp_symmetric        # pylint: disable=wrong-import-position
+
+TEXT = ("It is a truth universally acknowledged, that a single man in possession of a good "
+        "fortune, must be in want of a wife.\n\n--\n\nhttps://iga236.simson.net/ping.php?guid=x\n")
+
+
+def rate(func, n: int) -> float:
+    """Messages per second"""
+    t0 = time.perf_counter()
+    for i in range(n):
+        func(TEXT, f"{i:04d}")
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenPGP encryption benchmark")
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    if shutil.which("gpg"):
+        with tempfile.TemporaryDirectory() as home:
+            def gpg(text, password):
+                subprocess.run(["gpg", "--homedir", home, "-ca", "--batch", "--passphrase", password],
+                               input=text.encode(), stdout=subprocess.PIPE, check=True)
+            results["gpg_subprocess"] = rate(gpg, args.messages)
+    results["in_process_default_s2k"] = rate(pgp_symmetric.encrypt, args.messages)
+    results["in_process_s2k_65536"] = rate(
+        lambda t, p: pgp_symmetric.encrypt(t, p, s2k_count=65536), args.messages)
+    for name, value in results.items():
+        print(f"{name:<24} {value:10.1f} messages/s")
+    print(json.dumps({k: round(v, 1) for k, v in results.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Dispatch cost of home_app.router.Router against an equivalent `match`
+statement, for a table of N routes (default 60): half literal paths, half with
+path parameters, plus a /static/{path+} catch-all like main.py.
+
+    python benchmarks/bench_router.py [--routes 60] [--number 200000]
+"""
+import argparse
+import json
+import sys
+import timeit
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "iga_236"))
+from home_app.router import Router      # pylint: disable=wrong-import-position
+
+
+def make_router(n: int) -> Router:
+    """Router with n routes"""
+    router = Router()
+    for i in range(n // 2):
+        router.add("GET", f"/api/v1/thing{i}", lambda r: r)
+    for i in range(n - n // 2):
+        router.add("GET", f"/api/v1/item{i}/{{item_id}}", lambda r: r)
+    router.add("GET", "/static/{path+}", lambda r: r)
+    return router
+
+
+def make_match(n: int):
+    """The same table written as a match statement, the way lambda_handler used to route"""
+    lines = ["def dispatch(method, path):", "    match (method, path):"]
+    for i in range(n // 2):
+        lines.append(f"        case ('GET', '/api/v1/thing{i}'):\n            return {i}")
+    for i in range(n - n // 2):
+        lines.append(f"        case ('GET', p) if p.startswith('/api/v1/item{i}/') and "
+                     f"'/' not in p.removeprefix('/api/v1/item{i}/'):\n"
+                     f"            return p.removeprefix('/api/v1/item{i}/')")
+    lines.append("        case ('GET', p) if p.startswith('/static/'):\n"
+                 "            return p.removeprefix('/static/')")
+    lines.append("        case _:\n            return None")
+    namespace: dict = {}
+    exec("\n".join(lines), namespace)       # pylint: disable=exec-used
+    return namespace["dispatch"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Router dispatch benchmark")
+    parser.add_argument("--routes", type=int, default=60)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    router = make_router(args.routes)
+    dispatch = make_match(args.routes)
+    last = args.routes - args.routes // 2 - 1
+    paths = {"first_literal": "/api/v1/thing0",
+             "last_literal": f"/api/v1/thing{args.routes // 2 - 1}",
+             "last_param": f"/api/v1/item{last}/abc",
+             "static": "/static/lab1_crypto/assets/index.js",
+             "miss": "/no/such/path"}
+    results = {}
+    print(f"{args.routes} routes, ns per dispatch")
+    print(f"{'path':<14} {'match':>8} {'router':>8}")
+    for name, path in paths.items():
+        t_match = timeit.timeit(lambda p=path: dispatch("GET", p), number=args.number)
+        t_router = timeit.timeit(lambda p=path: router.match("GET", p), number=args.number)
+        results[name] = {"match_ns": round(t_match / args.number * 1e9),
+                         "router_ns": round(t_router / args.number * 1e9)}
+        print(f"{name:<14} {results[name]['match_ns']:>8} {results[name]['router_ns']:>8}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of checking who is logged in from the signed session cookie.
+
+    python benchmarks/bench_sessions.py [--number 100000]
+
+Measures SessionSigner.verify alone, for a valid cookie and for forged and
+expired ones, and a whole GET /api/v1/session through lambda_handler. The
+alternative this replaces is a DynamoDB query per request (several ms).
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "iga_236"))
+os.environ.setdefault("METRICS_SAMPLE_RATE", "0")
+# pylint: disable=wrong-import-position
+from home_app import main as app
+from home_app.sessions import COOKIE_NAME, Keyring, SessionSigner, b64encode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="session verify benchmark")
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    keys = ",".join(f"k{i}:{b64encode(bytes([i]) * 32)}" for i in range(3, 0, -1))    # mid-rotation
+    signer = SessionSigner(Keyring.parse(keys, revoked=[f"sid{i}" for i in range(50)]))
+    old = SessionSigner(Keyring.parse(keys.split(",", 1)[1]))
+    valid = signer.issue("student42", "student42@example.edu")
+    tokens = {
+        "valid": valid,
+        "valid, older key": old.issue("student42", "student42@example.edu"),
+        "forged signature": valid[:-4] + "AAAA",
+        "expired": SessionSigner(signer.keyring, ttl=-1).issue("student42", "student42@example.edu"),
+    }
+    app.session_signer = lambda: signer
+    event = {"rawPath": "/api/v1/session", "cookies": [f"{COOKIE_NAME}={valid}"],
+             "requestContext": {"http": {"method": "GET"}}}
+    assert app.lambda_handler(event, None)["statusCode"] == 200
+
+    results = {}
+    print("us per call")
+    for name, token in tokens.items():
+        us = timeit.timeit(lambda token=token: signer.verify(token), number=args.number) / args.number * 1e6
+        results[f"verify {name}"] = round(us, 3)
+    number = max(1, args.number // 10)
+    us = timeit.timeit(lambda: app.lambda_handler(event, None), number=number) / number * 1e6
+    results["GET /api/v1/session"] = round(us, 3)
+    for name, us in results.items():
+        print(f"  {name:<28} {us:>9.3f}")
+    print(json.dumps({"cookie_bytes": len(valid), "us_per_call": results}))
+
+
+if __name__ == "__main__":
+    main()
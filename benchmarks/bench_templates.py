@@ -0,0 +1,68 @@
+"""
+Cold-start benchmark: time from a fresh interpreter to the first rendered
+404 and index pages, with template sources (TEMPLATE_DEV=1) and with the
+templates precompiled as `make templates` does. They are compiled into a
+temporary directory, so the benchmark leaves home_app/templates_compiled alone.
+
+    python benchmarks/bench_templates.py [--runs 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from os.path import abspath, dirname, join
+
+CODE_DIR = join(dirname(dirname(abspath(__file__))), "iga_236")
+
+# Runs in the child interpreter. Prints the timings as JSON.
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+from home_app import main
+t1 = time.perf_counter()
+main.error_404("/x")
+t2 = time.perf_counter()
+main.env().get_template("index.html").render()
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_404": t2 - t1, "first_index": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def sample(dev: bool, compiled_dir: str) -> dict:
+    """Time one fresh interpreter"""
+    child_env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", COMPILED_TEMPLATE_DIR=compiled_dir)
+    child_env.pop("TEMPLATE_DEV", None)
+    if dev:
+        child_env["TEMPLATE_DEV"] = "1"
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=CODE_DIR, env=child_env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    """Median milliseconds of each phase"""
+    return {k: round(statistics.median(s[k] for s in samples) * 1000, 2) for k in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    sys.path.insert(0, CODE_DIR)
+    from home_app import build_templates       # pylint: disable=import-outside-toplevel
+    with tempfile.TemporaryDirectory() as compiled_dir:
+        build_templates.build(compiled_dir)
+        results = {"sources": summarize([sample(True, compiled_dir) for _ in range(args.runs)]),
+                   "compiled": summarize([sample(False, compiled_dir) for _ in range(args.runs)])}
+    print(f"{'phase':<12} {'sources ms':>11} {'compiled ms':>12}")
+    for phase in results["sources"]:
+        print(f"{phase:<12} {results['sources'][phase]:>11} {results['compiled'][phase]:>12}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from pdfwriter import EICAR, text_ops, write_text_pdf
 
 def create_eicar_test_pdf(filename):
     """
@@ -9,28 +8,14 @@ def create_eicar_test_pdf(filename):
         filename (str): The name of the PDF file to be created.
     """
     try:
-        # Create a new PDF file
-        c = canvas.Canvas(filename, pagesize=letter)
-        
-        # Define the EICAR string
-        eicar_string = b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
-        
-        # Add the main text to the PDF
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(100, 700, "THIS PDF DOES NOT CONTAIN A VIRUS")
-        
-        # Embed the EICAR string as a raw byte stream
-        # This makes the string part of the PDF's internal content,
-        # which is what antivirus software will scan.
-        c.drawString(100, 650, f"Embedded EICAR Test String: {eicar_string.decode('utf-8')}")
+        # The EICAR string is drawn as page text. A PDF string literal escapes its
+        # \, ( and ), so the content stream holds an escaped copy, not the exact
+        # 68 bytes (as the reportlab version did); make2.py embeds them raw.
+        content = (text_ops(["THIS PDF DOES NOT CONTAIN A VIRUS"], size=16, x=100, y=700) +
+                   text_ops([f"Embedded EICAR Test String: {EICAR}"], size=16, x=100, y=650))
+        with open(filename, "wb") as f:
+            write_text_pdf(f, [content], font="Helvetica-Bold")
 
-        # You can also embed the string in an invisible part of the document
-        # to ensure it's not visible but still scannable.
-        # This example makes it visible for demonstration purposes.
-
-        # Save the PDF
-        c.save()
-        
         print(f"Successfully created '{filename}'.")
         print("This file should be detected by antivirus software.")
         
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Generate many distinct EICAR/JavaScript test PDFs for load-testing scanners.
+
+    python make_corpus.py -n 5000 --outdir corpus
+
+Each file is one combination of
+    payload    where the EICAR string goes: a comment after the header, after %%EOF,
+               or inside an (unreferenced) stream object
+    compress   whether streams are Flate-compressed (the EICAR stream too, so a
+               scanner has to inflate it to find the string)
+    pages      number of pages
+    js         whether the catalog has an /OpenAction that runs JavaScript
+cycled in order, so any run of len(VARIANTS) files covers every combination.
+Every page names the file's index, so no two files have the same sha256.
+
+Files are written across a process pool; manifest.jsonl gets one line per file
+with its name, sha256, size and features. A run rewrites the manifest; with
+--start N it keeps the records of files numbered below N, so a corpus can be
+extended (or a run resumed) without duplicating records. Nothing here touches the network
+(unlike make11.py, which is deliberately not imported).
+
+WARNING: the output will be detected and possibly quarantined by antivirus software.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pdfwriter import EICAR, pdf_string, text_ops, write_text_pdf
+
+PAYLOADS = ("header", "post-eof", "stream")
+PAGES = (1, 3, 10)
+JS = "app.alert('bang', 3);"
+VARIANTS = [{"payload": payload, "compress": compress, "pages": pages, "js": js}
+            for payload, compress, pages, js
+            in itertools.product(PAYLOADS, (False, True), PAGES, (False, True))]
+
+
+class HashingFile:
+    """Write-through file wrapper that hashes and counts what is written"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+
+def variant(index):
+    """Features of the index'th file"""
+    return VARIANTS[index % len(VARIANTS)]
+
+
+def filename(index, features):
+    return (f"{index:06d}-{features['payload']}-{'z' if features['compress'] else 'raw'}"
+            f"-p{features['pages']}{'-js' if features['js'] else ''}.pdf")
+
+
+def write_variant(f, index, features):
+    """Write one test PDF to the binary file f"""
+    eicar = EICAR.encode("ascii")
+    pages = (text_ops(["This file does not contain a virus", f"Test file {index}, page {p + 1}"])
+             for p in range(features["pages"]))
+    pdf = write_text_pdf(f, pages,
+                         comments=[eicar] if features["payload"] == "header" else (),
+                         extra_streams=[eicar] if features["payload"] == "stream" else (),
+                         compress=features["compress"],
+                         catalog_entries=(b"/OpenAction << /S /JavaScript /JS " + pdf_string(JS) + b" >>"
+                                          if features["js"] else b""))
+    if features["payload"] == "post-eof":
+        pdf.write(b"\n" + eicar + b"\n")
+
+
+def make_file(args):
+    """Write file number index into outdir; return its manifest record"""
+    index, outdir = args
+    features = variant(index)
+    name = filename(index, features)
+    with open(Path(outdir) / name, "wb") as raw:
+        f = HashingFile(raw)
+        write_variant(f, index, features)
+    return {"file": name, "sha256": f.sha256.hexdigest(), "size": f.size, "features": features}
+
+
+def earlier_records(manifest, start):
+    """The manifest lines of files numbered below start"""
+    try:
+        with open(manifest) as m:
+            return [line for line in m if line.strip() and int(json.loads(line)["file"][:6]) < start]
+    except FileNotFoundError:
+        return []
+
+
+def make_corpus(count, outdir, workers=None, start=0, manifest=None, progress=sys.stderr):
+    """Write count files (numbered from start) and their manifest. Return the manifest path."""
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    manifest = Path(manifest) if manifest else outdir / "manifest.jsonl"
+    kept = earlier_records(manifest, start) if start else []
+    t0 = time.time()
+    tasks = [(i, str(outdir)) for i in range(start, start + count)]
+    chunksize = max(1, count // (4 * (workers or os.cpu_count() or 1)))
+    with (ProcessPoolExecutor(max_workers=workers) as pool,
+          open(manifest, "w", buffering=1 << 16) as m):
+        m.writelines(kept)
+        for done, record in enumerate(pool.map(make_file, tasks, chunksize=chunksize), start=1):
+            m.write(json.dumps(record) + "\n")
+            if done % 100 == 0 or done == count:
+                print(f"\r{done}/{count} files  {done / (time.time() - t0):.0f} files/s",
+                      end="", file=progress, flush=True)
+    print(file=progress)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=len(VARIANTS), help="number of files")
+    parser.add_argument("--outdir", default="corpus", help="where to write the files")
+    parser.add_argument("--start", type=int, default=0, help="number of the first file (to extend a corpus)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--manifest", help="JSONL manifest (default: OUTDIR/manifest.jsonl)")
+    args = parser.parse_args()
+    print(make_corpus(args.count, args.outdir, args.workers, args.start, args.manifest))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Minimal incremental PDF writer shared by the make*.py generators.
+
+Objects are written straight to the output file as they are added; only
+their byte offsets are kept, for the xref table. Streams may be given as an
+iterable of chunks, in which case they are written (and optionally
+Flate-compressed) chunk by chunk with an indirect /Length, so a generator can
+produce any number of pages and arbitrarily large content in linear time
+without ever holding the whole file in memory.
+
+    with open("out.pdf", "wb") as f:
+        pdf = PdfWriter(f)
+        ...
+        pdf.close(root=catalog)
+"""
+import zlib
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+
+EICAR = "X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
+LETTER = (612, 792)
+
+StreamData = Union[bytes, Iterable[bytes]]
+
+
+def pdf_string(text: str) -> bytes:
+    """Encode text as a PDF literal string, escaping \\, ( and )"""
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1") + b")"
+
+
+def ref(num: int) -> bytes:
+    """Indirect reference to object num"""
+    return f"{num} 0 R".encode("ascii")
+
+
+def text_ops(lines: Iterable[str], font: bytes = b"/F1", size: int = 24,
+             x: int = 72, y: int = 720, leading: Optional[int] = None) -> bytes:
+    """Content-stream operators that draw lines of text downwards from (x, y)"""
+    leading = leading if leading is not None else size + size // 4
+    ops = [b"BT %s %d Tf %d %d Td" % (font, size, x, y)]
+    for i, line in enumerate(lines):
+        if i:
+            ops.append(b"0 %d Td" % -leading)
+        ops.append(pdf_string(line) + b" Tj")
+    ops.append(b"ET\n")
+    return b"\n".join(ops)
+
+
+class PdfWriter:
+    """Writes PDF objects to a binary file as they are added"""
+
+    def __init__(self, f: BinaryIO, version: str = "1.4"):
+        self.f = f
+        self.pos = 0
+        self.offsets: Dict[int, int] = {}
+        self.next_num = 1
+        self.write(b"%PDF-" + version.encode("ascii") + b"\n")
+        self.write(b"%\xE2\xE3\xCF\xD3\n")       # binary marker recommended by the spec
+
+    def write(self, data: bytes) -> None:
+        """Write raw bytes and keep track of the file offset"""
+        self.f.write(data)
+        self.pos += len(data)
+
+    def comment(self, text: bytes) -> None:
+        """Write a % comment line"""
+        self.write(b"%" + text + b"\n")
+
+    def reserve(self) -> int:
+        """Allocate an object number to be written later (for forward references)"""
+        num = self.next_num
+        self.next_num += 1
+        return num
+
+    def _begin(self, num: Optional[int]) -> int:
+        num = self.reserve() if num is None else num
+        if num in self.offsets:
+            raise ValueError(f"object {num} already written")
+        self.offsets[num] = self.pos
+        self.write(f"{num} 0 obj\n".encode("ascii"))
+        return num
+
+    def add(self, body: bytes, num: Optional[int] = None) -> int:
+        """Write an object and return its number"""
+        num = self._begin(num)
+        self.write(body + b"\nendobj\n")
+        return num
+
+    def add_stream(self, data: StreamData, entries: bytes = b"", compress: bool = False,
+                   num: Optional[int] = None) -> int:
+        """Write a stream object. entries are extra dictionary entries (e.g. b"/Type /EmbeddedFile").
+        data may be bytes or an iterable of byte chunks."""
+        filters = b" /Filter /FlateDecode" if compress else b""
+        filters += b" " + entries if entries else b""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            body = zlib.compress(data) if compress else bytes(data)
+            num = self._begin(num)
+            self.write(b"<< /Length %d%s >>\nstream\n" % (len(body), filters))
+            self.write(body)
+        else:
+            length_num = self.reserve()
+            num = self._begin(num)
+            self.write(b"<< /Length %s%s >>\nstream\n" % (ref(length_num), filters))
+            start = self.pos
+            z = zlib.compressobj() if compress else None
+            for chunk in data:
+                self.write(z.compress(chunk) if z else chunk)
+            if z:
+                self.write(z.flush())
+            length = self.pos - start
+        self.write(b"\nendstream\nendobj\n")
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            self.add(str(length).encode("ascii"), num=length_num)
+        return num
+
+    def close(self, root: int, info: Optional[int] = None) -> int:
+        """Write the xref table and trailer. Return the offset of the xref table."""
+        size = self.next_num
+        missing = [n for n in range(1, size) if n not in self.offsets]
+        if missing:
+            raise ValueError(f"objects reserved but never written: {missing}")
+        startxref = self.pos
+        self.write(f"xref\n0 {size}\n".encode("ascii"))
+        self.write(b"0000000000 65535 f \n")
+        for n in range(1, size):
+            self.write(f"{self.offsets[n]:010d} 00000 n \n".encode("ascii"))
+        trailer = b"<< /Size %d /Root %s" % (size, ref(root))
+        if info is not None:
+            trailer += b" /Info " + ref(info)
+        self.write(b"trailer\n" + trailer + b" >>\nstartxref\n%d\n%%%%EOF\n" % startxref)
+        return startxref
+
+
+def write_text_pdf(f: BinaryIO, pages: Iterable[StreamData], *,
+                   font: str = "Helvetica", comments: Iterable[bytes] = (),
+                   extra_streams: Iterable[bytes] = (), compress: bool = False,
+                   catalog_entries: bytes = b"", page_size=LETTER) -> PdfWriter:
+    """Write a PDF with one page per content stream in pages, all using font as /F1.
+    extra_streams are written as unreferenced stream objects (still in the xref);
+    compress applies to them as well as to the pages.
+    Returns the writer so the caller can append bytes after %%EOF."""
+    pdf = PdfWriter(f)
+    for c in comments:
+        pdf.comment(c)
+    catalog = pdf.reserve()
+    page_tree = pdf.reserve()
+    font_num = pdf.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /" + font.encode("ascii") + b" >>")
+    kids: List[int] = []
+    for content in pages:
+        contents = pdf.add_stream(content, compress=compress)
+        kids.append(pdf.add(b"<< /Type /Page /Parent %s /MediaBox [0 0 %d %d] /Contents %s "
+                            b"/Resources << /Font << /F1 %s >> >> >>"
+                            % (ref(page_tree), page_size[0], page_size[1], ref(contents),
+                               ref(font_num))))
+    for data in extra_streams:
+        pdf.add_stream(data, compress=compress)
+    pdf.add(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (b" ".join(ref(k) for k in kids), len(kids)), num=page_tree)
+    pdf.add(b"<< /Type /Catalog /Pages %s%s >>"
+            % (ref(page_tree), b" " + catalog_entries if catalog_entries else b""), num=catalog)
+    pdf.close(root=catalog)
+    return pdf
@@ -0,0 +1,38 @@
+"""Tests for the test-PDF corpus generator"""
+import hashlib
+import io
+import json
+
+import pytest
+
+import make_corpus
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def read_manifest(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_small_corpus(tmp_path):
+    count = len(make_corpus.VARIANTS) + 2
+    manifest = make_corpus.make_corpus(count, tmp_path, workers=1, progress=io.StringIO())
+    records = read_manifest(manifest)
+    assert [r["file"][:6] for r in records] == [f"{i:06d}" for i in range(count)]
+    assert len({r["sha256"] for r in records}) == count
+    assert records[-1]["features"] == make_corpus.VARIANTS[1]
+    for r in records:
+        data = (tmp_path / r["file"]).read_bytes()
+        assert hashlib.sha256(data).hexdigest() == r["sha256"] and len(data) == r["size"]
+        assert make_corpus.EICAR.encode("ascii") in data or r["features"]["compress"]
+        reader = pypdf.PdfReader(tmp_path / r["file"], strict=True)
+        assert len(reader.pages) == r["features"]["pages"]
+
+
+def test_rerun_does_not_duplicate(tmp_path):
+    quiet = io.StringIO()
+    make_corpus.make_corpus(4, tmp_path, workers=1, progress=quiet)
+    manifest = make_corpus.make_corpus(4, tmp_path, workers=1, progress=quiet)
+    assert len(read_manifest(manifest)) == 4
+    make_corpus.make_corpus(3, tmp_path, workers=1, start=2, progress=quiet)
+    assert [r["file"][:6] for r in read_manifest(manifest)] == [f"{i:06d}" for i in range(5)]
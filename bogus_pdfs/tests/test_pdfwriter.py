@@ -0,0 +1,55 @@
+"""Every generator's output parses as a PDF in pypdf's strict mode"""
+import importlib.util
+import logging
+from os.path import dirname, join
+
+import pytest
+
+import make10
+import make11
+import make2
+from pdfwriter import EICAR
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def load_make_ecar():
+    """make-ecar-pdf.py is not an importable module name"""
+    spec = importlib.util.spec_from_file_location(
+        "make_ecar_pdf", join(dirname(dirname(__file__)), "make-ecar-pdf.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def page_text(path):
+    """The text of every page, read strictly"""
+    return [page.extract_text() for page in pypdf.PdfReader(path, strict=True).pages]
+
+
+def generate(name, tmp_path, monkeypatch):
+    """Run one generator into tmp_path; return the paths it wrote"""
+    if name == "make10":
+        make10.main(str(tmp_path / "make10.pdf"))
+        return [tmp_path / "make10.pdf"]
+    if name == "make11":
+        monkeypatch.setattr(make11, "fetch_url", lambda: None)      # no network in tests
+        make11.main(str(tmp_path / "make11.pdf"))
+        return [tmp_path / "make11.pdf"]
+    if name == "make2":
+        make2.inject_eicar_into_pdf(str(tmp_path / "initial.pdf"), str(tmp_path / "make2.pdf"))
+        return [tmp_path / "initial.pdf", tmp_path / "make2.pdf"]
+    load_make_ecar().create_eicar_test_pdf(str(tmp_path / "ecar.pdf"))
+    return [tmp_path / "ecar.pdf"]
+
+
+@pytest.mark.parametrize("name", ["make10", "make11", "make2", "make-ecar"])
+def test_strictly_valid(name, tmp_path, monkeypatch, caplog):
+    paths = generate(name, tmp_path, monkeypatch)
+    with caplog.at_level(logging.WARNING, logger="pypdf"):
+        for path in paths:
+            text = page_text(path)
+            assert len(text) == 1 and "VIRUS" in text[0].upper()
+    assert not caplog.records
+    if name != "make-ecar":             # make-ecar draws it as text, with its parentheses escaped
+        assert EICAR.encode("ascii") in paths[-1].read_bytes()
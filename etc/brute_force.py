@@ -0,0 +1,226 @@
+"""
+Guess the password of a lab message, the way lab1_guesser does, on every core.
+
+    python brute_force.py message.asc --alphabet 0123456789 --length 4
+    python brute_force.py --assignment assignments/student@example.edu.txt --budget 3600
+
+The message and its S2K parameters are parsed once. Candidate passwords are
+numbered in generatePassword order (base-N, most significant character first),
+and the index space is cut into chunks that a process pool searches lowest
+first. Within a chunk, keys are derived a batch at a time and only a key that
+passes the quick check is used to decrypt. When any worker finds the password,
+the others stop at their next batch and queued chunks are cancelled. With a
+budget, every worker also stops at its first batch after the deadline.
+
+--assignment checks every message in a file written by random_quotes.py
+(which prints each one's alphabet and character count above it) and exits 1
+if any is not found within --budget seconds.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import pgp_symmetric
+
+CHUNK_SIZE = 256                # passwords per pool task
+BATCH_SIZE = 16                 # passwords derived between checks for cancellation
+ASSIGNMENT_RE = re.compile(r"Encryption Alphabet: (?P<alphabet>[^\n]*)\nCharacter count: (?P<length>\d+)\n"
+                           r"(?P<armored>-----BEGIN PGP MESSAGE-----.*?-----END PGP MESSAGE-----)", re.S)
+
+
+def generate_password(n: int, alphabet: str, length: int) -> str:
+    """Password number n: n written in base len(alphabet), length digits (lab1_guesser's generatePassword)"""
+    base = len(alphabet)
+    chars = []
+    for _ in range(length):
+        n, digit = divmod(n, base)
+        chars.append(alphabet[digit])
+    return "".join(reversed(chars))
+
+
+@dataclass
+class Found:
+    """A password that decrypts the message"""
+    index: int
+    password: str
+    plaintext: bytes
+
+
+@dataclass
+class Result:
+    """The outcome of a search"""
+    found: Optional[Found]
+    attempts: int               # passwords tried, over all workers
+    seconds: float
+    timed_out: bool = False     # the budget ran out before the search did
+
+    @property
+    def rate(self) -> float:
+        """Attempts per second"""
+        return self.attempts / self.seconds if self.seconds else 0.0
+
+
+def search_range(message: pgp_symmetric.Message, alphabet: str, length: int, start: int, stop: int,
+                 stop_event=None, batch_size: int = BATCH_SIZE,
+                 deadline: Optional[float] = None) -> Tuple[Optional[Found], int]:
+    """Try passwords start..stop-1, giving up at the deadline (time.time()).
+    Returns (what was found, attempts made)."""
+    attempts = 0
+    for batch_start in range(start, stop, batch_size):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if deadline is not None and time.time() >= deadline:
+            break
+        indexes = range(batch_start, min(batch_start + batch_size, stop))
+        passwords = [generate_password(i, alphabet, length) for i in indexes]
+        keys = [message.key(password) for password in passwords]
+        attempts += len(keys)
+        for index, password, key in zip(indexes, passwords, keys):
+            if message.check(key):
+                plaintext = message.decrypt_with_key(key)      # None for the 1 in 65536 false positive
+                if plaintext is not None:
+                    return Found(index, password, plaintext), attempts
+    return None, attempts
+
+
+# per-worker state, set by _init_worker so each task only carries its range
+_MESSAGE: Optional[pgp_symmetric.Message] = None
+_STOP = None
+_DEADLINE: Optional[float] = None
+
+def _init_worker(message, stop_event, deadline):
+    global _MESSAGE, _STOP, _DEADLINE       # pylint: disable=global-statement
+    _MESSAGE, _STOP, _DEADLINE = message, stop_event, deadline
+
+def _search_task(args):
+    alphabet, length, start, stop, batch_size = args
+    found, attempts = search_range(_MESSAGE, alphabet, length, start, stop, _STOP, batch_size, _DEADLINE)
+    if found is not None:
+        _STOP.set()
+    return found, attempts
+
+
+def chunks(total: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """(start, stop) ranges covering 0..total-1 in order"""
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+def brute_force(message, alphabet: str, length: int, workers: Optional[int] = None,
+                chunk_size: int = CHUNK_SIZE, batch_size: int = BATCH_SIZE,
+                budget: Optional[float] = None) -> Result:
+    """Search every password of length over alphabet for the one that decrypts message
+    (a Message, or an armored or binary message), for at most budget seconds"""
+    if not isinstance(message, pgp_symmetric.Message):
+        message = pgp_symmetric.Message.parse(message)
+    total = len(alphabet) ** length
+    workers = workers or os.cpu_count() or 1
+    deadline = time.time() + budget if budget is not None else None
+    t0 = time.perf_counter()
+
+    def result(found, attempts):
+        return Result(found, attempts, time.perf_counter() - t0,
+                      timed_out=found is None and attempts < total and deadline is not None)
+
+    if workers == 1:
+        return result(*search_range(message, alphabet, length, 0, total, batch_size=batch_size,
+                                    deadline=deadline))
+
+    stop_event = multiprocessing.Event()
+    found, attempts = None, 0
+    pending = set()
+    ranges = chunks(total, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(message, stop_event, deadline)) as pool:
+        # keep a couple of chunks per worker queued, so cancelling is cheap and the
+        # low indexes (which generatePassword tries first) are searched first
+        def refill():
+            while (len(pending) < 2 * workers and not stop_event.is_set()
+                   and (deadline is None or time.time() < deadline)):
+                r = next(ranges, None)
+                if r is None:
+                    return
+                pending.add(pool.submit(_search_task, (alphabet, length, *r, batch_size)))
+
+        refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                if future.cancelled():
+                    continue
+                chunk_found, chunk_attempts = future.result()
+                attempts += chunk_attempts
+                if chunk_found is not None and (found is None or chunk_found.index < found.index):
+                    found = chunk_found
+            if found is not None:
+                stop_event.set()
+                for future in pending:
+                    future.cancel()
+            refill()
+    return result(found, attempts)
+
+
+def read_assignment(text: str) -> List[Tuple[str, int, str]]:
+    """(alphabet, length, armored message) for each message in an assignment file"""
+    return [(m["alphabet"], int(m["length"]), m["armored"]) for m in ASSIGNMENT_RE.finditer(text)]
+
+
+def check_assignment(path: str, workers: Optional[int], budget: Optional[float]) -> bool:
+    """Crack every message in an assignment file; True if all were found within budget"""
+    ok = True
+    with open(path, encoding="utf-8") as f:
+        messages = read_assignment(f.read())
+    if not messages:
+        print(f"{path}: no messages found", file=sys.stderr)
+        return False
+    for i, (alphabet, length, armored) in enumerate(messages):
+        result = brute_force(armored, alphabet, length, workers, budget=budget)
+        status = "ok"
+        if result.timed_out or (budget is not None and result.seconds > budget):
+            status, ok = "OVER BUDGET", False
+        elif result.found is None:
+            status, ok = "NOT FOUND", False
+        password = result.found.password if result.found else "-"
+        print(f"{path} message {i}: {status} password={password!r} length={length} "
+              f"alphabet={len(alphabet)} attempts={result.attempts} {result.seconds:.1f}s "
+              f"{result.rate:.1f}/s")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("message", nargs="?", help="armored message file ('-' for stdin)")
+    parser.add_argument("--alphabet", help="characters the password is made of")
+    parser.add_argument("--length", type=int, help="password length")
+    parser.add_argument("--assignment", action="append", default=[],
+                        help="assignment file written by random_quotes.py; may be repeated")
+    parser.add_argument("--budget", type=float, help="seconds each message may take")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.assignment:
+        ok = all([check_assignment(path, args.workers, args.budget) for path in args.assignment])
+        sys.exit(0 if ok else 1)
+    if not (args.message and args.alphabet and args.length):
+        parser.error("give a message with --alphabet and --length, or --assignment")
+    with (sys.stdin if args.message == "-" else open(args.message, encoding="utf-8")) as f:
+        armored = f.read()
+    result = brute_force(armored, args.alphabet, args.length, args.workers, budget=args.budget)
+    print(f"{result.attempts} attempts in {result.seconds:.1f}s ({result.rate:.1f}/s)", file=sys.stderr)
+    if result.found is None:
+        print("budget exhausted" if result.timed_out else "password not found", file=sys.stderr)
+        sys.exit(1)
+    print(f"password: {result.found.password}", file=sys.stderr)
+    sys.stdout.write(result.found.plaintext.decode("utf-8", errors="replace"))
+
+
+if __name__ == "__main__":
+    main()
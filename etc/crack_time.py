@@ -0,0 +1,144 @@
+"""
+How long does it take to guess the lab passwords?
+
+    python crack_time.py                           # the lab's LEVELS (levels.py)
+    python crack_time.py --sweep --csv sweep.csv   # every alphabet x length
+    python crack_time.py --bench-only --json       # just the decrypt benchmark
+
+lab1_guesser tries passwords of a known length in base-N order
+(generatePassword), so a password of length L over an alphabet of N characters
+is found after at most N**L guesses, and N**L / 2 on average. Each guess costs
+one S2K key derivation; this measures how many a core does per second
+(in-process, on a real message, the same work as Message.decrypt for a wrong
+password) and projects the worst and expected time with NumPy over any grid of
+alphabet sizes and lengths.
+
+The projection assumes the measured rate on every one of --workers cores.
+Browsers running openpgp.js are slower; use --rate to project for them.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+import pgp_symmetric
+from levels import LEVELS
+
+BENCH_PASSWORD = "correct horse"
+ALPHABETS = {"ones": 1, "digits": 10, "lowercase": 26, "alphanumeric": 62, "printable": 95}
+DURATIONS = (("years", 365.25 * 86400), ("days", 86400), ("hours", 3600), ("minutes", 60))
+
+
+def attempts_per_second(s2k_count: int = pgp_symmetric.DEFAULT_S2K_COUNT,
+                        seconds: float = 2.0, min_attempts: int = 3) -> float:
+    """Wrong-password decrypt attempts per second on one core at this S2K count"""
+    message = pgp_symmetric.Message.parse(pgp_symmetric.encrypt("x", BENCH_PASSWORD, s2k_count=s2k_count))
+    attempts = 0
+    t0 = time.perf_counter()
+    elapsed = 0.0
+    while attempts < min_attempts or elapsed < seconds:
+        # a wrong password passes the 2-byte quick check 1 time in 65536 and then fails the MDC
+        if message.decrypt(f"guess{attempts}") is not None:
+            raise AssertionError("a wrong password decrypted the benchmark message")
+        attempts += 1
+        elapsed = time.perf_counter() - t0
+    return attempts / elapsed
+
+
+def keyspace(alphabet_sizes: Iterable[int], lengths: Iterable[int]) -> np.ndarray:
+    """Passwords of each length over each alphabet: sizes**lengths, shape (len(sizes), len(lengths)).
+    float64, so it stays finite (if inexact) far beyond the sizes that matter here."""
+    sizes = np.asarray(list(alphabet_sizes), dtype=np.float64)
+    return np.power.outer(sizes, np.asarray(list(lengths), dtype=np.float64))
+
+
+def crack_seconds(space: np.ndarray, rate: float) -> Dict[str, np.ndarray]:
+    """Worst-case and expected seconds to search space at rate guesses/second.
+    A password chosen uniformly at random is found after (N + 1) / 2 guesses on average."""
+    return {"worst": space / rate, "expected": (space + 1) / 2 / rate}
+
+
+def human(seconds: float) -> str:
+    """A duration in the largest unit it fills: '3.2 days'"""
+    if not np.isfinite(seconds):
+        return "forever"
+    for name, size in DURATIONS:
+        if seconds >= size:
+            return f"{seconds / size:.3g} {name}"
+    return f"{seconds:.3g} seconds"
+
+
+def level_table(levels: Sequence, rate: float) -> list[dict]:
+    """One row per (length, alphabet) level, with exact keyspace sizes"""
+    space = np.array([float(len(alphabet)) ** count for count, alphabet in levels])
+    times = crack_seconds(space, rate)
+    return [{"level": i, "length": count, "alphabet_size": len(alphabet),
+             "keyspace": len(alphabet) ** count,
+             "worst_seconds": float(times["worst"][i]), "expected_seconds": float(times["expected"][i])}
+            for i, (count, alphabet) in enumerate(levels)]
+
+
+def sweep_table(alphabets: Dict[str, int], lengths: Sequence[int], rate: float) -> list[dict]:
+    """One row per alphabet and length"""
+    space = keyspace(alphabets.values(), lengths)
+    times = crack_seconds(space, rate)
+    return [{"alphabet": name, "alphabet_size": size, "length": length, "keyspace": float(space[i, j]),
+             "worst_seconds": float(times["worst"][i, j]),
+             "expected_seconds": float(times["expected"][i, j])}
+            for i, (name, size) in enumerate(alphabets.items()) for j, length in enumerate(lengths)]
+
+
+def print_table(rows: list[dict], key: str) -> None:
+    print(f"{key:>13} {'len':>4} {'keyspace':>12} {'expected':>16} {'worst':>16}")
+    for row in rows:
+        print(f"{row[key]:>13} {row['length']:>4} {row['keyspace']:>12.4g} "
+              f"{human(row['expected_seconds']):>16} {human(row['worst_seconds']):>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--s2k-count", type=int, default=pgp_symmetric.DEFAULT_S2K_COUNT,
+                        help="octets hashed per guess (random_quotes.py --s2k-count)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="how long to benchmark")
+    parser.add_argument("--rate", type=float, help="guesses/second per worker, instead of measuring")
+    parser.add_argument("--workers", type=int, default=1, help="cores guessing in parallel")
+    parser.add_argument("--sweep", action="store_true", help="every alphabet in ALPHABETS x --max-length")
+    parser.add_argument("--max-length", type=int, default=12)
+    parser.add_argument("--csv", help="write the table here")
+    parser.add_argument("--bench-only", action="store_true", help="only measure attempts/second")
+    parser.add_argument("--json", action="store_true", help="print the results as one JSON object")
+    args = parser.parse_args()
+
+    per_worker = args.rate or attempts_per_second(args.s2k_count, args.seconds)
+    rate = per_worker * args.workers
+    result = {"s2k_count": args.s2k_count, "attempts_per_second": round(per_worker, 3),
+              "workers": args.workers, "measured": args.rate is None}
+    if not args.json:
+        print(f"s2k count {args.s2k_count}: {per_worker:.3f} attempts/s per worker, {rate:.3f} total")
+    if not args.bench_only:
+        if args.sweep:
+            rows = sweep_table(ALPHABETS, list(range(1, args.max_length + 1)), rate)
+            key = "alphabet"
+        else:
+            rows = level_table(LEVELS, rate)
+            key = "level"
+        result["rows"] = rows
+        if not args.json:
+            print_table(rows, key)
+        if args.csv:
+            with open(args.csv, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+    if args.json:
+        json.dump(result, sys.stdout)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Email each student their assignment, as written by `random_quotes.py --roster`.
+
+    python deliver.py --sender iga236@cybersecurity-policy.org                 # over SES
+    python deliver.py --sender ... --smtp localhost:1025                       # over SMTP
+    python deliver.py --sink /tmp/mail --port 1025                             # local SMTP sink
+
+Every ASSIGNMENTS_DIR/<email>.txt becomes one MIME message to <email>, with the
+ciphertexts in the body and attached as assignment.txt. Messages are sent on
+--workers threads sharing one SES client (or one SMTP connection per thread),
+paced by a token bucket to --rate messages/second (by default the account's
+SES MaxSendRate), and throttled sends are retried with backoff.
+
+Each delivery is appended to --journal as soon as it is accepted, and students
+already in the journal are skipped, so a rerun after a crash continues where
+the last one stopped. (A crash between the send and the journal write can
+still send that one message twice.)
+
+--sink runs an SMTP server that accepts everything and saves each message as a
+.eml file, for trying the whole pipeline without sending real mail.
+"""
+import argparse
+import json
+import os
+import random
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import make_msgid
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set
+
+from levels import ASSIGNMENTS_DIR
+
+SUBJECT = "IGA-236: your encrypted messages"
+BODY = """Your messages for the password-cracking lab are below and attached as assignment.txt.
+For each one you are told the alphabet and the number of characters in its password.
+
+"""
+JOURNAL = Path(__file__).parent / "deliveries.jsonl"
+DEFAULT_WORKERS = 8
+DEFAULT_RETRIES = 6
+BACKOFF_SECONDS = 0.5               # doubled for each retry, with jitter
+THROTTLE_CODES = {"Throttling", "ThrottlingException", "TooManyRequestsException"}
+SMTP_RETRY_CODES = {421, 450, 451, 452, 454}
+
+
+class Throttled(Exception):
+    """The mail service asked us to slow down; the send may be retried"""
+
+
+@dataclass
+class Job:
+    """One student's assignment"""
+    email: str
+    path: Path
+
+
+def jobs_in(directory: Path) -> Iterator[Job]:
+    """A Job for each <email>.txt in directory"""
+    for path in sorted(Path(directory).glob("*.txt")):
+        if "@" in path.stem:
+            yield Job(path.stem, path)
+
+
+def build_message(job: Job, sender: str, subject: str = SUBJECT) -> EmailMessage:
+    """The MIME message for one student"""
+    text = job.path.read_text(encoding="utf-8")
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = job.email
+    msg["Subject"] = subject
+    msg["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or None)
+    msg.set_content(BODY + text)
+    msg.add_attachment(text.encode("utf-8"), maintype="text", subtype="plain", filename="assignment.txt")
+    return msg
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, and bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until there is one"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Journal:
+    """Append-only JSON lines of delivered messages"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.sent: Set[str] = set()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:        # a line cut short by a crash
+                        continue
+                    if record.get("status") == "sent":
+                        self.sent.add(record["email"])
+
+    def record(self, email: str, status: str, **fields) -> None:
+        """Append one record and flush it to disk"""
+        line = json.dumps({"email": email, "status": status, "time": time.time(), **fields})
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if status == "sent":
+                self.sent.add(email)
+
+
+class SESTransport:
+    """Sends raw messages with one SES client, shared by every thread"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, region: Optional[str] = None):
+        import boto3                                    # pylint: disable=import-outside-toplevel
+        from botocore.config import Config              # pylint: disable=import-outside-toplevel
+        # one connection per thread, and retries are ours so they go through the token bucket
+        config = Config(max_pool_connections=workers, retries={"max_attempts": 1, "mode": "standard"})
+        self.client = boto3.client("ses", region_name=region, config=config)
+
+    def max_rate(self) -> float:
+        """The account's maximum messages per second"""
+        return float(self.client.get_send_quota()["MaxSendRate"])
+
+    def send(self, msg: EmailMessage) -> str:
+        """Send msg and return SES's message id"""
+        try:
+            resp = self.client.send_raw_email(RawMessage={"Data": msg.as_bytes()})
+        except Exception as e:                          # botocore.exceptions.ClientError
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in THROTTLE_CODES:
+                raise Throttled(str(e)) from e
+            raise
+        return resp["MessageId"]
+
+    def close(self) -> None:
+        """Nothing to release; the client is closed with the process"""
+
+
+class SMTPTransport:
+    """Sends over SMTP, keeping one connection per thread"""
+
+    def __init__(self, host: str, port: int, starttls: bool = False,
+                 username: Optional[str] = None, password: Optional[str] = None):
+        self.host, self.port, self.starttls = host, port, starttls
+        self.username, self.password = username, password
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def max_rate(self) -> float:
+        """No limit we can ask the server about"""
+        return float("inf")
+
+    def _connection(self) -> smtplib.SMTP:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = smtplib.SMTP(self.host, self.port)
+            if self.starttls:
+                conn.starttls()
+            if self.username:
+                conn.login(self.username, self.password or "")
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def send(self, msg: EmailMessage) -> str:
+        """Send msg and return its Message-ID"""
+        try:
+            self._connection().send_message(msg)
+        except smtplib.SMTPServerDisconnected as e:
+            self.local.conn = None                      # reconnect on the next try
+            raise Throttled("server disconnected") from e
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code in SMTP_RETRY_CODES:
+                raise Throttled(f"{e.smtp_code} {e.smtp_error!r}") from e
+            raise
+        return msg["Message-ID"]
+
+    def close(self) -> None:
+        """Close every thread's connection"""
+        for conn in self.connections:
+            try:
+                conn.quit()
+            except smtplib.SMTPException:
+                pass
+
+
+def send_with_retry(transport, msg: EmailMessage, bucket: Optional[TokenBucket],
+                    retries: int = DEFAULT_RETRIES, backoff: float = BACKOFF_SECONDS) -> str:
+    """Send msg, waiting for a token before each attempt and backing off when throttled"""
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            return transport.send(msg)
+        except Throttled:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+    raise AssertionError("unreachable")
+
+
+def deliver(jobs: Iterable[Job], transport, journal: Journal, sender: str,
+            workers: int = DEFAULT_WORKERS, rate: Optional[float] = None,
+            retries: int = DEFAULT_RETRIES, subject: str = SUBJECT, progress=sys.stderr) -> dict:
+    """Send every job not already in the journal. Returns counts of sent, skipped and failed."""
+    rate = rate if rate is not None else transport.max_rate()
+    bucket = TokenBucket(rate) if rate != float("inf") else None
+    counts = {"sent": 0, "skipped": 0, "failed": 0}
+    todo = []
+    for job in jobs:
+        if job.email in journal.sent:
+            counts["skipped"] += 1
+        else:
+            todo.append(job)
+
+    def send(job: Job) -> str:
+        return send_with_retry(transport, build_message(job, sender, subject), bucket, retries)
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(send, job): job for job in todo}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                message_id = future.result()
+            except Exception as e:          # pylint: disable=broad-exception-caught
+                journal.record(job.email, "failed", error=f"{type(e).__name__}: {e}")
+                counts["failed"] += 1
+            else:
+                journal.record(job.email, "sent", message_id=message_id)
+                counts["sent"] += 1
+            done = counts["sent"] + counts["failed"]
+            if progress is not None:
+                print(f"\r{done}/{len(todo)} messages  {done / max(time.time() - t0, 1e-9):.1f}/s",
+                      end="", file=progress, flush=True)
+    if progress is not None:
+        print(file=progress)
+    return counts
+
+
+################################################################
+# Local SMTP sink
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept a message and save it"""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.reply("220 sink ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].upper()
+            if verb == b"EHLO":
+                self.wfile.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif verb == b"HELO":
+                self.reply("250 sink")
+            elif verb == b"MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == b"RCPT":
+                recipients.append(line[line.index(b"<") + 1:line.rindex(b">")].decode())
+                self.reply("250 OK")
+            elif verb == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (line := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    data.append(line[1:] if line.startswith(b"..") else line)
+                self.server.save(recipients, b"".join(data))
+                self.reply("250 OK")
+            elif verb == b"QUIT":
+                self.reply("221 Bye")
+                return
+            elif verb in (b"RSET", b"NOOP"):
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    """SMTP server that writes each message it receives to outdir as a .eml file"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, outdir: Path, host: str = "127.0.0.1", port: int = 1025):
+        self.outdir = Path(outdir)
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self.lock = threading.Lock()
+        super().__init__((host, port), SinkHandler)
+
+    def save(self, recipients, data: bytes) -> None:
+        """Write one message"""
+        with self.lock:
+            self.count += 1
+            n = self.count
+        (self.outdir / f"{n:06d}-{recipients[0] if recipients else 'nobody'}.eml").write_bytes(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assignments", default=ASSIGNMENTS_DIR, help="directory of <email>.txt files")
+    parser.add_argument("--sender", help="From: address (verified in SES)")
+    parser.add_argument("--subject", default=SUBJECT)
+    parser.add_argument("--journal", default=JOURNAL, help="record of what has been sent")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent sends")
+    parser.add_argument("--rate", type=float, help="messages per second (default: the SES MaxSendRate)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries of a throttled send")
+    parser.add_argument("--smtp", metavar="HOST:PORT", help="send over SMTP instead of SES")
+    parser.add_argument("--starttls", action="store_true", help="use STARTTLS with --smtp")
+    parser.add_argument("--region", help="SES region (default: AWS_REGION)")
+    parser.add_argument("--sink", metavar="DIR", help="run a local SMTP sink saving messages in DIR")
+    parser.add_argument("--port", type=int, default=1025, help="port for --sink")
+    args = parser.parse_args()
+
+    if args.sink:
+        with SinkServer(args.sink, port=args.port) as server:
+            print(f"SMTP sink on 127.0.0.1:{args.port}, saving to {args.sink}", file=sys.stderr)
+            server.serve_forever()
+        return
+    if not args.sender:
+        parser.error("--sender is required")
+    if args.smtp:
+        host, _, port = args.smtp.rpartition(":")
+        transport = SMTPTransport(host or "localhost", int(port), starttls=args.starttls,
+                                  username=os.environ.get("SMTP_USERNAME"),
+                                  password=os.environ.get("SMTP_PASSWORD"))
+    else:
+        transport = SESTransport(args.workers, args.region)
+    try:
+        counts = deliver(jobs_in(args.assignments), transport, Journal(args.journal), args.sender,
+                         args.workers, args.rate, args.retries, args.subject)
+    finally:
+        transport.close()
+    print(json.dumps(counts))
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Constants the lab scripts share, in a module that imports nothing of theirs,
+so that a script needing one of them does not load the encryption code or the
+GUID index with it.
+
+LEVELS holds the lab's four messages, easiest first: (password length,
+alphabet) for each. random_quotes.py encrypts one message per level and
+crack_time.py projects how long each takes to guess. ASSIGNMENTS_DIR is where
+random_quotes.py writes each student's ciphertexts and deliver.py mails them
+from.
+"""
+from pathlib import Path
+
+# the first message gets random_quotes.CONGRATS
+LEVELS = [(4, "1"),
+          (4, "0123456789"),
+          (3, "abcdefghijklmnopqrstuvwxyz"),
+          (2, "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")]
+
+ASSIGNMENTS_DIR = Path(__file__).parent / "assignments"     # <email>.txt for each student
@@ -0,0 +1,304 @@
+"""
+Password-encrypted OpenPGP messages (RFC 4880) without running gpg.
+
+    armored = encrypt("the message", "password")
+
+produces the same kind of message as `gpg -ca --batch --passphrase password`:
+a symmetric-key encrypted session key packet (SKESK v4, iterated and salted
+S2K, no encrypted session key) followed by a symmetrically encrypted
+integrity-protected data packet (SEIPD v1 with MDC) containing a literal data
+packet. Messages decrypt with `gpg -d` and with openpgp.js.
+
+The S2K count sets how many bytes are hashed per password guess. The default
+is gpg's default (65011712, coded as 255); use a smaller count for speed.
+
+Message.parse reads such a message back (ours or gpg's, which are usually
+compressed), so that guessing a password costs one key derivation and one
+block decryption:
+
+    message = Message.parse(armored)
+    text = message.decrypt("password")       # None if the password is wrong
+"""
+import base64
+import hashlib
+import os
+import bz2
+import re
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+try:
+    from cryptography.hazmat.decrepit.ciphers.modes import CFB
+except ImportError:                 # cryptography < 43
+    from cryptography.hazmat.primitives.ciphers.modes import CFB
+
+# RFC 4880 9.2 / 9.4
+CIPHER_AES128 = 7
+CIPHER_AES256 = 9
+KEY_SIZE = {CIPHER_AES128: 16, CIPHER_AES256: 32}
+HASH_SHA1 = 2
+HASH_SHA256 = 8
+HASH_NAME = {HASH_SHA1: "sha1", HASH_SHA256: "sha256"}
+
+S2K_ITERATED_SALTED = 3
+DEFAULT_S2K_COUNT = 65011712        # what gpg 2.x uses
+BLOCK_SIZE = 16                     # AES
+
+TAG_SKESK = 3
+TAG_COMPRESSED = 8
+TAG_LITERAL = 11
+TAG_SEIPD = 18
+TAG_MDC = 19
+
+
+def encode_s2k_count(count: int) -> int:
+    """Return the coded count octet for the smallest count >= count (RFC 4880 3.7.1.3)"""
+    for c in range(256):
+        if decode_s2k_count(c) >= count:
+            return c
+    return 255
+
+
+def decode_s2k_count(c: int) -> int:
+    """Number of octets hashed for a coded count octet"""
+    return (16 + (c & 15)) << ((c >> 4) + 6)
+
+
+@dataclass
+class S2K:
+    """Iterated and salted string-to-key specifier"""
+    hash_algo: int
+    salt: bytes
+    coded_count: int
+
+    @property
+    def count(self) -> int:
+        """Octets hashed per derivation"""
+        return decode_s2k_count(self.coded_count)
+
+    def specifier(self) -> bytes:
+        """Serialized S2K specifier"""
+        return bytes([S2K_ITERATED_SALTED, self.hash_algo]) + self.salt + bytes([self.coded_count])
+
+    def derive(self, passphrase: bytes, key_size: int) -> bytes:
+        """Hash salt+passphrase, repeated, until count octets have been hashed"""
+        data = self.salt + passphrase
+        count = max(self.count, len(data))
+        unit = data * max(1, 65536 // len(data))    # whole copies of data, so prefixes line up
+        whole, tail = divmod(count, len(unit))
+        key = b""
+        preload = 0
+        while len(key) < key_size:                  # each extra hash context is preloaded with a zero
+            h = hashlib.new(HASH_NAME[self.hash_algo], b"\0" * preload)
+            for _ in range(whole):
+                h.update(unit)
+            h.update(unit[:tail])
+            key += h.digest()
+            preload += 1
+        return key[:key_size]
+
+
+def packet(tag: int, body: bytes) -> bytes:
+    """New-format packet header + body (RFC 4880 4.2.2)"""
+    n = len(body)
+    if n < 192:
+        length = bytes([n])
+    elif n < 8384:
+        n -= 192
+        length = bytes([(n >> 8) + 192, n & 0xFF])
+    else:
+        length = b"\xff" + struct.pack(">I", n)
+    return bytes([0xC0 | tag]) + length + body
+
+
+def crc24(data: bytes) -> int:
+    """OpenPGP armor checksum (RFC 4880 6.1)"""
+    crc = 0xB704CE
+    for byte in data:
+        crc ^= byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+    return crc & 0xFFFFFF
+
+
+def armor(data: bytes) -> str:
+    """ASCII armor a binary OpenPGP message"""
+    b64 = base64.b64encode(data).decode("ascii")
+    lines = [b64[i:i + 64] for i in range(0, len(b64), 64)]
+    checksum = base64.b64encode(crc24(data).to_bytes(3, "big")).decode("ascii")
+    return ("-----BEGIN PGP MESSAGE-----\n\n" + "\n".join(lines) + "\n=" + checksum +
+            "\n-----END PGP MESSAGE-----\n")
+
+
+def cfb_encrypt(key: bytes, data: bytes) -> bytes:
+    """OpenPGP CFB as used by SEIPD: plain CFB with an all-zero IV"""
+    encryptor = Cipher(algorithms.AES(key), CFB(b"\0" * BLOCK_SIZE)).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+def encrypt_bytes(plaintext: bytes, passphrase: str, *, s2k_count: int = DEFAULT_S2K_COUNT,
+                  cipher: int = CIPHER_AES256, hash_algo: int = HASH_SHA256,
+                  filename: bytes = b"", timestamp: int | None = None) -> bytes:
+    """Return a binary OpenPGP message encrypting plaintext with passphrase"""
+    s2k = S2K(hash_algo, os.urandom(8), encode_s2k_count(s2k_count))
+    key = s2k.derive(passphrase.encode("utf-8"), KEY_SIZE[cipher])
+    skesk = packet(TAG_SKESK, bytes([4, cipher]) + s2k.specifier())
+
+    date = int(time.time()) if timestamp is None else timestamp
+    literal = packet(TAG_LITERAL, b"b" + bytes([len(filename)]) + filename +
+                     struct.pack(">I", date) + plaintext)
+    prefix = os.urandom(BLOCK_SIZE)
+    prefix += prefix[-2:]
+    mdc_header = bytes([0xC0 | TAG_MDC, 20])
+    mdc = mdc_header + hashlib.sha1(prefix + literal + mdc_header).digest()
+    seipd = packet(TAG_SEIPD, b"\x01" + cfb_encrypt(key, prefix + literal + mdc))
+    return skesk + seipd
+
+
+def encrypt(text: str, passphrase: str, **kwargs) -> str:
+    """Return an ASCII-armored OpenPGP message encrypting text with passphrase"""
+    return armor(encrypt_bytes(text.encode("utf-8"), passphrase, **kwargs))
+
+
+################################################################
+# Decryption
+
+ARMOR_RE = re.compile(r"-----BEGIN PGP MESSAGE-----\r?\n(?:[^\r\n]+\r?\n)*?\r?\n"
+                      r"(?P<body>[A-Za-z0-9+/=\r\n]*?)(?:\r?\n=(?P<crc>[A-Za-z0-9+/]{4}))?\r?\n"
+                      r"-----END PGP MESSAGE-----")
+MDC_LENGTH = 22                     # the MDC packet: 2 header octets and a SHA-1
+
+
+def dearmor(text: str) -> bytes:
+    """The binary message inside ASCII armor. Raises ValueError if there is none or the checksum is wrong."""
+    m = ARMOR_RE.search(text)
+    if m is None:
+        raise ValueError("no PGP MESSAGE armor found")
+    data = base64.b64decode("".join(m.group("body").split()))
+    if m.group("crc") and base64.b64decode(m.group("crc")) != crc24(data).to_bytes(3, "big"):
+        raise ValueError("armor checksum mismatch")
+    return data
+
+
+def read_packets(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """Yield (tag, body) for each packet, old or new format, joining partial body lengths"""
+    i = 0
+    while i < len(data):
+        ctb = data[i]
+        if not ctb & 0x80:
+            raise ValueError(f"invalid packet header at offset {i}")
+        if ctb & 0x40:                      # new format (RFC 4880 4.2.2)
+            tag, i = ctb & 0x3F, i + 1
+            body = b""
+            while True:
+                first = data[i]
+                if first < 192:
+                    n, i = first, i + 1
+                elif first < 224:
+                    n, i = ((first - 192) << 8) + data[i + 1] + 192, i + 2
+                elif first == 255:
+                    n, i = struct.unpack(">I", data[i + 1:i + 5])[0], i + 5
+                else:                       # partial body length; more follows
+                    n = 1 << (first & 0x1F)
+                    body += data[i + 1:i + 1 + n]
+                    i += 1 + n
+                    continue
+                body += data[i:i + n]
+                i += n
+                break
+        else:                               # old format (RFC 4880 4.2.1)
+            tag, length_type = (ctb >> 2) & 0x0F, ctb & 3
+            if length_type == 3:            # indeterminate: the rest of the data
+                body, i = data[i + 1:], len(data)
+            else:
+                size = 1 << length_type
+                n = int.from_bytes(data[i + 1:i + 1 + size], "big")
+                body = data[i + 1 + size:i + 1 + size + n]
+                i += 1 + size + n
+        yield tag, body
+
+
+def decompress(body: bytes) -> bytes:
+    """Body of a compressed data packet, decompressed (RFC 4880 5.6)"""
+    algo, data = body[0], body[1:]
+    if algo == 0:
+        return data
+    if algo == 1:
+        return zlib.decompress(data, -15)
+    if algo == 2:
+        return zlib.decompress(data)
+    if algo == 3:
+        return bz2.decompress(data)
+    raise ValueError(f"unsupported compression algorithm {algo}")
+
+
+def literal_data(packets: bytes) -> bytes:
+    """The contents of the literal data packet in packets, decompressing if necessary"""
+    for tag, body in read_packets(packets):
+        if tag == TAG_COMPRESSED:
+            return literal_data(decompress(body))
+        if tag == TAG_LITERAL:
+            name_length = body[1]
+            return body[2 + name_length + 4:]
+    raise ValueError("no literal data packet")
+
+
+@dataclass
+class Message:
+    """A password-encrypted message, parsed once so that each guess is cheap"""
+    cipher: int
+    s2k: S2K
+    encrypted: bytes                # the SEIPD body after its version octet
+
+    @classmethod
+    def parse(cls, message) -> "Message":
+        """Parse an armored (str) or binary (bytes) message"""
+        data = dearmor(message) if isinstance(message, str) else message
+        skesk = seipd = None
+        for tag, body in read_packets(data):
+            if tag == TAG_SKESK and skesk is None:
+                skesk = body
+            elif tag == TAG_SEIPD and seipd is None:
+                seipd = body
+        if skesk is None or seipd is None:
+            raise ValueError("not a password-encrypted message with integrity protection")
+        if skesk[0] != 4 or skesk[2] != S2K_ITERATED_SALTED or len(skesk) != 13:
+            raise ValueError("only SKESK v4 with iterated and salted S2K and no session key is supported")
+        if seipd[0] != 1:
+            raise ValueError(f"unsupported SEIPD version {seipd[0]}")
+        if skesk[1] not in KEY_SIZE or skesk[3] not in HASH_NAME:
+            raise ValueError(f"unsupported cipher {skesk[1]} or hash {skesk[3]}")
+        return cls(cipher=skesk[1], s2k=S2K(skesk[3], skesk[4:12], skesk[12]), encrypted=seipd[1:])
+
+    def key(self, passphrase: str) -> bytes:
+        """The session key for a passphrase (the slow part of a guess)"""
+        return self.s2k.derive(passphrase.encode("utf-8"), KEY_SIZE[self.cipher])
+
+    def check(self, key: bytes) -> bool:
+        """The quick check: a wrong key passes with probability 1/65536"""
+        prefix = self._decryptor(key).update(self.encrypted[:BLOCK_SIZE + 2])
+        return prefix[BLOCK_SIZE - 2:BLOCK_SIZE] == prefix[BLOCK_SIZE:]
+
+    def decrypt_with_key(self, key: bytes) -> Optional[bytes]:
+        """The plaintext, or None if key is wrong"""
+        if not self.check(key):
+            return None
+        decryptor = self._decryptor(key)
+        plain = decryptor.update(self.encrypted) + decryptor.finalize()
+        body, mdc = plain[:-MDC_LENGTH], plain[-MDC_LENGTH:]
+        if mdc[:2] != bytes([0xC0 | TAG_MDC, 20]) or hashlib.sha1(body + mdc[:2]).digest() != mdc[2:]:
+            return None
+        return literal_data(body[BLOCK_SIZE + 2:])
+
+    def decrypt(self, passphrase: str) -> Optional[bytes]:
+        """The plaintext, or None if passphrase is wrong"""
+        return self.decrypt_with_key(self.key(passphrase))
+
+    def _decryptor(self, key: bytes):
+        return Cipher(algorithms.AES(key), CFB(b"\0" * BLOCK_SIZE)).decryptor()
@@ -1,74 +1,277 @@
 """
 Generate a different random quote for each student
+
+    python random_quotes.py                       # one assignment for the default address
+    python random_quotes.py --roster roster.csv   # every student in the roster, in parallel
+
+Messages are encrypted in-process by pgp_symmetric.py; --gpg runs the gpg
+binary for each message instead.
+
+Each student's choices (reading, paragraphs, passwords) come from a
+random.Random seeded with a secret and the student's email, so rerunning a
+roster with the same secret reproduces the same passwords. Anyone with the
+secret can regenerate every password, so it is never a default: put it in a
+file passed with --seed-file, or in ASSIGNMENT_SEED, e.g.
+
+    python -c "import secrets; print(secrets.token_urlsafe(32))" > ~/.iga236-seed
+
+GUIDs are uuid4s and new on every run. outfile.csv keeps one assignment per
+student: rerunning a student replaces their rows, and their old GUIDs are
+removed from the GUID index.
 """
 
+import argparse
+import array
+import hashlib
+import mmap
+import os
 import random
+import re
+import struct
 import subprocess
-import io
+import sys
+import time
 import uuid
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+
+import pgp_symmetric
+from levels import ASSIGNMENTS_DIR, LEVELS    # LEVELS: (password length, alphabet) of each message
+sys.path.insert(0, str(Path(__file__).parent.parent / "iga_236"))
+from home_app import guid_index       # the Lambda's GUID -> (email, level) index
 READINGS_DIR = "/Users/simsong/Library/CloudStorage/OneDrive-Personal/current/HKS IGA 236/2026 Optional Readings"
 MINSIZE = 160
 CONGRATS = "Congratulations! You decrypted the simple message.\n"
 URL = "https://iga236.simson.net/ping.php?guid={guid}"
 OUTFILE = Path(__file__).parent / "outfile.csv"
+GUID_INDEX = guid_index.GUID_INDEX_PATH
+SEED_ENV = "ASSIGNMENT_SEED"
+MIN_SEED_LENGTH = 16
+
+# Each reading gets an index of the byte (offset, length) of every paragraph long
+# enough to quote, so sampling is one random index and one small read, and
+# memory does not grow with the size of the readings.
+INDEX_DIR = Path(__file__).parent / ".corpus_index"
+INDEX_MAGIC = b"RQIX0001"
+INDEX_HEADER = struct.Struct("<8sQQQ")          # magic, source mtime_ns, source size, count
+LINE_RE = re.compile(rb"([^\r\n]*)(?:\r\n|\r|\n|$)")
+
+def eligible(text):
+    return text[0:1] not in "0123456789[." and len(text) > MINSIZE # ignore references
+
+def build_index(data):
+    """Return array of (offset, length) pairs of the eligible paragraphs in data"""
+    entries = array.array("I")
+    for m in LINE_RE.finditer(data):
+        if m.end(1) > m.start(1) and eligible(m.group(1).decode(errors="ignore").strip()):
+            entries.extend((m.start(1), m.end(1) - m.start(1)))
+    return entries
 
 sources = []
 class Source:
-    def __init__(self, path):
+    def __init__(self, path, index_dir=INDEX_DIR):
         self.path = path
-        self.text = path.read_text(errors='ignore')
-        self.paragraphs = self.text.split("\n")
+        st = path.stat()
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = index_dir / (hashlib.sha1(str(path.resolve()).encode()).hexdigest() + ".idx")
+        if not self.load_index(st):
+            self.write_index(st)
+            self.load_index(st)
     def __repr__(self):
         return str(self.path)
-    def random_paragraph(self):
-        for _ in range(100):
-            text = random.choice(self.paragraphs).strip()
-            if text[0:1] in "0123456789[.": # ignore references
-                continue
-            if len(text) > MINSIZE:
-                return text
-        raise RuntimeError(f"Could not find a paragraph in {self.path} longer than {MINSIZE} characters")
-
-def encrypt(email,text,count,alphabet):
-    guid = str(uuid.uuid4())
+    def __len__(self):
+        return len(self.entries) // 2
+    def load_index(self, st):
+        """Map the index if it exists and matches the reading's mtime and size"""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                if INDEX_HEADER.unpack(header)[:3] != (INDEX_MAGIC, st.st_mtime_ns, st.st_size):
+                    return False
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, struct.error, ValueError):
+            return False
+        self.entries = memoryview(self.mmap)[INDEX_HEADER.size:].cast("I")
+        return True
+    def write_index(self, st):
+        entries = build_index(self.path.read_bytes())
+        if sys.byteorder != "little":
+            entries.byteswap()
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, st.st_mtime_ns, st.st_size, len(entries) // 2))
+            entries.tofile(f)
+        os.replace(tmp, self.index_path)   # atomic, so parallel workers can build at once
+    def random_paragraph(self, rng=random):
+        if len(self) == 0:
+            raise RuntimeError(f"Could not find a paragraph in {self.path} longer than {MINSIZE} characters")
+        i = rng.randrange(len(self))
+        offset, length = self.entries[2 * i], self.entries[2 * i + 1]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length).decode(errors="ignore").strip()
+
+def load_sources(readings_dir=READINGS_DIR):
+    root = Path(readings_dir)
+    for (dirpath, dirnames, filenames) in root.walk():
+        dirnames.sort()                 # fixed order, so seeded choices are reproducible
+        for fname in sorted(filenames):
+            if fname.endswith(".txt"):
+                source = Source(dirpath /fname)
+                if len(source):                 # skip readings with nothing to quote
+                    sources.append(source)
+
+def gpg_encrypt(text, password):
+    p = subprocess.run(["gpg", "-ca", "--batch", "--passphrase", password],
+                       input=text.encode(), stdout=subprocess.PIPE, check=True)
+    return p.stdout.decode()
 
-    with OUTFILE.open("a") as f:
-        c = csv.writer(f)
-        c.writerow([email,guid,count,len(alphabet)])
+# how messages are encrypted; main() changes these from the command line
+USE_GPG = False
+S2K_COUNT = pgp_symmetric.DEFAULT_S2K_COUNT
 
-    print(OUTFILE)
+def encrypt_message(text, password):
+    if USE_GPG:
+        return gpg_encrypt(text, password)
+    return pgp_symmetric.encrypt(text, password, s2k_count=S2K_COUNT)
 
+def make_message(email, text, count, alphabet, rng=random):
+    """Return (csv row, assignment text) for one encrypted message"""
+    guid = str(uuid.uuid4())
     text += "\n\n--\n\n" + URL.format(guid=guid) + "\n\n"
-    password = "".join([random.choice(alphabet) for _ in range(count)])
-    print("password:",password)
-    p = subprocess.run(f"gpg -ca --batch --passphrase '{password}'",input=text.encode(),stdout=subprocess.PIPE,shell=True)
-    out = p.stdout.decode()
-    print("Encrypted:")
+    password = "".join([rng.choice(alphabet) for _ in range(count)])
+    out = encrypt_message(text, password)
+    return ([email,guid,count,len(alphabet)],
+            f"Encryption Alphabet: {alphabet}\nCharacter count: {count}\n{out}\n\n")
+
+def student_rng(seed, email):
+    return random.Random(f"{seed}:{email.strip().lower()}")
+
+def read_seed(seed_file=None, env=os.environ):
+    """The secret seed from seed_file or ASSIGNMENT_SEED. Raises ValueError if there is none."""
+    seed = Path(seed_file).read_text().strip() if seed_file else env.get(SEED_ENV, "").strip()
+    if len(seed) < MIN_SEED_LENGTH:
+        raise ValueError(f"need a secret seed of {MIN_SEED_LENGTH}+ characters in --seed-file or {SEED_ENV}")
+    return seed
+
+def make_assignment(email, seed=None):
+    """Return (csv rows, assignment text) for one student"""
+    rng = student_rng(seed, email) if seed is not None else random.SystemRandom()
+    source = rng.choice(sources)
+    rows, out = [], []
+    for i, (count, alphabet) in enumerate(LEVELS):
+        text = CONGRATS if i == 0 else source.random_paragraph(rng)
+        row, message = make_message(email, text, count, alphabet, rng)
+        rows.append(row)
+        out.append(message)
+    return rows, "".join(out)
+
+def index_entries(rows):
+    """GUID index entries for one student's rows, which are in LEVELS order"""
+    return [(uuid.UUID(guid), email, level) for level, (email, guid, *_) in enumerate(rows)]
+
+def merge_outfile(path, rows):
+    """Write rows to the CSV at path, replacing the rows of any student they are for.
+    Returns the GUIDs of the replaced rows."""
+    emails = {row[0].strip().lower() for row in rows}
+    kept, replaced = [], []
+    try:
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if row and row[0].strip().lower() in emails:
+                    replaced.append(uuid.UUID(row[1]))
+                elif row:
+                    kept.append(row)
+    except FileNotFoundError:
+        pass
+    path = Path(path)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", newline="") as f:
+        csv.writer(f).writerows(kept + list(rows))
+    os.replace(tmp, path)
+    return replaced
+
+def assign(email, seed, outfile=OUTFILE, index=GUID_INDEX):
+    rows, out = make_assignment(email, seed)
+    replaced = merge_outfile(outfile, rows)
+    guid_index.update_index(index, index_entries(rows), removed=replaced)
+    print(outfile)
     print(out)
-    return f"Encryption Alphabet: {alphabet}\nCharacter count: {count}\n{out}\n\n"
 
+def read_roster(path):
+    """Emails from the 'email' column of a CSV, or its first column if there is no header"""
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+    if rows and "email" in [c.strip().lower() for c in rows[0]]:
+        col = [c.strip().lower() for c in rows[0]].index("email")
+        return [row[col].strip() for row in rows[1:]]
+    return [row[0].strip() for row in rows]
 
-def assign(email):
-    source = random.choice(sources)
-    print(source.path.name)
-    out = []
-    out.append(encrypt(email,CONGRATS,4,"1"))
-    out.append(encrypt(email,source.random_paragraph(),4,"0123456789"))
-    out.append(encrypt(email,source.random_paragraph(),3,"abcdefghijklmnopqrstuvwxyz"))
-    out.append(encrypt(email,source.random_paragraph(),2,"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"))
-    print("".join(out))
+def _init_worker(readings_dir, use_gpg, s2k_count):
+    global USE_GPG, S2K_COUNT
+    USE_GPG, S2K_COUNT = use_gpg, s2k_count
+    load_sources(readings_dir)
 
+def _assignment_task(args):
+    email, seed = args
+    return email, make_assignment(email, seed)
+
+def batch(roster, seed, readings_dir=READINGS_DIR, workers=None,
+          outfile=OUTFILE, outdir=ASSIGNMENTS_DIR, index=GUID_INDEX, progress=sys.stderr):
+    """Generate assignments for every email in roster on a process pool"""
+    emails = read_roster(roster)
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    t0 = time.time()
+    all_rows, entries = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(readings_dir, USE_GPG, S2K_COUNT)) as pool:
+        tasks = [(email, seed) for email in emails]
+        for done, (email, (rows, text)) in enumerate(pool.map(_assignment_task, tasks), start=1):
+            all_rows.extend(rows)
+            entries.extend(index_entries(rows))
+            (outdir / f"{email}.txt").write_text(text)
+            elapsed = time.time() - t0
+            print(f"\r{done}/{len(emails)} students  {done * len(LEVELS) / elapsed:.1f} messages/s",
+                  end="", file=progress, flush=True)
+    print(file=progress)
+    replaced = merge_outfile(outfile, all_rows)
+    guid_index.update_index(index, entries, removed=replaced)     # one merge for the whole roster
+    return len(emails)
 
 def main():
-    root = Path(READINGS_DIR)
-    for (dirpath, dirnames, filenames) in root.walk():
-        for fname in filenames:
-            if fname.endswith(".txt"):
-                sources.append(Source(dirpath /fname))
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", default=READINGS_DIR, help="directory of .txt readings")
+    parser.add_argument("--email", default="simsong@acm.org", help="make one assignment for this address")
+    parser.add_argument("--roster", help="CSV of student emails; makes an assignment for each")
+    parser.add_argument("--seed-file", help=f"file holding the secret seed (default: ${SEED_ENV})")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--outfile", default=OUTFILE, help="CSV of (email, guid, count, alphabet size)")
+    parser.add_argument("--outdir", default=ASSIGNMENTS_DIR, help="directory for each student's ciphertexts")
+    parser.add_argument("--guid-index", default=GUID_INDEX, help="GUID index to add the new messages to")
+    parser.add_argument("--gpg", action="store_true", help="encrypt by running gpg for every message")
+    parser.add_argument("--s2k-count", type=int, default=pgp_symmetric.DEFAULT_S2K_COUNT,
+                        help="octets hashed per password guess (in-process encryption only)")
+    args = parser.parse_args()
+
+    try:
+        seed = read_seed(args.seed_file)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    global USE_GPG, S2K_COUNT
+    USE_GPG, S2K_COUNT = args.gpg, args.s2k_count
+
+    if args.roster:
+        batch(args.roster, seed, args.readings, args.workers, args.outfile, args.outdir,
+              args.guid_index)
+        return
+    load_sources(args.readings)
     print("Sources: ",len(sources))
-    assign("simsong@acm.org")
+    assign(args.email, seed, args.outfile, args.guid_index)
 
 if __name__=="__main__":
     main()
@@ -0,0 +1,5 @@
+"""The etc/ scripts are not a package; import them the way they import each other"""
+import sys
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
@@ -0,0 +1,50 @@
+"""Tests for the multi-core password guesser"""
+import pytest
+
+import brute_force
+import pgp_symmetric
+
+DIGITS = "0123456789"
+
+
+def test_generate_password():
+    # the same order as lab1_guesser's generatePassword
+    assert [brute_force.generate_password(n, "ab", 2) for n in range(4)] == ["aa", "ab", "ba", "bb"]
+    assert brute_force.generate_password(0, DIGITS, 2) == "00"
+    assert brute_force.generate_password(1234, DIGITS, 4) == "1234"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_brute_force(workers):
+    armored = pgp_symmetric.encrypt("found me", "073", s2k_count=1024)
+    result = brute_force.brute_force(armored, DIGITS, 3, workers=workers, chunk_size=32, batch_size=8)
+    assert result.found.password == "073" and result.found.index == 73
+    assert result.found.plaintext == b"found me"
+    assert result.attempts < 1000 and not result.timed_out         # stopped early
+    if workers == 1:
+        # in order; with more workers, lower chunks still running may stop once it is found
+        assert result.attempts >= 74
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_budget_stops_search(workers):
+    armored = pgp_symmetric.encrypt("x", "9999999", s2k_count=1024)
+    result = brute_force.brute_force(armored, DIGITS, 7, workers=workers, budget=0.2)
+    assert result.found is None and result.timed_out
+    assert result.seconds < 5 and result.attempts < 10 ** 7
+
+
+def test_not_found():
+    armored = pgp_symmetric.encrypt("x", "z", s2k_count=1024)
+    result = brute_force.brute_force(armored, DIGITS, 1, workers=1)
+    assert result.found is None and result.attempts == 10
+
+
+def test_check_assignment(tmp_path, capsys):
+    path = tmp_path / "student.txt"
+    path.write_text("".join(f"Encryption Alphabet: {alphabet}\nCharacter count: {len(pw)}\n"
+                            f"{pgp_symmetric.encrypt('text', pw, s2k_count=1024)}\n\n"
+                            for alphabet, pw in [("1", "1111"), (DIGITS, "42")]))
+    assert [m[:2] for m in brute_force.read_assignment(path.read_text())] == [("1", 4), (DIGITS, 2)]
+    assert brute_force.check_assignment(str(path), workers=1, budget=60)
+    assert "password='42'" in capsys.readouterr().out
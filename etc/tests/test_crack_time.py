@@ -0,0 +1,36 @@
+"""Tests for the keyspace and crack-time estimator"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import crack_time            # pylint: disable=wrong-import-position
+
+
+def test_keyspace():
+    space = crack_time.keyspace([10, 26], [1, 2, 3])
+    assert space.shape == (2, 3)
+    assert space[0].tolist() == [10, 100, 1000]
+    assert space[1, 2] == 26 ** 3
+    assert np.isfinite(crack_time.keyspace([95], [128])).all()
+
+
+def test_crack_seconds():
+    times = crack_time.crack_seconds(np.array([1.0, 9.0]), rate=2.0)
+    assert times["worst"].tolist() == [0.5, 4.5]
+    assert times["expected"].tolist() == [0.5, 2.5]
+
+
+def test_level_table():
+    rows = crack_time.level_table([(4, "1"), (2, "0123456789")], rate=10)
+    assert [row["keyspace"] for row in rows] == [1, 100]
+    assert rows[1]["worst_seconds"] == 10 and rows[1]["expected_seconds"] == 5.05
+
+
+def test_human():
+    assert crack_time.human(30) == "30 seconds"
+    assert crack_time.human(2 * 86400) == "2 days"
+    assert crack_time.human(float("inf")) == "forever"
+
+
+def test_attempts_per_second():
+    assert crack_time.attempts_per_second(s2k_count=1024, seconds=0.05) > 0
@@ -0,0 +1,93 @@
+"""Tests for assignment delivery, against the local SMTP sink"""
+import email
+import smtplib
+import threading
+import time
+
+import pytest
+
+import deliver
+
+
+@pytest.fixture(name="sink")
+def fixture_sink(tmp_path):
+    server = deliver.SinkServer(tmp_path / "sink", port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="assignments")
+def fixture_assignments(tmp_path):
+    outdir = tmp_path / "assignments"
+    outdir.mkdir()
+    for i in range(5):
+        (outdir / f"student{i}@example.edu.txt").write_text(f"Encryption Alphabet: 1\nmessage {i}\n")
+    return outdir
+
+
+def test_deliver_to_sink(sink, assignments, tmp_path):
+    transport = deliver.SMTPTransport("127.0.0.1", sink.server_address[1])
+    journal = deliver.Journal(tmp_path / "journal.jsonl")
+    try:
+        counts = deliver.deliver(deliver.jobs_in(assignments), transport, journal, "lab@example.edu",
+                                 workers=3, rate=1000, progress=None)
+    finally:
+        transport.close()
+    assert counts == {"sent": 5, "skipped": 0, "failed": 0}
+    saved = sorted((tmp_path / "sink").glob("*.eml"))
+    assert len(saved) == 5
+    msg = email.message_from_bytes(saved[0].read_bytes())
+    assert msg["From"] == "lab@example.edu" and msg["To"].startswith("student")
+    assert "Encryption Alphabet: 1" in msg.get_payload()[0].get_payload()
+
+    # a rerun skips everyone in the journal
+    journal = deliver.Journal(tmp_path / "journal.jsonl")
+    assert len(journal.sent) == 5
+    counts = deliver.deliver(deliver.jobs_in(assignments), transport, journal, "lab@example.edu",
+                             progress=None)
+    assert counts == {"sent": 0, "skipped": 5, "failed": 0}
+
+
+def test_journal_ignores_torn_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"email": "a@x", "status": "sent"}\n{"email": "b@x", "status": "failed"}\n{"email": "c@')
+    assert deliver.Journal(path).sent == {"a@x"}
+
+
+def test_retry_on_throttle():
+    class Flaky:
+        calls = 0
+
+        def send(self, msg):
+            self.calls += 1
+            if self.calls < 3:
+                raise deliver.Throttled("slow down")
+            return "id"
+
+    transport = Flaky()
+    assert deliver.send_with_retry(transport, None, None, retries=3, backoff=0.001) == "id"
+    assert transport.calls == 3
+    with pytest.raises(deliver.Throttled):
+        deliver.send_with_retry(Flaky(), None, None, retries=1, backoff=0.001)
+
+
+def test_smtp_throttle_is_retryable():
+    class Busy:
+        def send_message(self, msg):
+            raise smtplib.SMTPResponseException(454, b"try later")
+
+    transport = deliver.SMTPTransport("unused", 0)
+    transport.local.conn = Busy()
+    with pytest.raises(deliver.Throttled):
+        transport.send({"Message-ID": "x"})
+
+
+def test_token_bucket():
+    bucket = deliver.TokenBucket(rate=100, capacity=1)
+    t0 = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - t0 >= 0.09
@@ -0,0 +1,71 @@
+"""Tests for the in-process OpenPGP encryptor"""
+import shutil
+import subprocess
+
+import pytest
+
+import pgp_symmetric
+
+
+def test_s2k_count_coding():
+    assert pgp_symmetric.decode_s2k_count(255) == pgp_symmetric.DEFAULT_S2K_COUNT
+    assert pgp_symmetric.decode_s2k_count(0) == 1024
+    assert pgp_symmetric.encode_s2k_count(1024) == 0
+    assert pgp_symmetric.decode_s2k_count(pgp_symmetric.encode_s2k_count(100_000)) >= 100_000
+
+
+def test_s2k_derive_matches_reference():
+    s2k = pgp_symmetric.S2K(pgp_symmetric.HASH_SHA256, b"saltsalt", 0)
+    data = b"saltsalt" + b"pw"
+    expected = __import__("hashlib").sha256((data * 200)[:1024]).digest()
+    assert s2k.derive(b"pw", 32) == expected
+    # keys longer than the hash use a second context preloaded with one zero octet
+    sha1 = pgp_symmetric.S2K(pgp_symmetric.HASH_SHA1, b"saltsalt", 0)
+    key = sha1.derive(b"pw", 32)
+    assert key[20:] == __import__("hashlib").sha1(b"\0" + (data * 200)[:1024]).digest()[:12]
+
+
+def test_armor():
+    armored = pgp_symmetric.encrypt("hello", "pw", s2k_count=1024)
+    lines = armored.splitlines()
+    assert lines[0] == "-----BEGIN PGP MESSAGE-----"
+    assert lines[-1] == "-----END PGP MESSAGE-----"
+    assert lines[-2].startswith("=") and len(lines[-2]) == 5
+    assert pgp_symmetric.crc24(b"") == 0xB704CE
+
+
+@pytest.mark.skipif(shutil.which("gpg") is None, reason="gpg is not installed")
+@pytest.mark.parametrize("kwargs", [{"s2k_count": 1024},
+                                   {"cipher": pgp_symmetric.CIPHER_AES128,
+                                    "hash_algo": pgp_symmetric.HASH_SHA1, "s2k_count": 65536}])
+def test_gpg_decrypts(tmp_path, kwargs):
+    text = "Congratulations!\n" + "x" * 10_000     # long enough for a 5-octet packet length
+    armored = pgp_symmetric.encrypt(text, "a1B", **kwargs)
+    out = subprocess.run(["gpg", "--homedir", str(tmp_path), "--batch", "--quiet", "--decrypt",
+                          "--pinentry-mode", "loopback", "--passphrase", "a1B"],
+                         input=armored.encode(), capture_output=True, check=True)
+    assert out.stdout.decode() == text
+
+
+@pytest.mark.parametrize("kwargs", [{"s2k_count": 1024},
+                                   {"cipher": pgp_symmetric.CIPHER_AES128,
+                                    "hash_algo": pgp_symmetric.HASH_SHA1, "s2k_count": 1024}])
+def test_message_decrypt(kwargs):
+    text = "Congratulations!\n" + "x" * 10_000
+    message = pgp_symmetric.Message.parse(pgp_symmetric.encrypt(text, "a1B", **kwargs))
+    assert message.s2k.count == 1024
+    assert message.decrypt("a1B") == text.encode()
+    assert message.decrypt("a1C") is None
+    with pytest.raises(ValueError):
+        pgp_symmetric.Message.parse("not a message")
+
+
+@pytest.mark.skipif(shutil.which("gpg") is None, reason="gpg is not installed")
+def test_message_decrypts_gpg(tmp_path):
+    text = b"from gpg, compressed and with partial body lengths\n" * 100
+    armored = subprocess.run(["gpg", "--homedir", str(tmp_path), "--batch", "-ca", "--s2k-count", "1024",
+                              "--pinentry-mode", "loopback", "--passphrase", "a1B"],
+                             input=text, capture_output=True, check=True).stdout.decode()
+    message = pgp_symmetric.Message.parse(armored)
+    assert message.decrypt("a1B") == text
+    assert message.decrypt("a1b") is None
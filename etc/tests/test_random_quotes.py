@@ -0,0 +1,84 @@
+"""Tests for the indexed paragraph corpus"""
+import os
+import random
+
+import pytest
+
+import random_quotes
+
+LONG = "A" + "b" * 200
+
+
+def write(path, lines):
+    path.write_text("\n".join(lines))
+
+
+def test_index_samples_only_eligible(tmp_path):
+    reading = tmp_path / "r.txt"
+    write(reading, ["short", "1. " + LONG, "[12] " + LONG, "", "  " + LONG + "  ", LONG + "é"])
+    source = random_quotes.Source(reading, index_dir=tmp_path / "idx")
+    assert len(source) == 2
+    rng = random.Random(1)
+    seen = {source.random_paragraph(rng) for _ in range(50)}
+    assert seen == {LONG, LONG + "é"}
+
+
+def test_index_reused_and_rebuilt(tmp_path):
+    reading = tmp_path / "r.txt"
+    write(reading, [LONG])
+    source = random_quotes.Source(reading, index_dir=tmp_path / "idx")
+    stamp = source.index_path.stat().st_mtime_ns
+    again = random_quotes.Source(reading, index_dir=tmp_path / "idx")
+    assert again.index_path.stat().st_mtime_ns == stamp           # not rebuilt
+    write(reading, [LONG, "C" * 300])
+    os.utime(reading, ns=(1, 1))
+    changed = random_quotes.Source(reading, index_dir=tmp_path / "idx")
+    assert len(changed) == 2
+
+
+def test_no_eligible_paragraphs(tmp_path):
+    reading = tmp_path / "r.txt"
+    write(reading, ["short", "[1] " + LONG])
+    source = random_quotes.Source(reading, index_dir=tmp_path / "idx")
+    with pytest.raises(RuntimeError):
+        source.random_paragraph()
+
+
+def test_make_assignment_rows_index_by_level(tmp_path, monkeypatch):
+    reading = tmp_path / "r.txt"
+    write(reading, [LONG])
+    monkeypatch.setattr(random_quotes, "sources", [random_quotes.Source(reading, index_dir=tmp_path / "idx")])
+    monkeypatch.setattr(random_quotes, "S2K_COUNT", 1024)
+    rows, _ = random_quotes.make_assignment("s@example.edu", seed="t")
+    index = tmp_path / "guids.bin"
+    random_quotes.guid_index.update_index(index, random_quotes.index_entries(rows))
+    lookup = random_quotes.guid_index.GuidIndex(index).lookup
+    assert [lookup(row[1]) for row in rows] == [("s@example.edu", level) for level in range(4)]
+
+
+def test_rerun_replaces_rows(tmp_path, monkeypatch):
+    reading = tmp_path / "r.txt"
+    write(reading, [LONG])
+    monkeypatch.setattr(random_quotes, "sources", [random_quotes.Source(reading, index_dir=tmp_path / "idx")])
+    monkeypatch.setattr(random_quotes, "S2K_COUNT", 1024)
+    outfile, index = tmp_path / "outfile.csv", tmp_path / "guids.bin"
+    other, _ = random_quotes.make_assignment("t@example.edu", seed="secret")
+    random_quotes.merge_outfile(outfile, other)
+    random_quotes.guid_index.update_index(index, random_quotes.index_entries(other))
+    for _ in range(2):
+        rows, _ = random_quotes.make_assignment("s@example.edu", seed="secret")
+        replaced = random_quotes.merge_outfile(outfile, rows)
+        random_quotes.guid_index.update_index(index, random_quotes.index_entries(rows), removed=replaced)
+    lines = outfile.read_text().splitlines()
+    assert len(lines) == 8 and sum(line.startswith("s@") for line in lines) == 4
+    assert len(random_quotes.guid_index.GuidIndex(index)) == 8
+    assert len(replaced) == 4 and str(replaced[0]) not in outfile.read_text()
+
+
+def test_seed_is_required(tmp_path):
+    with pytest.raises(ValueError):
+        random_quotes.read_seed(env={})
+    with pytest.raises(ValueError):
+        random_quotes.read_seed(env={"ASSIGNMENT_SEED": "iga236"})
+    (tmp_path / "seed").write_text("x" * 32 + "\n")
+    assert random_quotes.read_seed(tmp_path / "seed") == "x" * 32
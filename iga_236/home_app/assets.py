@@ -0,0 +1,88 @@
+"""
+Warm-container cache for files under STATIC_DIR.
+Each file is read once per container; the MIME type, body, compressed variants
+and ETag are computed at load time and later requests are served from memory.
+"""
+import mimetypes
+import os
+import posixpath
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from home_app.binary import Payload
+from home_app.cache import LRUCache
+from home_app.negotiation import (COMPRESS_MIN_BYTES, compress, strong_etag, supported_encodings,
+                                  variant_etag)
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+TEXT_MIME_PREFIXES = ("text/", "application/json", "application/javascript")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+NO_CACHE = "no-cache"
+
+# Stay well inside the 256 MB Lambda; override with ASSET_CACHE_BYTES
+ASSET_CACHE_BYTES = int(os.environ.get("ASSET_CACHE_BYTES", 48 * 1024 * 1024))
+# assets are compressed once per container, so use the slowest, smallest settings
+MAX_LEVEL = {"gzip": 9, "br": 11}
+
+
+@dataclass
+class Asset:                    # pylint: disable=too-many-instance-attributes
+    """A static file with everything needed to answer a request for it"""
+    name: str
+    mime_type: str
+    raw: bytes
+    etag: str
+    cache_control: str
+    is_binary: bool
+    body: Union[str, Payload]           # a Payload (a view of raw) if is_binary, otherwise the text
+    encodings: Dict[str, Payload] = field(default_factory=dict)   # 'gzip'/'br' -> compressed raw
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this asset"""
+        text = len(self.body) if isinstance(self.body, str) else 0
+        return len(self.raw) + text + sum(len(v) for v in self.encodings.values())
+
+    @classmethod
+    def load(cls, name: str, path: Path) -> "Asset":
+        """Read a file and precompute its response variants"""
+        raw = path.read_bytes()
+        mime_type, _ = mimetypes.guess_type(path)
+        mime_type = mime_type or DEFAULT_MIME_TYPE
+        is_binary = not mime_type.startswith(TEXT_MIME_PREFIXES)
+        etag = strong_etag(raw)
+        encodings = {}
+        if not is_binary and len(raw) >= COMPRESS_MIN_BYTES:  # images are already compressed
+            for coding in supported_encodings():
+                encodings[coding] = Payload(compress(raw, coding, MAX_LEVEL[coding]),
+                                            key=variant_etag(etag, coding))
+        return cls(name=name,
+                   mime_type=mime_type,
+                   raw=raw,
+                   etag=etag,
+                   cache_control=IMMUTABLE_CACHE_CONTROL if "assets/" in name else NO_CACHE,
+                   is_binary=is_binary,
+                   body=Payload(raw, key=etag) if is_binary else raw.decode("utf-8"),
+                   encodings=encodings)
+
+
+class AssetCache:               # pylint: disable=too-few-public-methods
+    """Size-bounded LRU of Asset objects rooted at a static directory"""
+
+    def __init__(self, root: Path, max_bytes: int = ASSET_CACHE_BYTES):
+        self.root = root.resolve()
+        self.lru = LRUCache(max_bytes=max_bytes, sizeof=lambda asset: asset.nbytes)
+
+    def get(self, name: str) -> Optional[Asset]:
+        """Return the asset for a path relative to root, or None if there is no such file"""
+        key = posixpath.normpath("/" + name).lstrip("/")
+        asset = self.lru.get(key)
+        if asset is not None:
+            return asset
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or not path.is_file():
+            return None
+        asset = Asset.load(key, path)
+        self.lru.put(key, asset)
+        return asset
@@ -0,0 +1,75 @@
+"""
+Binary response bodies.
+
+Lambda proxy responses carry binary bodies as base64 text. Handlers put a
+Payload in "body" instead: it holds the bytes without copying them, and
+lambda_handler turns it into base64 at the very end with encode_body(). The
+base64 text is computed once per unique content (keyed by a content hash, or
+by a key the caller already has, such as an ETag) and kept in a size-bounded
+cache, so a warm container never re-encodes the same image or asset. Callers
+that can send bytes directly (the HTTP adapter) never encode at all.
+"""
+import base64
+import hashlib
+import os
+from typing import Any, Dict, Optional, Union
+
+from home_app.cache import LRUCache
+
+# base64 text of recently sent payloads; override with BASE64_CACHE_BYTES
+BASE64_CACHE_BYTES = int(os.environ.get("BASE64_CACHE_BYTES", 32 * 1024 * 1024))
+BASE64_CACHE = LRUCache(max_bytes=BASE64_CACHE_BYTES)
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class Payload:
+    """The raw bytes of a binary response body, base64 encoded on demand.
+    With cache=False (a body made for one response) the base64 text is not cached."""
+    __slots__ = ("data", "_key", "cache")
+
+    def __init__(self, data: BytesLike, key: Optional[str] = None, cache: bool = True):
+        self.data = memoryview(data).toreadonly()
+        self._key = key
+        self.cache = cache
+
+    def __len__(self) -> int:
+        return self.data.nbytes
+
+    def __bytes__(self) -> bytes:
+        return self.data.tobytes()
+
+    @property
+    def key(self) -> str:
+        """Cache key: the caller's key, or a hash of the content"""
+        if self._key is None:
+            self._key = hashlib.sha256(self.data).hexdigest()
+        return self._key
+
+    def b64(self) -> str:
+        """The base64 form, from the cache if this content has been encoded before"""
+        if not self.cache:
+            return base64.b64encode(self.data).decode("ascii")
+        text = BASE64_CACHE.get(self.key)
+        if text is None:
+            text = base64.b64encode(self.data).decode("ascii")
+            BASE64_CACHE.put(self.key, text)
+        return text
+
+
+def encode_body(resp: Any) -> Any:
+    """Replace a Payload body with its base64 text, as Lambda requires"""
+    if isinstance(resp, dict) and isinstance(resp.get("body"), Payload):
+        resp["body"] = resp["body"].b64()
+        resp["isBase64Encoded"] = True
+    return resp
+
+
+def body_bytes(resp: Dict[str, Any]) -> BytesLike:
+    """The raw bytes of a response body, whichever form it is in"""
+    body = resp.get("body") or ""
+    if isinstance(body, Payload):
+        return body.data
+    if resp.get("isBase64Encoded"):
+        return base64.b64decode(body)
+    return body.encode("utf-8")
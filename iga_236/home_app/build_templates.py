@@ -0,0 +1,49 @@
+"""
+Precompile the jinja2 templates into importable Python modules.
+Run from iga_236/ (the Makefile `templates` target does this):
+
+    python -m home_app.build_templates
+
+main.env() loads the result with jinja2.ModuleLoader, so a cold Lambda container
+imports ready-made template code instead of lexing, parsing and compiling each
+template on first use. The build records a digest of the sources it compiled;
+if they have changed since, main.env() ignores the build and parses the sources.
+"""
+import argparse
+import compileall
+import shutil
+from os.path import isdir, join
+
+from home_app.main import (COMPILED_TEMPLATE_DIR, SOURCES_STAMP, make_env, source_loader,
+                           sources_digest)
+
+
+def build(target: str = COMPILED_TEMPLATE_DIR, byte_compile: bool = True) -> list[str]:
+    """Compile every template into target and return the template names"""
+    if isdir(target):
+        shutil.rmtree(target)
+    e = make_env(source_loader())
+    names = sorted(e.list_templates(extensions=["html"]))
+    e.compile_templates(target, zip=None, ignore_errors=False, filter_func=lambda n: n in names)
+    if byte_compile:
+        # Only helps when this interpreter matches the Lambda runtime; harmless otherwise
+        compileall.compile_dir(target, quiet=1)
+    with open(join(target, SOURCES_STAMP), "w", encoding="utf-8") as f:
+        f.write(sources_digest() + "\n")
+    return names
+
+
+def main():
+    """Build the templates from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=COMPILED_TEMPLATE_DIR, help="output directory")
+    parser.add_argument("--no-byte-compile", action="store_true",
+                        help="do not write __pycache__ for the compiled modules")
+    args = parser.parse_args()
+    names = build(args.target, byte_compile=not args.no_byte_compile)
+    print(f"compiled {len(names)} templates into {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Small per-container caches.
+A Lambda container lives for many invocations, so anything kept at module level
+is reused until the container is recycled. These caches bound that memory.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from home_app import metrics
+
+
+class LRUCache:                 # pylint: disable=too-many-instance-attributes
+    """Least-recently-used cache bounded by entry count and/or total size.
+    sizeof(value) gives the cost of an entry when max_bytes is set.
+    With ttl (seconds), entries older than ttl are treated as missing."""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = len, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.total_bytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value and mark it as recently used.
+        Hits and misses are also counted in the current request's metrics."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                metrics.add("cache_misses")
+                return default
+            if self.ttl is not None and self._expires[key] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                metrics.add("cache_misses")
+                return default
+            self.hits += 1
+            metrics.add("cache_hits")
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Add or replace a value, evicting the oldest entries if over budget"""
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return          # never cache something larger than the whole budget
+            self._data[key] = value
+            self._sizes[key] = size
+            if self.ttl is not None:
+                self._expires[key] = self.clock() + self.ttl
+            self.total_bytes += size
+            while ((self.max_entries is not None and len(self._data) > self.max_entries) or
+                   (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value from the cache"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """Empty the cache. Counters are kept."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters suitable for logging or a JSON response"""
+        return {"entries": len(self._data), "bytes": self.total_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations}
+
+    def _remove(self, key):
+        self.total_bytes -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+        return self._data.pop(key)
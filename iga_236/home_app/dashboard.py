@@ -0,0 +1,83 @@
+"""
+Per-user dashboard data, read through a per-container cache.
+A student refreshing the dashboard is served from memory until the entry
+expires or the submission store records a new decrypt for that user.
+
+Invalidation only reaches the container that recorded the decrypt: other warm
+containers keep serving their copy until it expires, so DASHBOARD_CACHE_TTL is
+how stale a dashboard can be.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from home_app.cache import LRUCache
+from home_app.submissions import SK_PREFIX, StorageBackend, Submission
+
+DASHBOARD_CACHE_TTL = float(os.environ.get("DASHBOARD_CACHE_TTL", 30))
+DASHBOARD_CACHE_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_ENTRIES", 1024))
+
+
+class DecryptRecord(BaseModel):
+    """One recorded decrypt, as the dashboard shows it"""
+    guid: UUID
+    level: Optional[int] = None
+    submitted_at: float
+    elapsed_seconds: Optional[float] = None
+
+
+class Dashboard(BaseModel):
+    """Body of GET /api/v1/dashboard/{user_id}"""
+    user_id: str
+    submissions: List[DecryptRecord]
+    levels_solved: List[int]
+
+
+def summarize(user_id: str, items: List[Dict[str, Any]]) -> Dashboard:
+    """Turn a user's submission items (which may hold DynamoDB Decimals) into the dashboard data"""
+    submissions = sorted((DecryptRecord.model_validate(item) for item in items),
+                         key=lambda s: s.submitted_at)
+    return Dashboard(user_id=user_id, submissions=submissions,
+                     levels_solved=sorted({s.level for s in submissions if s.level is not None}))
+
+
+class DashboardCache:
+    """Read-through TTL/LRU cache of dashboard data keyed by user_id"""
+
+    def __init__(self, backend: StorageBackend, ttl: float = DASHBOARD_CACHE_TTL,
+                 max_entries: int = DASHBOARD_CACHE_ENTRIES, **lru_kwargs):
+        self.backend = backend
+        self.lru = LRUCache(max_entries=max_entries, ttl=ttl, **lru_kwargs)
+        self._generations: Dict[str, int] = {}      # invalidations per user
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Dashboard:
+        """Return a user's dashboard data, querying the table only on a miss"""
+        data = self.lru.get(user_id)
+        if data is None:
+            with self._lock:
+                generation = self._generations.get(user_id, 0)
+            data = summarize(user_id, self.backend.query(user_id, SK_PREFIX))
+            with self._lock:
+                # a query that started before an invalidation may predate the new decrypt
+                if self._generations.get(user_id, 0) == generation:
+                    self.lru.put(user_id, data)
+        return data
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget a user's data so that the next get() reads the table"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.lru.pop(user_id)
+
+    def recorded(self, submissions: List[Submission]) -> None:
+        """SubmissionStore listener: new results make the cached data stale"""
+        for user_id in {s.user_id for s in submissions}:
+            self.invalidate(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        return self.lru.stats()
@@ -0,0 +1,116 @@
+"""
+Export the parts of the site that are the same for every user.
+Run from iga_236/ (the Makefile `export` target does this):
+
+    python -m home_app.export_site [--out home_app/site]
+
+Writes the pages that need no context (STATIC_PAGES) and every file under
+static/ with a content hash in its name (favicon.3f2a9c01de.png), a .gz (and,
+with brotli installed, .br) sibling for each compressible file, and
+manifest.json, which maps each route to those files. home_app.site loads the
+manifest, so these routes are answered without routing, rendering or
+compressing anything. The output can also be uploaded as-is to S3/CloudFront;
+see SITE_URL in site.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+from home_app.assets import MAX_LEVEL, NO_CACHE, Asset
+from home_app.negotiation import COMPRESS_MIN_BYTES, compress, strong_etag, supported_encodings
+from home_app.site import MANIFEST_NAME, MANIFEST_VERSION, SITE_DIR
+
+# templates rendered without context, and the route each is served at
+STATIC_PAGES = {"index.html": "/", "about.html": "/about.html", "help.html": "/help.html",
+                "privacy.html": "/privacy.html", "terms.html": "/terms.html"}
+HASH_LENGTH = 10
+SUFFIX = {"gzip": ".gz", "br": ".br"}
+
+
+def hashed_name(name: str, data: bytes) -> str:
+    """name with a hash of data before its extension: css/site.css -> css/site.0123456789.css"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.{digest}.{ext}" if dot and "/" not in ext else f"{name}.{digest}"
+
+
+class Exporter:
+    """Writes files into an export directory and collects the manifest"""
+
+    def __init__(self, out: Path):
+        self.out = Path(out)
+        self.routes: Dict[str, Dict[str, Any]] = {}
+
+    def write(self, name: str, data: bytes) -> str:
+        """Write data under its hashed name and return that name"""
+        file = hashed_name(name, data)
+        path = self.out / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return file
+
+    def add(self, route: str, name: str, data: bytes, content_type: str, cache_control: str,
+            is_binary: bool, redirect: bool) -> None:
+        """Write one route's file and its compressed variants"""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        file = self.write(name, data)
+        encodings = {}
+        if not is_binary and len(data) >= COMPRESS_MIN_BYTES:
+            for coding in supported_encodings():
+                encoded = self.out / (file + SUFFIX[coding])
+                encoded.write_bytes(compress(data, coding, MAX_LEVEL[coding]))
+                encodings[coding] = file + SUFFIX[coding]
+        self.routes[route] = {"file": file, "content_type": content_type, "etag": strong_etag(data),
+                              "cache_control": cache_control, "is_binary": is_binary,
+                              "encodings": encodings, "redirect": redirect}
+
+    def write_manifest(self) -> Path:
+        """Write manifest.json (atomically, so a running server never sees half of it)"""
+        manifest = {"version": MANIFEST_VERSION, "routes": dict(sorted(self.routes.items()))}
+        path = self.out / MANIFEST_NAME
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+
+def export(out: Path = SITE_DIR) -> Dict[str, Dict[str, Any]]:
+    """Export the static pages and files into out, replacing what was there. Returns the routes."""
+    # pylint: disable-next=import-outside-toplevel
+    from home_app.main import HTML_CONTENT_TYPE, STATIC_DIR, render_template
+    out = Path(out)
+    if out.is_dir():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+    exporter = Exporter(out)
+    for template, route in STATIC_PAGES.items():
+        html = render_template(template, {}).encode("utf-8")
+        exporter.add(route, template, html, HTML_CONTENT_TYPE, NO_CACHE,
+                     is_binary=False, redirect=False)
+    root = STATIC_DIR.resolve()
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        asset = Asset.load(path.relative_to(root).as_posix(), path)
+        # HTML keeps its own URL so that its relative links still resolve
+        exporter.add("/static/" + asset.name, "static/" + asset.name, asset.raw, asset.mime_type,
+                     asset.cache_control, asset.is_binary,
+                     redirect=not asset.mime_type.startswith("text/html"))
+    exporter.write_manifest()
+    return exporter.routes
+
+
+def main():
+    """Export the site from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=SITE_DIR, type=Path, help="output directory")
+    args = parser.parse_args()
+    routes = export(args.out)
+    print(f"exported {len(routes)} routes into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
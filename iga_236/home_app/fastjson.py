@@ -0,0 +1,77 @@
+"""
+JSON for API requests and responses.
+
+Uses orjson when it is installed and the standard library otherwise; both
+produce the same compact output. A pydantic model is serialized by pydantic's
+own (Rust) serializer rather than being turned into a dict first, which is
+where most of the speedup is (benchmarks/bench_json.py). A dict of DynamoDB
+items is only somewhat faster than with json.dumps(default=str), since every
+Decimal in it still goes through default().
+Values JSON has no type for are converted the same way by both backends:
+DynamoDB Decimals become numbers, datetimes ISO 8601, anything else str().
+
+pydantic is not imported here, so serving a response does not load it.
+"""
+import datetime
+import json
+import sys
+from decimal import Decimal
+from typing import Any, Callable, Union
+
+try:
+    import orjson                # optional; not in the Lambda runtime by default
+except ImportError:
+    orjson = None                # pylint: disable=invalid-name
+
+BACKEND = "orjson" if orjson is not None else "json"
+JSONDecodeError = json.JSONDecodeError      # orjson.JSONDecodeError is a subclass
+
+
+def is_model(obj: Any) -> bool:
+    """True for pydantic models. If pydantic has not been imported there are none."""
+    pydantic = sys.modules.get("pydantic")
+    return pydantic is not None and isinstance(obj, pydantic.BaseModel)
+
+
+def default(obj: Any) -> Any:
+    """Convert a value the JSON encoder does not know.
+    Decimal, which every number read from DynamoDB is, is checked first."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if is_model(obj):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+_loads: Callable[[Union[str, bytes]], Any]
+if orjson is not None:
+    _ORJSON_DUMPS = orjson.dumps
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj: Any) -> str:
+        return _ORJSON_DUMPS(obj, default=default, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    _loads = orjson.loads
+else:
+    _ENCODER = json.JSONEncoder(default=default, separators=(",", ":"), ensure_ascii=False)
+
+    def _dumps(obj: Any) -> str:
+        return _ENCODER.encode(obj)
+
+    _loads = json.loads
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string"""
+    if is_model(obj):
+        return obj.model_dump_json()
+    return _dumps(obj)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON. Raises JSONDecodeError."""
+    return _loads(data)
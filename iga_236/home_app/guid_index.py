@@ -0,0 +1,176 @@
+"""
+Which student and level each message GUID was issued to.
+
+random_quotes.py appends (email, guid, count, alphabet size) rows to
+outfile.csv for every message it encrypts and, as it does, merges them into
+this index. The index is a sorted array of fixed-width records followed by the
+email strings they point to:
+
+    header   magic "GUIDIX01", record count
+    records  guid (16 bytes, sorted), email offset, email length, level
+    strings  the emails, UTF-8
+
+GuidIndex memory-maps the file, so a container reads only the pages a lookup
+touches, and finds a GUID by binary search over the records.
+
+    python -m home_app.guid_index build ../etc/outfile.csv     # (re)build from the CSV
+    python -m home_app.guid_index lookup <guid>
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from uuid import UUID
+
+MAGIC = b"GUIDIX01"
+HEADER = struct.Struct("<8sQ")          # magic, record count
+RECORD = struct.Struct("<16sIHB")       # guid, email offset, email length, level
+GUID_INDEX_PATH = Path(os.environ.get("GUID_INDEX_PATH", Path(__file__).parent / "guid_index.bin"))
+
+Entry = Tuple[UUID, str, int]           # (guid, email, level)
+
+
+class GuidIndex:
+    """A read-only, memory-mapped GUID index"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a GUID index")
+        self.strings = HEADER.size + self.count * RECORD.size
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = GUID_INDEX_PATH) -> Optional["GuidIndex"]:
+        """The index at path, or None if there is none"""
+        try:
+            return cls(path)
+        except FileNotFoundError:
+            return None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _guid(self, i: int) -> bytes:
+        start = HEADER.size + i * RECORD.size
+        return self.mmap[start:start + 16]
+
+    def _entry(self, i: int) -> Entry:
+        guid, offset, length, level = RECORD.unpack_from(self.mmap, HEADER.size + i * RECORD.size)
+        start = self.strings + offset
+        return UUID(bytes=guid), self.mmap[start:start + length].decode("utf-8"), level
+
+    def lookup(self, guid: Union[UUID, str]) -> Optional[Tuple[str, int]]:
+        """(email, level) for a GUID, or None if it was never issued"""
+        key = (guid if isinstance(guid, UUID) else UUID(str(guid))).bytes
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._guid(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._guid(lo) == key:
+            _, email, level = self._entry(lo)
+            return email, level
+        return None
+
+    def __iter__(self) -> Iterator[Entry]:
+        return (self._entry(i) for i in range(self.count))
+
+    def emails(self) -> Set[str]:
+        """Every email that GUIDs were issued to"""
+        return {email for _, email, _ in self}
+
+    def close(self) -> None:
+        """Unmap the file"""
+        self.mmap.close()
+
+
+def write_index(path: Union[str, Path], entries: Iterable[Entry]) -> int:
+    """Write entries (the last one wins for a repeated GUID) as an index at path, atomically.
+    Returns the number of records."""
+    unique: Dict[bytes, Tuple[str, int]] = {}
+    for guid, email, level in entries:
+        unique[guid.bytes] = (email, level)
+    strings: Dict[str, int] = {}
+    blob = bytearray()
+    records = bytearray()
+    for key in sorted(unique):
+        email, level = unique[key]
+        if email not in strings:
+            strings[email] = len(blob)
+            blob += email.encode("utf-8")
+        records += RECORD.pack(key, strings[email], len(email.encode("utf-8")), level)
+    path = Path(path)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(unique)))
+        f.write(records)
+        f.write(blob)
+    os.replace(tmp, path)       # lookups in running containers keep their old mapping
+    return len(unique)
+
+
+def update_index(path: Union[str, Path], new_entries: Sequence[Entry],
+                 removed: Iterable[UUID] = ()) -> int:
+    """Merge new entries into the index at path (creating it if needed), dropping the
+    GUIDs in removed. Returns the record count."""
+    old = GuidIndex.load(path)
+    if old is None:
+        return write_index(path, new_entries)
+    drop = {guid.bytes for guid in removed}
+    try:
+        entries: List[Entry] = [e for e in old if e[0].bytes not in drop]
+    finally:
+        old.close()
+    return write_index(path, entries + list(new_entries))
+
+
+def entries_from_csv(path: Union[str, Path], levels: Sequence[Tuple[int, int]]) -> Iterator[Entry]:
+    """Entries for the (email, guid, count, alphabet size) rows of outfile.csv.
+    The level is the position of (count, alphabet size) in levels."""
+    level_of = {level: i for i, level in enumerate(levels)}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 4:
+                continue
+            email, guid, count, size = row[:4]
+            level = level_of.get((int(count), int(size)))
+            if level is None:
+                raise ValueError(f"{path}: no level has {count} characters from {size}")
+            yield UUID(guid), email, level
+
+
+def main():
+    """Build or query the index from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=GUID_INDEX_PATH, type=Path, help="index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write the index from an outfile.csv")
+    build.add_argument("csv")
+    build.add_argument("--levels", default="4:1,4:10,3:26,2:62",
+                       help="count:alphabet size of each level, in order (etc/levels.py)")
+    lookup = sub.add_parser("lookup", help="print the email and level of a GUID")
+    lookup.add_argument("guid")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        pairs = (level.split(":") for level in args.levels.split(","))
+        levels = [(int(count), int(size)) for count, size in pairs]
+        count = write_index(args.index, entries_from_csv(args.csv, levels))
+        print(f"{count} GUIDs in {args.index}")
+    else:
+        index = GuidIndex.load(args.index)
+        found = index.lookup(args.guid) if index else None
+        print(f"{found[0]} level {found[1]}" if found else "not found")
+
+
+if __name__ == "__main__":
+    main()
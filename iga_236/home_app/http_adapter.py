@@ -0,0 +1,271 @@
+"""
+Run lambda_handler as an ordinary HTTP server.
+
+Each HTTP request is converted to the API Gateway payload format 2.0 event
+that the function gets in Lambda (lower-case headers, duplicates joined with
+commas, cookies split out into "cookies", binary bodies base64 encoded with
+isBase64Encoded) and the response dict is converted back (base64 bodies
+decoded, "cookies" sent as Set-Cookie headers).
+
+    python -m home_app.http_adapter --port 8000 --workers 4
+
+serves with keep-alive from a pre-forked pool of worker processes, each with
+a thread per connection, using only the standard library. The same adapter
+is available for other servers as wsgi_app and asgi_app:
+
+    gunicorn -w 4 -k gthread --threads 8 --keep-alive 5 home_app.http_adapter:wsgi_app
+    uvicorn --workers 4 home_app.http_adapter:asgi_app
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import signal
+import sys
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, quote, unquote
+
+from home_app import main
+from home_app.binary import BytesLike, Payload
+
+LOGGER = logging.getLogger(__name__)
+
+Headers = List[Tuple[str, str]]
+
+# request bodies with these content types are passed as text; everything else is base64
+TEXT_TYPES = ("text/", "application/json", "application/x-www-form-urlencoded",
+              "application/xml", "application/javascript")
+# the server sets these itself
+HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding", "content-length"}
+
+
+def to_event(method: str, raw_path: str, raw_query: str, headers: Iterable[Tuple[str, str]],
+             body: bytes = b"", source_ip: str = "127.0.0.1",
+             protocol: str = "HTTP/1.1") -> Dict[str, Any]:
+    """The payload format 2.0 event API Gateway would send for this request"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    merged: Dict[str, str] = {}
+    cookies: List[str] = []
+    for name, value in headers:
+        name = name.lower()
+        if name == "cookie":
+            cookies.extend(c.strip() for c in value.split(";") if c.strip())
+        elif name in merged:
+            merged[name] += "," + value
+        else:
+            merged[name] = value
+    query: Dict[str, str] = {}
+    for key, value in parse_qsl(raw_query, keep_blank_values=True):
+        query[key] = query[key] + "," + value if key in query else value
+    now = time.time()
+    event: Dict[str, Any] = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": raw_path,
+        "rawQueryString": raw_query,
+        "headers": merged,
+        "requestContext": {
+            "domainName": merged.get("host", "localhost").split(":")[0],
+            "http": {"method": method.upper(), "path": unquote(raw_path), "protocol": protocol,
+                     "sourceIp": source_ip, "userAgent": merged.get("user-agent", "")},
+            "requestId": uuid.uuid4().hex,
+            "routeKey": "$default",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "isBase64Encoded": False,
+    }
+    if cookies:
+        event["cookies"] = cookies
+    if query:
+        event["queryStringParameters"] = query
+    if body:
+        if merged.get("content-type", "").lower().startswith(TEXT_TYPES):
+            try:
+                event["body"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+        if "body" not in event:
+            event["body"] = base64.b64encode(body).decode("ascii")
+            event["isBase64Encoded"] = True
+    return event
+
+
+def from_response(resp: Any) -> Tuple[int, Headers, BytesLike]:
+    """(status, headers, body) for a handler's return value.
+    Like API Gateway, anything that is not a dict with a statusCode is sent as JSON."""
+    if not isinstance(resp, dict) or "statusCode" not in resp:
+        return (HTTPStatus.OK, [("Content-Type", "application/json")],
+                json.dumps(resp, default=str).encode("utf-8"))
+    headers = [(name, str(value)) for name, value in (resp.get("headers") or {}).items()
+               if name.lower() not in HOP_BY_HOP]
+    headers += [("Set-Cookie", cookie) for cookie in resp.get("cookies") or []]
+    body = resp.get("body") or ""
+    if isinstance(body, Payload):
+        data = body.data                # sent as is, never base64 encoded
+    elif resp.get("isBase64Encoded"):
+        data = base64.b64decode(body)
+    else:
+        data = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+    return int(resp["statusCode"]), headers, data
+
+
+def invoke(event: Dict[str, Any]) -> Tuple[int, Headers, BytesLike]:
+    """Run the Lambda function on an event"""
+    try:
+        return from_response(main.respond(event))
+    except Exception:                   # pylint: disable=broad-exception-caught
+        LOGGER.exception("lambda_handler raised")     # Lambda would answer 500 too
+        return (HTTPStatus.INTERNAL_SERVER_ERROR, [("Content-Type", "application/json")],
+                b'{"message":"Internal Server Error"}')
+
+
+################################################################
+# WSGI and ASGI
+
+def wsgi_app(environ, start_response):
+    """WSGI application"""
+    headers = [(key[5:].replace("_", "-"), value) for key, value in environ.items()
+               if key.startswith("HTTP_")]
+    for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+        if environ.get(key):
+            headers.append((key.replace("_", "-"), environ[key]))
+    raw_path = (environ.get("RAW_URI") or environ.get("REQUEST_URI") or "").split("?")[0]
+    if not raw_path:
+        path = environ.get("SCRIPT_NAME", "") + environ.get("PATH_INFO", "/")
+        raw_path = quote(path.encode("latin-1"), safe="/:@!$&'()*+,;=-._~")   # PEP 3333 strings
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    body = environ["wsgi.input"].read(length) if length else b""
+    event = to_event(environ["REQUEST_METHOD"], raw_path, environ.get("QUERY_STRING", ""),
+                     headers, body, environ.get("REMOTE_ADDR", ""),
+                     environ.get("SERVER_PROTOCOL", "HTTP/1.1"))
+    status, resp_headers, data = invoke(event)
+    start_response(f"{status} {HTTPStatus(status).phrase}",
+                   resp_headers + [("Content-Length", str(len(data)))])
+    return [bytes(data)]
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI application (http and lifespan scopes)"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        raise ValueError(f"unsupported ASGI scope {scope['type']}")
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    raw_path = scope.get("raw_path")
+    raw_path = raw_path.decode("latin-1") if raw_path else quote(scope["path"])
+    client = scope.get("client") or ("", 0)
+    event = to_event(scope["method"], raw_path, scope.get("query_string", b"").decode("latin-1"),
+                     [(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]],
+                     b"".join(chunks), client[0], "HTTP/" + scope.get("http_version", "1.1"))
+    status, headers, data = await asyncio.to_thread(invoke, event)
+    headers.append(("Content-Length", str(len(data))))
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                            for k, v in headers]})
+    await send({"type": "http.response.body", "body": bytes(data)})
+
+
+################################################################
+# Standalone server
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 (keep-alive) handler that answers every method through invoke()"""
+    protocol_version = "HTTP/1.1"
+    server_version = "iga236"
+    disable_nagle_algorithm = True      # headers and body are separate writes
+    access_log = False
+
+    def handle_one(self):
+        """Answer one request, whatever its method"""
+        raw_path, _, raw_query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        event = to_event(self.command, raw_path, raw_query, self.headers.items(), body,
+                         self.client_address[0], self.request_version)
+        status, headers, data = invoke(event)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = handle_one
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class Server(ThreadingHTTPServer):
+    """Thread per connection; workers are forked after the socket is bound"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = 1,
+          access_log: bool = False) -> None:
+    """Serve until interrupted. With workers > 1, fork that many processes
+    that all accept on the same socket."""
+    RequestHandler.access_log = access_log
+    server = Server((host, port), RequestHandler)
+    LOGGER.info("serving on http://%s:%s/ with %s worker(s)", host, server.server_port, workers)
+    if workers <= 1:
+        with server:
+            server.serve_forever()
+        return
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:                    # worker
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            server.serve_forever()
+            os._exit(0)                 # pylint: disable=protected-access
+        children.append(pid)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)     # stop the workers too
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+    finally:
+        server.server_close()
+
+
+def cli():
+    """Run the server from the command line"""
+    parser = argparse.ArgumentParser(description="Serve lambda_handler over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    args = parser.parse_args()
+    if sys.platform == "win32" and args.workers > 1:
+        parser.error("--workers needs fork()")
+    serve(args.host, args.port, args.workers, args.access_log)
+
+
+if __name__ == "__main__":
+    cli()
@@ -2,21 +2,34 @@
 Lambda function for password lab.
 This function will serve the password cracker and gets reports of correct decrypts.
 """
+from home_app import startup     # first, so that the import timings include everything below
+# pylint: disable=wrong-import-order,wrong-import-position
 from os.path import dirname,join,isdir
 import sys
-from typing import Optional,Any,Dict
+from typing import Optional,Any,Dict,Mapping,TYPE_CHECKING
 import base64
+import hashlib
 import os
-import json
 import logging
 import functools
-import mimetypes
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import parse_qs, urlencode
 from zoneinfo import ZoneInfo
+startup.mark("import_stdlib")
 
-import jinja2
-#import boto3
+from home_app.assets import AssetCache
+from home_app import fastjson, metrics
+from home_app.binary import Payload, encode_body
+from home_app.negotiation import finalize, header
+from home_app.router import Request, Router
+startup.mark("import_home_app")
+# pylint: enable=wrong-import-order,wrong-import-position
+
+# jinja2 and boto3 are imported by the functions that first need them,
+# so static files and the JSON API never pay for them
+if TYPE_CHECKING:
+    import jinja2
 
 # GitHub Repository
 GITHUB_REPO_URL = "https://github.com/simsong/iga-236"
@@ -30,15 +43,19 @@ NESTED = join(MY_DIR, ".aws-sam", "build", "E11HomeFunction")
 if isdir(join(NESTED, "e11")):
     sys.path.insert(0, NESTED)
 # path fixing done
+startup.mark("sys_path")
 
 TEMPLATE_DIR = join(MY_DIR,"templates")
+# written by build_templates.py, with a stamp of the sources it was compiled from
+COMPILED_TEMPLATE_DIR = os.environ.get("COMPILED_TEMPLATE_DIR", join(MY_DIR,"templates_compiled"))
+SOURCES_STAMP = "sources.sha256"
 STATIC_DIR = Path(__file__).parent / "static"
+ASSETS = AssetCache(STATIC_DIR)
 LOGGER = logging.getLogger(__name__)
 if not LOGGER.handlers:
     logging.basicConfig(level=logging.INFO,
                         format="%(asctime)s %(levelname)s %(name)s:%(lineno)d %(message)s")
-
-sys.path.append(MY_DIR)
+startup.mark("logging")
 
 # Content Types
 JPEG_MIME_TYPE = "image/jpeg"
@@ -56,25 +73,53 @@ CONTENT_TYPE_HEADER = "Content-Type"
 HTTP_OK = 200
 HTTP_FOUND = 302
 HTTP_BAD_REQUEST = 400
+HTTP_UNAUTHORIZED = 401
 HTTP_FORBIDDEN = 403
 HTTP_NOT_FOUND = 404
 HTTP_INTERNAL_ERROR = 500
+HTTP_SERVICE_UNAVAILABLE = 503
 
 COURSE_DOMAIN='cybersecurity-policy.org'
 LAB_TIMEZONE = ZoneInfo("America/New_York")  # Eastern timezone for lab deadlines
+startup.mark("zoneinfo")
 
 # API Endpoints
 API_PATH = "/api/v1"
 API_ENDPOINT = f'https://{COURSE_DOMAIN}{API_PATH}'
 STAGE_ENDPOINT = f'https://stage.{COURSE_DOMAIN}{API_PATH}'
 
-# DDB = boto3.resource("dynamodb")
-# users_table = DDB.Table(os.environ["USERS_TABLE_NAME"])   # was assignments
+# Login links are emailed from LOGIN_SENDER and point at LOGIN_BASE_URL, never at the
+# request's Host header, which a client could set to a site of its own
+LOGIN_BASE_URL = os.environ.get("LOGIN_BASE_URL", f"https://{COURSE_DOMAIN}")
+LOGIN_SENDER = os.environ.get("LOGIN_SENDER", f"iga236@{COURSE_DOMAIN}")
+LOGIN_SUBJECT = "IGA-236: your login link"
 
 
+def created(factory: Any) -> bool:
+    """Whether one of the lazy lru_cache(maxsize=1) factories below has built its object yet.
+    (Calling factory.cache_info() directly trips a pylint false positive.)"""
+    return factory.cache_info().currsize > 0
+
+
+@functools.lru_cache(maxsize=1)
+@startup.timed_init("users_table")
+def users_table():
+    """Return the DynamoDB users table, created on first use"""
+    import boto3                # pylint: disable=import-outside-toplevel
+    dynamodb: Any = boto3.resource("dynamodb")      # the stubs don't know the resource's tables
+    return dynamodb.Table(os.environ["USERS_TABLE_NAME"])   # was assignments
+
+@functools.lru_cache(maxsize=1)
+@startup.timed_init("ses_client")
+def ses_client():
+    """Return the SES client, created on first use"""
+    import boto3                # pylint: disable=import-outside-toplevel
+    return boto3.client("ses")
+
 
 def eastern_filter(value):
     """Format a time_t (epoch seconds) as ISO 8601 in EST5EDT."""
+    import jinja2               # pylint: disable=import-outside-toplevel
     if value in (None, jinja2.Undefined):  # catch both
         return ""
     try:
@@ -85,27 +130,152 @@ def eastern_filter(value):
     return dt.strftime("%Y-%m-%d %H:%M:%S %Z")
 
 
-# jinja2 environment for template substitution
 @functools.lru_cache(maxsize=1)
-def env():
-    """Return the jinja2 environment"""
-    e = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(
-            ["templates", TEMPLATE_DIR, os.path.join(NESTED, "templates")]
-        )
-    )
+@startup.timed_init("submission_store")
+def submission_store():
+    """Return the store for decrypt submissions.
+    Set SUBMISSIONS_DB to a SQLite path (or :memory:) to run without DynamoDB.
+    GUIDs are checked against the GUID index deployed with the function. Without
+    one, every submission is rejected, except in such a local run."""
+    from home_app import progress, submissions  # pylint: disable=import-outside-toplevel
+    # pylint: disable-next=import-outside-toplevel
+    from home_app.guid_index import GUID_INDEX_PATH, GuidIndex
+    local = bool(os.environ.get("SUBMISSIONS_DB"))
+    if local:
+        backend = submissions.SQLiteBackend(os.environ["SUBMISSIONS_DB"])
+    else:
+        backend = submissions.DynamoBackend(users_table())
+    index = GuidIndex.load()
+    if index is not None:
+        resolver = index.lookup
+    elif local:
+        resolver = None         # any GUID is accepted
+    else:
+        LOGGER.error("%s is missing: every submission will be rejected", GUID_INDEX_PATH)
+        resolver = submissions.reject_all
+    store = submissions.SubmissionStore(backend, resolver=resolver, increments=progress.increments)
+    store.listeners.append(lambda new: dashboard_cache().recorded(new))
+    return store
+
+@functools.lru_cache(maxsize=1)
+def progress_aggregates():
+    """Return the class-wide progress aggregates, kept in the submission store's table"""
+    from home_app.progress import ProgressAggregates  # pylint: disable=import-outside-toplevel
+    return ProgressAggregates(submission_store().backend)
+
+@functools.lru_cache(maxsize=1)
+@startup.timed_init("session_signer")
+def session_signer():
+    """Return the session signer, with keys loaded once per container, or None if
+    no session keys are configured"""
+    # pylint: disable-next=import-outside-toplevel
+    from home_app.sessions import Keyring, SessionSigner
+    keyring = Keyring.load()
+    return SessionSigner(keyring) if keyring else None
+
+def request_session(request: Request):
+    """The verified session of the request's cookie, or None"""
+    signer = session_signer()
+    if signer is None:
+        return None
+    from home_app.sessions import session_token  # pylint: disable=import-outside-toplevel
+    cookies = request.event.get("cookies")
+    if cookies is None:         # payload 1.0, or a proxy that left the header alone
+        cookies = (header(request.headers, "Cookie") or "").split(";")
+    with metrics.timer("session_ms"):
+        return signer.verify(session_token(cookies))
+
+@functools.lru_cache(maxsize=1)
+def registered_emails() -> frozenset:
+    """The students who may log in: everyone the GUID index has issued messages to"""
+    from home_app.guid_index import GuidIndex  # pylint: disable=import-outside-toplevel
+    index = GuidIndex.load()
+    return frozenset(email.strip().lower() for email in index.emails()) if index else frozenset()
+
+def login_role(email: str) -> Optional[str]:
+    """The role a login for email gets: "instructor" for the addresses in
+    INSTRUCTOR_EMAILS, "student" for registered students, otherwise None"""
+    instructors = {e.strip().lower() for e in os.environ.get("INSTRUCTOR_EMAILS", "").split(",")}
+    if email in instructors - {""}:
+        return "instructor"
+    return "student" if email in registered_emails() else None
+
+@functools.lru_cache(maxsize=1)
+def dashboard_cache():
+    """Return the per-container cache of dashboard data"""
+    from home_app.dashboard import DashboardCache  # pylint: disable=import-outside-toplevel
+    return DashboardCache(submission_store().backend)
+
+
+# jinja2 environment for template substitution
+def make_env(loader) -> "jinja2.Environment":
+    """Return a jinja2 environment with our globals and filters.
+    build_templates.py uses this too, so compiled templates see the same filters."""
+    import jinja2               # pylint: disable=import-outside-toplevel
+    e = jinja2.Environment(loader=loader,
+                           extensions=["home_app.render_cache.FragmentCacheExtension"])
     e.globals["API_PATH"] = API_PATH
     e.filters["eastern"] = eastern_filter
     e.globals["GITHUB_REPO_URL"] = GITHUB_REPO_URL
     return e
 
+def source_loader():
+    """Loader that parses the templates/ sources"""
+    import jinja2               # pylint: disable=import-outside-toplevel
+    return jinja2.FileSystemLoader(["templates", TEMPLATE_DIR, os.path.join(NESTED, "templates")])
+
+def sources_digest(template_dir: str = TEMPLATE_DIR) -> str:
+    """sha256 of the names and contents of the template sources"""
+    digest = hashlib.sha256()
+    for path in sorted(Path(template_dir).rglob("*.html")):
+        digest.update(f"{path.relative_to(template_dir)}\0{path.stat().st_size}\0".encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def compiled_is_current(compiled_dir: str = COMPILED_TEMPLATE_DIR) -> bool:
+    """True if compiled_dir holds templates compiled from the current sources"""
+    try:
+        with open(join(compiled_dir, SOURCES_STAMP), encoding="utf-8") as f:
+            stamp = f.read().strip()
+    except FileNotFoundError:
+        return False
+    if stamp != sources_digest():
+        LOGGER.warning("%s is stale: the templates changed since it was built", compiled_dir)
+        return False
+    return True
+
+@functools.lru_cache(maxsize=1)
+@startup.timed_init("jinja_env")
+def env():
+    """Return the jinja2 environment.
+    Uses the templates precompiled by `make templates` unless TEMPLATE_DEV is set,
+    they have not been built, or the sources have changed since, in which case the
+    sources are parsed on first use."""
+    import jinja2               # pylint: disable=import-outside-toplevel
+    if not os.environ.get("TEMPLATE_DEV") and compiled_is_current():
+        return make_env(jinja2.ModuleLoader(COMPILED_TEMPLATE_DIR))
+    LOGGER.info("using template sources in %s", TEMPLATE_DIR)
+    return make_env(source_loader())
+
+@functools.lru_cache(maxsize=1)
+def site():
+    """Return the exported site (see export_site.py), or None if there is none"""
+    from home_app.site import SITE_DIR, SITE_URL, Site  # pylint: disable=import-outside-toplevel
+    return Site.load(SITE_DIR, SITE_URL)
+
+@functools.lru_cache(maxsize=1)
+def page_cache():
+    """Return the per-container cache of rendered pages"""
+    from home_app.render_cache import PageCache  # pylint: disable=import-outside-toplevel
+    return PageCache()
+
 
 
 ################################################################
 
-def resp_json( status: int, body: Dict[str, Any],
+def resp_json( status: int, body: Any,
                headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
-    """End HTTP event processing with a JSON object"""
+    """End HTTP event processing with a JSON object (a dict or a pydantic model)"""
     LOGGER.debug("resp_json(status=%s) body=%s", status, body)
     return {
         "statusCode": status,
@@ -114,7 +284,7 @@ def resp_json( status: int, body: Dict[str, Any],
             CORS_HEADER: CORS_WILDCARD,
             **(headers or {}),
         },
-        "body": json.dumps(body, default=str),
+        "body": fastjson.dumps(body),
     }
 
 def resp_text(    status: int,    body: str, headers: Optional[Dict[str, str]] = None,
@@ -143,7 +313,7 @@ def resp_png( status: int, png_bytes: bytes, headers: Optional[Dict[str, str]] =
             CORS_HEADER: CORS_WILDCARD,
             **(headers or {}),
         },
-        "body": base64.b64encode(png_bytes).decode("ascii"),
+        "body": Payload(png_bytes),
         "isBase64Encoded": True,
         "cookies": cookies or [],
     }
@@ -157,59 +327,246 @@ def redirect( location: str, extra_headers: Optional[dict] = None, cookies: Opti
         headers.update(extra_headers)
     return {"statusCode": HTTP_FOUND, "headers": headers, "cookies": cookies or [], "body": ""}
 
-def error_404(page):
-    """Generate an error"""
-    template = env().get_template("404.html")
-    return resp_text(HTTP_NOT_FOUND, template.render(page=page))
-
+def render(template_name: str, cache: bool = True, **context) -> str:
+    """Render a template. Unless cache is False, the output is kept in the page
+    cache, so a template rendered again with the same context is not re-rendered."""
+    if not cache:
+        return render_template(template_name, context)
+    return page_cache().get_or_render(template_name, context, render_template)
 
-def static_file(file_path_str):
-    """Serve a static file"""
-    requested_path = (STATIC_DIR / file_path_str).resolve()
-    if not requested_path.is_relative_to(STATIC_DIR) or not requested_path.is_file():
-        return error_404(file_path_str)
+def render_template(template_name: str, context: Dict[str, Any]) -> str:
+    """Render a template, timing it for the request metrics"""
+    with metrics.timer("template_ms"):
+        return env().get_template(template_name).render(**context)
 
-    mime_type, _ = mimetypes.guess_type(requested_path)
-    mime_type = mime_type or "application/octet-stream"
+def error_404(page):
+    """Generate an error. page is whatever path was asked for, so the result is not
+    cached: every made-up URL would otherwise add a page and evict real ones."""
+    return resp_text(HTTP_NOT_FOUND, render("404.html", cache=False, page=page))
 
-    # Check if it's a binary file (images, fonts, etc.)
-    is_binary = not mime_type.startswith(("text/", "application/json", "application/javascript"))
 
-    with open(join(STATIC_DIR, file_path_str), "rb" if is_binary else "r") as f:
-        content = f.read()
+def static_file(file_path_str, request_headers: Optional[Mapping[str, str]] = None):
+    """Serve a static file from the warm-container asset cache"""
+    asset = ASSETS.get(file_path_str)
+    if asset is None:
+        return finalize(request_headers or {}, error_404(file_path_str))
 
-    # pylint: disable=line-too-long
-    return {
+    return finalize(request_headers or {}, {
         "statusCode": 200,
         "headers": {
-            "Content-Type": mime_type,
-            "Cache-Control": "public, max-age=31536000, immutable" if "assets/" in file_path_str else "no-cache"
+            "Content-Type": asset.mime_type,
+            "Cache-Control": asset.cache_control,
+            "ETag": asset.etag,
         },
-        "isBase64Encoded": is_binary,
-        "body": base64.b64encode(content).decode("utf-8") if is_binary else content
-    }
+        "isBase64Encoded": asset.is_binary,
+        "body": asset.body
+    }, asset.encodings)
 
 def lambda_handler(event, _context):
     """Handle the lambda"""
-    origin = event.get("headers", {}).get("origin")
-    if event.get("requestContext", {}).get("http", {}).get("method") == "OPTIONS":
-        return resp_json(200, {"ok": True}, origin)
-
-    path = event.get("rawPath") or event.get("path", "")
-    method = event.get("requestContext", {}).get("http", {}).get("method", "GET")
-
-    match ( method, path):
-        case ("POST", "/api/v1/decrypt/submit"):
-            return resp_json(200, {"ok": True})
-        # This must be last - catch all GETs, check for /static
-        # used for serving css and javascript
-        case ("GET", p):
-            if p.startswith("/static"):
-                return static_file(p.removeprefix("/static/"))
-            return error_404(p)
-
-        case (_m,_p):
-            template = env().get_template("404.html")
-            return resp_text(HTTP_FOUND, template.render())
-
-    return resp_json(404, {"ok": False, "error": "not found"}, origin)
+    return encode_body(respond(event))
+
+@metrics.instrument
+def respond(event):
+    """Answer an event, leaving a binary body as a Payload for callers that send bytes"""
+    resp = handle(event)
+    startup.report_once(LOGGER)
+    return resp
+
+################################################################
+# Routes
+
+def negotiate(request: Request, call_next) -> Dict[str, Any]:
+    """Middleware: every response goes through the same ETag / compression pipeline"""
+    return finalize(request.headers, call_next(request))
+
+def not_found(request: Request) -> Dict[str, Any]:
+    """Fallback for paths without a route"""
+    if request.method == "GET":
+        return error_404(request.path)
+    return resp_text(HTTP_FOUND, render("404.html"))
+
+ROUTER = Router(middleware=[negotiate], fallback=not_found)
+EXPORTED_ROUTE = "exported"      # the metrics route of responses from the exported site
+
+@ROUTER.route("OPTIONS", "/", middleware=())
+@ROUTER.route("OPTIONS", "/{path+}", middleware=())
+def preflight(_request: Request) -> Dict[str, Any]:
+    """CORS preflight"""
+    return resp_json(200, {"ok": True})
+
+def request_body(request: Request) -> Any:
+    """The body of a request, as str, or as bytes if it was base64 encoded"""
+    body = request.event.get("body") or ""
+    if request.event.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    return body
+
+def request_json(request: Request) -> Any:
+    """Decode the JSON body of a request"""
+    return fastjson.loads(request_body(request))
+
+def request_form(request: Request) -> Dict[str, str]:
+    """Decode a form-encoded body, keeping the first value of each field"""
+    body = request_body(request)
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    return {name: values[0] for name, values in parse_qs(body).items()}
+
+@ROUTER.route("POST", API_PATH + "/decrypt/submit")
+def decrypt_submit(request: Request) -> Dict[str, Any]:
+    """Record one or more correct decrypts, for the logged-in user.
+    Only when sessions are not configured (local runs) is the body's user_id trusted."""
+    # pylint: disable-next=import-outside-toplevel
+    from home_app.submissions import ErrorResponse, SubmissionError, SubmissionsUnavailable
+    session = request_session(request)
+    if session is None and session_signer() is not None:
+        return resp_json(HTTP_UNAUTHORIZED, ErrorResponse(error="not logged in"))
+    try:
+        payload = request_json(request)
+        if session is None:
+            return resp_json(HTTP_OK, submission_store().submit(payload))
+        receipt = submission_store().submit(payload, session.user_id, session.email)
+        return resp_json(HTTP_OK, receipt)
+    except fastjson.JSONDecodeError as e:
+        return resp_json(HTTP_BAD_REQUEST, ErrorResponse(error=f"invalid JSON: {e}"))
+    except SubmissionError as e:
+        return resp_json(HTTP_BAD_REQUEST, ErrorResponse(error=str(e)))
+    except SubmissionsUnavailable as e:
+        return resp_json(HTTP_SERVICE_UNAVAILABLE, ErrorResponse(error=str(e)))
+
+@ROUTER.route("GET", API_PATH + "/dashboard/{user_id}")
+def dashboard_api(request: Request) -> Dict[str, Any]:
+    """A user's submissions, from the dashboard cache. The GUIDs are proof of
+    decryption, so only that user's session or an instructor's may read them."""
+    session = request_session(request)
+    if session is None:
+        return resp_json(HTTP_UNAUTHORIZED, {"ok": False, "error": "not logged in"})
+    user_id = request.params["user_id"]
+    if session.user_id != user_id and not session.is_instructor:
+        return resp_json(HTTP_FORBIDDEN, {"ok": False, "error": "not your dashboard"})
+    return resp_json(HTTP_OK, dashboard_cache().get(user_id),
+                     {"Cache-Control": "private, no-store"})
+
+@ROUTER.route("GET", API_PATH + "/cache-stats")
+def cache_stats(_request: Request) -> Dict[str, Any]:
+    """Hit/miss counters of the per-container caches"""
+    stats = {"assets": ASSETS.lru.stats(), "routes": metrics.summary()}
+    if created(dashboard_cache):        # don't create the store just to report on it
+        stats["dashboard"] = dashboard_cache().stats()
+    if created(page_cache):
+        stats["pages"] = page_cache().stats()
+    exported = site() if created(site) else None
+    if exported is not None:
+        stats["site"] = exported.lru.stats()
+    if created(env):
+        from home_app.render_cache import fragment_cache  # pylint: disable=import-outside-toplevel
+        stats["fragments"] = fragment_cache(env()).stats()
+    return resp_json(HTTP_OK, stats, {"Cache-Control": "no-store"})
+
+@ROUTER.route("GET", API_PATH + "/session")
+def session_api(request: Request) -> Dict[str, Any]:
+    """Who the session cookie says is logged in; verified without a table lookup"""
+    session = request_session(request)
+    if session is None:
+        return resp_json(HTTP_UNAUTHORIZED, {"ok": False, "error": "not logged in"},
+                         {"Cache-Control": "no-store"})
+    return resp_json(HTTP_OK, {"ok": True, "user_id": session.user_id, "email": session.email,
+                               "role": session.role, "expires_at": session.expires_at},
+                     {"Cache-Control": "no-store"})
+
+def instructor_only(request: Request) -> Optional[Dict[str, Any]]:
+    """None if the request has an instructor's session, otherwise the JSON error to send"""
+    session = request_session(request)
+    if session is None:
+        return resp_json(HTTP_UNAUTHORIZED, {"ok": False, "error": "not logged in"})
+    if not session.is_instructor:
+        return resp_json(HTTP_FORBIDDEN, {"ok": False, "error": "instructors only"})
+    return None
+
+@ROUTER.route("GET", API_PATH + "/progress")
+def progress_api(request: Request) -> Dict[str, Any]:
+    """Class-wide progress, from the aggregate items"""
+    return instructor_only(request) or resp_json(HTTP_OK, progress_aggregates().read(),
+                                                 {"Cache-Control": "no-store"})
+
+@ROUTER.route("GET", "/instructor")
+def instructor(request: Request) -> Dict[str, Any]:
+    """The instructor's view of class-wide progress"""
+    denied = instructor_only(request)
+    if denied is not None:
+        return resp_text(denied["statusCode"], render("error_generic.html", cache=False,
+                                                      error_message="Instructors only."))
+    page = render("instructor.html", cache=False, progress=progress_aggregates().read())
+    return resp_text(HTTP_OK, page, {"Cache-Control": "no-store"})
+
+@ROUTER.route("GET", "/login")
+def login(request: Request) -> Dict[str, Any]:
+    """The login form, or, with the token of an emailed login link, the start of a session"""
+    signer = session_signer()
+    if signer is None:
+        return resp_text(HTTP_NOT_FOUND, render("login.html", cache=False,
+                                                status="Logins are not enabled on this server."))
+    token = request.query.get("token")
+    if not token:
+        return resp_text(HTTP_OK, render("login.html", form=True), {"Cache-Control": "no-store"})
+    email = signer.verify_login(token)
+    role = login_role(email) if email else None
+    if email is None or role is None:
+        return resp_text(HTTP_UNAUTHORIZED,
+                         render("login.html", cache=False, form=True,
+                                status="That login link is not valid or has expired."),
+                         {"Cache-Control": "no-store"})
+    LOGGER.info("login: %s as %s", email, role)
+    return redirect("/", {"Cache-Control": "no-store"},
+                    cookies=[signer.cookie(signer.issue(email, email, role))])
+
+@ROUTER.route("POST", "/login")
+def login_link(request: Request) -> Dict[str, Any]:
+    """Email a login link to a registered address. The answer is the same whether or
+    not the address is registered, so it does not reveal who is in the course."""
+    # pylint: disable-next=import-outside-toplevel
+    from home_app.sessions import LOGIN_TTL
+    signer = session_signer()
+    if signer is None:
+        return resp_text(HTTP_NOT_FOUND, render("login.html", cache=False,
+                                                status="Logins are not enabled on this server."))
+    email = request_form(request).get("email", "").strip().lower()
+    if login_role(email) is not None:
+        link = f"{LOGIN_BASE_URL}/login?{urlencode({'token': signer.issue_login(email)})}"
+        ses_client().send_email(
+            Source=LOGIN_SENDER, Destination={"ToAddresses": [email]},
+            Message={"Subject": {"Data": LOGIN_SUBJECT},
+                     "Body": {"Text": {"Data": f"Open this link to log in to IGA-236:\n\n{link}\n\n"
+                                               f"It works for {LOGIN_TTL // 60} minutes.\n"}}})
+    return resp_text(HTTP_OK, render("login.html", cache=False, sent_to=email or "that address",
+                                     minutes=LOGIN_TTL // 60),
+                     {"Cache-Control": "no-store"})
+
+@ROUTER.route("GET", "/logout")
+def logout(_request: Request) -> Dict[str, Any]:
+    """End the session in the browser"""
+    from home_app.sessions import clear_cookie  # pylint: disable=import-outside-toplevel
+    return redirect("/", {"Cache-Control": "no-store"}, cookies=[clear_cookie()])
+
+# static_file() negotiates itself, using the compressed variants held by the asset cache
+@ROUTER.route("GET", "/static/{path+}", middleware=())
+def static(request: Request) -> Dict[str, Any]:
+    """Serve css, javascript and images"""
+    return static_file(request.params["path"], request.headers)
+
+def handle(event):
+    """Route an API Gateway v2 event to the code that answers it"""
+    request = Request.from_event(event)
+    try:
+        exported = site()
+        if exported is not None:
+            resp = exported.respond(request.method, request.path, request.query, request.headers)
+            if resp is not None:
+                request.route = EXPORTED_ROUTE
+                return resp
+        return ROUTER.dispatch(request)
+    finally:
+        m = metrics.current()
+        if m is not None and request.route:
+            m.route = request.route
@@ -0,0 +1,192 @@
+"""
+Per-request metrics, logged in CloudWatch Embedded Metric Format (EMF).
+
+Every request handled by main.respond() gets a RequestMetrics record:
+route pattern, method, status, duration, response bytes, template render time,
+cache hits/misses and whether it was the container's first (cold) request.
+Code running inside the request adds to the record with add() and timer().
+
+Records go into a fixed-size ring buffer (RECENT), which summary() reduces to
+per-route latencies for /api/v1/cache-stats. A sample of them is written to
+stdout as one EMF JSON line each, which CloudWatch turns into metrics without
+any API calls. Cold starts and 5xx responses are always written.
+
+    METRICS_SAMPLE_RATE   fraction of requests written (default 1; 0 turns output off)
+    METRICS_RING_SIZE     records kept in memory (default 512)
+    METRICS_NAMESPACE     CloudWatch namespace (default IGA236)
+
+This module imports only the standard library.
+"""
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "IGA236")
+SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 1.0))
+RING_SIZE = int(os.environ.get("METRICS_RING_SIZE", 512))
+
+# EMF metric name -> (RequestMetrics attribute, unit)
+METRICS = {"Duration": ("duration_ms", "Milliseconds"),
+           "ResponseBytes": ("response_bytes", "Bytes"),
+           "TemplateRenderTime": ("template_ms", "Milliseconds"),
+           "SessionVerifyTime": ("session_ms", "Milliseconds"),
+           "CacheHits": ("cache_hits", "Count"),
+           "CacheMisses": ("cache_misses", "Count"),
+           "ColdStart": ("cold", "Count")}
+DIMENSIONS = [["Route", "Status"]]
+UNMATCHED = "unmatched"             # Route dimension for requests answered by the router's fallback
+
+
+@dataclass
+class RequestMetrics:           # pylint: disable=too-many-instance-attributes
+    """What is recorded about one request"""
+    method: str = ""
+    route: str = UNMATCHED
+    status: int = 0
+    duration_ms: float = 0.0
+    response_bytes: int = 0
+    template_ms: float = 0.0
+    session_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cold: bool = False
+    request_id: str = ""
+    start: float = field(default_factory=time.perf_counter, repr=False)
+
+
+RECENT: collections.deque = collections.deque(maxlen=RING_SIZE)
+_current: contextvars.ContextVar = contextvars.ContextVar("request_metrics", default=None)
+_cold = True                    # pylint: disable=invalid-name
+
+
+def current() -> Optional[RequestMetrics]:
+    """The record of the request being handled, if any"""
+    return _current.get()
+
+
+def add(name: str, value: float = 1) -> None:
+    """Add to a counter (a RequestMetrics attribute) of the current request"""
+    m = _current.get()
+    if m is not None:
+        setattr(m, name, getattr(m, name) + value)
+
+
+@contextlib.contextmanager
+def timer(name: str):
+    """Add the time spent in the block, in ms, to a counter of the current request"""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, (time.perf_counter() - t) * 1000)
+
+
+def response_bytes(resp: Any) -> int:
+    """Size of a response body (base64 bodies count as their decoded size)"""
+    body = resp.get("body") if isinstance(resp, dict) else None
+    if not body:
+        return 0
+    if isinstance(body, str) and resp.get("isBase64Encoded"):
+        return len(body) * 3 // 4
+    return len(body)
+
+
+@functools.lru_cache(maxsize=1)
+def directives() -> List[Dict[str, Any]]:
+    """The _aws.CloudWatchMetrics part, which is the same for every record"""
+    return [{"Namespace": NAMESPACE,
+             "Dimensions": DIMENSIONS,
+             "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in METRICS.items()]}]
+
+
+@functools.lru_cache(maxsize=1)
+def directives_json() -> str:
+    """directives() serialized once"""
+    return json.dumps(directives(), separators=(",", ":"))
+
+
+def values(m: RequestMetrics) -> Dict[str, Any]:
+    """The dimensions, metrics and properties of a record"""
+    doc: Dict[str, Any] = {"Route": m.route, "Status": str(m.status), "Method": m.method,
+                           "RequestId": m.request_id, "SampleRate": SAMPLE_RATE}
+    for name, (attr, _) in METRICS.items():
+        value = getattr(m, attr)
+        doc[name] = round(value, 3) if isinstance(value, float) else int(value)
+    return doc
+
+
+def emf(m: RequestMetrics, timestamp: Optional[float] = None) -> Dict[str, Any]:
+    """The EMF document for a record"""
+    ts = int((time.time() if timestamp is None else timestamp) * 1000)
+    return {"_aws": {"Timestamp": ts, "CloudWatchMetrics": directives()}, **values(m)}
+
+
+def emf_line(m: RequestMetrics) -> str:
+    """emf() as one JSON line, serializing only the parts that change"""
+    return ('{"_aws":{"Timestamp":%d,"CloudWatchMetrics":%s},%s\n'
+            % (time.time() * 1000, directives_json(),
+               json.dumps(values(m), separators=(",", ":"))[1:]))
+
+
+def sampled(m: RequestMetrics) -> bool:
+    """Whether a record is written to the log"""
+    if SAMPLE_RATE <= 0:
+        return False
+    return m.cold or m.status >= 500 or SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE
+
+
+def finish(m: RequestMetrics, resp: Any, out=None) -> None:
+    """Complete a record with the response, keep it and maybe write it"""
+    m.duration_ms = (time.perf_counter() - m.start) * 1000
+    if resp is None:
+        m.status = 500                  # the handler raised
+    else:
+        m.status = int(resp.get("statusCode", 200)) if isinstance(resp, dict) else 200
+        m.response_bytes = response_bytes(resp)
+    RECENT.append(m)
+    if sampled(m):
+        (out or sys.stdout).write(emf_line(m))
+
+
+def instrument(func: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+    """Decorator for a function from an event to a response: records each call"""
+    @functools.wraps(func)
+    def wrapper(event):
+        global _cold            # pylint: disable=global-statement
+        context = event.get("requestContext") or {}
+        m = RequestMetrics(method=(context.get("http") or {}).get("method", ""),
+                           request_id=context.get("requestId", ""), cold=_cold)
+        _cold = False
+        token = _current.set(m)
+        resp = None
+        try:
+            resp = func(event)
+            return resp
+        finally:
+            _current.reset(token)
+            finish(m, resp)
+    return wrapper
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Per-route request count, error count and latency percentiles of the recent requests"""
+    by_route: Dict[str, List[RequestMetrics]] = collections.defaultdict(list)
+    for m in list(RECENT):
+        by_route[m.route].append(m)
+    out = {}
+    for route, records in sorted(by_route.items()):
+        durations = sorted(m.duration_ms for m in records)
+        out[route] = {"count": len(records),
+                      "errors": sum(1 for m in records if m.status >= 500),
+                      "p50_ms": round(durations[len(durations) // 2], 3),
+                      "p95_ms": round(durations[min(len(durations) - 1,
+                                                    len(durations) * 95 // 100)], 3)}
+    return out
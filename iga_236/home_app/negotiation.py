@@ -0,0 +1,163 @@
+"""
+Conditional GET and content negotiation for Lambda proxy responses.
+Every response built by main.py passes through finalize(), which adds a strong
+ETag, answers If-None-Match with 304 and compresses the body if the client allows it.
+"""
+import gzip
+import hashlib
+from typing import Any, Dict, Mapping, Optional, Union
+
+try:
+    # optional; not in the Lambda runtime by default
+    import brotli                # pyright: ignore[reportMissingImports]
+except ImportError:
+    brotli = None                # pylint: disable=invalid-name
+
+from home_app.binary import BytesLike, Payload, body_bytes
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+
+COMPRESS_MIN_BYTES = 1024       # below this the headers cost more than we save
+COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/javascript",
+                         "application/xml", "image/svg+xml")
+# levels for bodies compressed per request; static assets are compressed once at a higher level
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 5
+
+# headers that must be repeated on a 304 (RFC 9110 15.4.5)
+NOT_MODIFIED_HEADERS = ("ETag", "Cache-Control", "Vary", "Expires", "Content-Location")
+
+
+def strong_etag(data: BytesLike) -> str:
+    """Return a strong ETag for a byte string"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Each encoding is a separate representation, so it needs its own strong ETag"""
+    return etag[:-1] + "-" + encoding + '"'
+
+
+def supported_encodings() -> tuple:
+    """Content codings we can produce, best first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data: BytesLike, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress data with gzip or br"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level or DYNAMIC_GZIP_LEVEL, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=level or DYNAMIC_BROTLI_QUALITY)
+    raise ValueError(f"unsupported encoding {encoding}")
+
+
+def header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive header lookup. API Gateway v2 lower-cases names, tests may not."""
+    value = headers.get(name.lower())
+    if value is None:
+        for k, v in headers.items():
+            if k.lower() == name.lower():
+                return v
+    return value
+
+
+def choose_encoding(accept_encoding: Optional[str], available=None) -> Optional[str]:
+    """Pick the best content coding allowed by an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qvalues[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for coding in available or supported_encodings():
+        q = qvalues.get(coding, qvalues.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against a representation's ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    base = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == base:
+            return True
+        # a client may send back the tag of any encoded variant of the same body
+        if candidate.startswith(base[:-1] + "-") and candidate.endswith('"'):
+            return True
+    return False
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """True for textual content types"""
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_PREFIXES)
+
+
+def finalize(request_headers: Mapping[str, str], resp: Dict[str, Any],
+             encodings: Optional[Mapping[str, Union[bytes, Payload]]] = None) -> Dict[str, Any]:
+    """Apply ETag/If-None-Match and Accept-Encoding to a response.
+    encodings holds precomputed compressed bodies (e.g. from the asset cache).
+    A compressed body is returned as a binary.Payload."""
+    headers = resp.setdefault("headers", {})
+    if "Content-Encoding" in headers or resp.get("statusCode", HTTP_OK) >= 300:
+        return resp
+
+    raw = None
+    etag = headers.get("ETag")
+    if etag is None:
+        raw = body_bytes(resp)
+        etag = strong_etag(raw)
+
+    content_type = headers.get("Content-Type")
+    compressible = is_compressible(content_type)
+    coding = None
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+        coding = choose_encoding(header(request_headers, "Accept-Encoding"),
+                                 tuple(encodings) if encodings else None)
+    headers["ETag"] = variant_etag(etag, coding) if coding else etag
+
+    if etag_matches(header(request_headers, "If-None-Match"), etag):
+        return {
+            "statusCode": HTTP_NOT_MODIFIED,
+            "headers": {k: v for k, v in headers.items()
+                        if k in NOT_MODIFIED_HEADERS or k.startswith("Access-Control-")},
+            "body": "",
+            "cookies": resp.get("cookies") or [],
+        }
+
+    if coding is None:
+        return resp
+    if encodings and coding in encodings:
+        compressed = encodings[coding]
+        precomputed = True
+    else:
+        raw = raw if raw is not None else body_bytes(resp)
+        if len(raw) < COMPRESS_MIN_BYTES:
+            headers["ETag"] = etag
+            return resp
+        compressed = compress(raw, coding)
+        precomputed = False
+    headers["Content-Encoding"] = coding
+    if not isinstance(compressed, Payload):
+        # keyed by its ETag, which is already a hash of the content; a body compressed for
+        # this response alone stays out of BASE64_CACHE, where it would evict the assets
+        compressed = Payload(compressed, key=headers["ETag"], cache=precomputed)
+    resp["body"] = compressed
+    resp["isBase64Encoded"] = True
+    return resp
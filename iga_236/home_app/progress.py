@@ -0,0 +1,221 @@
+"""
+Class-wide progress, kept up to date as decrypts are recorded.
+
+Rather than scanning every submission, the instructor view reads aggregate
+items stored under user_id CLASS_ID in the users table:
+
+    level#<n>        solves, timed (solves that reported elapsed_seconds),
+                     elapsed_total, and h<k>: solves that took 2**k to 2**(k+1) seconds
+    student#<id>     levels (the set of levels solved), submits
+
+The SubmissionStore is given increments(): every newly recorded submission
+adds to its level's counters and its student's set with an ADD per item, in
+the same transaction as the conditional put that records it. So concurrent
+submits never lose an update, a submission is counted exactly when it is
+stored, and the view is one query of the CLASS_ID partition. Should the
+counters drift anyway (say, items edited by hand),
+
+    python -m home_app.progress rebuild [--write]
+
+recomputes them from the raw decrypt# items, prints any drift, and with
+--write replaces the stored aggregates. It scans the whole users table (see
+DynamoBackend.scan), so it is run by hand, not on a schedule.
+"""
+import argparse
+import math
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from home_app.submissions import (SK_PREFIX, DynamoBackend, Increment, SQLiteBackend,
+                                  StorageBackend, Submission)
+
+CLASS_ID = "#class"
+LEVEL_PREFIX = "level#"
+STUDENT_PREFIX = "student#"
+HISTOGRAM_BUCKETS = 25              # 2**24 seconds is half a year
+STRAGGLERS = 20
+
+
+def bucket(seconds: float) -> int:
+    """Histogram bucket of a time to solve: k for 2**k <= seconds < 2**(k+1), and 0 below 2"""
+    if seconds < 2:
+        return 0
+    return min(HISTOGRAM_BUCKETS - 1, int(math.log2(seconds)))
+
+
+def histogram_quantile(histogram: Dict[int, int], q: float) -> Optional[float]:
+    """Approximate quantile of the times in a histogram,
+    interpolating geometrically within a bucket"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for k in sorted(histogram):
+        if seen + histogram[k] >= rank:
+            fraction = (rank - seen) / histogram[k]
+            return 2 ** (k + fraction) if k else 2 * fraction
+        seen += histogram[k]
+    return float(2 ** HISTOGRAM_BUCKETS)
+
+
+def level_counters(submission: Submission) -> Dict[str, float]:
+    """What one submission adds to its level's item"""
+    counters: Dict[str, float] = {"solves": 1}
+    if submission.elapsed_seconds is not None:
+        counters.update(timed=1, elapsed_total=submission.elapsed_seconds)
+        counters[f"h{bucket(submission.elapsed_seconds)}"] = 1
+    return counters
+
+
+def increments(submission: Submission) -> List[Increment]:
+    """The aggregate increments to apply when a submission is recorded"""
+    if submission.level is None:
+        return []
+    return [((CLASS_ID, f"{LEVEL_PREFIX}{submission.level}"), level_counters(submission), {}),
+            ((CLASS_ID, f"{STUDENT_PREFIX}{submission.user_id}"), {"submits": 1},
+             {"levels": {submission.level}})]
+
+
+class LevelProgress(BaseModel):
+    """Class-wide results for one level"""
+    level: int
+    solves: int
+    timed: int
+    # from the histogram: off by up to 1.4x either way
+    approx_median_seconds: Optional[float] = None
+    mean_seconds: Optional[float] = None
+    histogram: Dict[int, int]       # bucket k -> solves taking 2**k to 2**(k+1) seconds
+
+
+class StudentProgress(BaseModel):
+    """The levels one student has solved"""
+    user_id: str
+    levels_solved: List[int]
+    submits: int
+
+
+class ClassProgress(BaseModel):
+    """Body of GET /api/v1/progress"""
+    students: int
+    levels: List[LevelProgress]
+    stragglers: List[StudentProgress]       # fewest levels solved first
+
+
+def summarize(items: Iterable[Dict[str, Any]], stragglers: int = STRAGGLERS) -> ClassProgress:
+    """Turn the aggregate items (which may hold DynamoDB Decimals) into the instructor view"""
+    levels, students = [], []
+    for item in items:
+        if item["sk"].startswith(LEVEL_PREFIX) and item.get("solves"):
+            histogram = {int(name[1:]): int(value) for name, value in item.items()
+                         if name[:1] == "h" and name[1:].isdigit() and value}
+            timed = int(item.get("timed", 0))
+            levels.append(LevelProgress(
+                level=int(item["sk"][len(LEVEL_PREFIX):]), solves=int(item.get("solves", 0)),
+                timed=timed,
+                approx_median_seconds=histogram_quantile(histogram, 0.5),
+                mean_seconds=float(item["elapsed_total"]) / timed if timed else None,
+                histogram=dict(sorted(histogram.items()))))
+        elif item["sk"].startswith(STUDENT_PREFIX) and item.get("levels"):
+            solved = sorted(int(n) for n in item.get("levels", ()))
+            students.append(StudentProgress(user_id=item["sk"][len(STUDENT_PREFIX):],
+                                            levels_solved=solved,
+                                            submits=int(item.get("submits", 0))))
+    students.sort(key=lambda s: (len(s.levels_solved), s.user_id))
+    return ClassProgress(students=len(students), levels=sorted(levels, key=lambda p: p.level),
+                         stragglers=students[:stragglers])
+
+
+def aggregate(submissions: Iterable[Submission]) -> Dict[str, Dict[str, Any]]:
+    """The aggregate items for a set of submissions, by sort key"""
+    items: Dict[str, Dict[str, Any]] = {}
+    for s in submissions:
+        if s.level is None:
+            continue
+        level = items.setdefault(f"{LEVEL_PREFIX}{s.level}", {})
+        for name, value in level_counters(s).items():
+            level[name] = level.get(name, 0) + value
+        student = items.setdefault(f"{STUDENT_PREFIX}{s.user_id}", {"levels": set(), "submits": 0})
+        student["levels"].add(s.level)
+        student["submits"] += 1
+    return items
+
+
+class ProgressAggregates:
+    """Maintains and reads the class-wide aggregate items"""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    def read(self) -> ClassProgress:
+        """The instructor view, from one query"""
+        return summarize(self.backend.query(CLASS_ID))
+
+    def rebuild(self, write: bool = False) -> List[str]:
+        """Recompute the aggregates from every decrypt item. Returns a line for each
+        difference from the stored aggregates; with write, stores the recomputed ones."""
+        fields = ("user_id", "guid", "level", "elapsed_seconds")
+        expected = aggregate(Submission.model_validate({k: item.get(k) for k in fields})
+                             for item in self.backend.scan(SK_PREFIX))
+        stored = {item["sk"]: item for item in self.backend.query(CLASS_ID)}
+        drift = []
+        for sk in sorted(set(expected) | set(stored)):
+            want, have = expected.get(sk, {}), stored.get(sk, {})
+            for name in sorted((set(want) | set(have)) - {"user_id", "sk"}):
+                a, b = normalize(want.get(name, 0)), normalize(have.get(name, 0))
+                if a != b:
+                    drift.append(f"{sk} {name}: stored {b} recomputed {a}")
+        if write and drift:
+            # an aggregate with no submissions behind it is emptied, which the view skips;
+            # DynamoDB rejects empty sets, so an empty attribute is left out rather than written
+            self.backend.batch_put([{"user_id": CLASS_ID, "sk": sk,
+                                     **{name: value for name, value in expected.get(sk, {}).items()
+                                        if value or not isinstance(value, (set, frozenset))}}
+                                    for sk in set(expected) | set(stored)])
+        return drift
+
+
+def normalize(value: Any) -> Any:
+    """Compare stored (Decimal, list) and recomputed (float, set) values"""
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return sorted(int(v) for v in value)
+    return round(float(value), 6)
+
+
+def backend_from_env() -> StorageBackend:
+    """The users table the deployed function uses (USERS_TABLE_NAME), or with
+    SUBMISSIONS_DB set, that SQLite database"""
+    if os.environ.get("SUBMISSIONS_DB"):
+        return SQLiteBackend(os.environ["SUBMISSIONS_DB"])
+    import boto3                # pylint: disable=import-outside-toplevel
+    dynamodb: Any = boto3.resource("dynamodb")
+    return DynamoBackend(dynamodb.Table(os.environ["USERS_TABLE_NAME"]))
+
+
+def main():
+    """Rebuild or show the aggregates from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="recompute the aggregates and report drift")
+    rebuild.add_argument("--write", action="store_true", help="replace the stored aggregates")
+    sub.add_parser("show", help="print the instructor view as JSON")
+    args = parser.parse_args()
+
+    aggregates = ProgressAggregates(backend_from_env())
+    if args.command == "show":
+        print(aggregates.read().model_dump_json(indent=1))
+        return
+    drift = aggregates.rebuild(write=args.write)
+    for line in drift:
+        print(line)
+    print(f"{len(drift)} differences" + (" (rewritten)" if args.write and drift else ""),
+          file=sys.stderr)
+    sys.exit(1 if drift and not args.write else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Caches of rendered template output.
+
+Templates render the same output for the same context until the next deploy,
+so PageCache keeps whole pages keyed by (template name, hash of the context,
+DEPLOYMENT_TIMESTAMP). A page rendered without context (about.html, help.html,
+...) is one dictionary lookup after its first render.
+
+For pages that differ per user, FragmentCacheExtension adds a block tag that
+caches part of a template:
+
+    {% cache "base-footer" %} ... {% endcache %}
+
+The body is rendered once per key (the tag's arguments, which must be
+hashable) and deployment, and reused by every template that includes it.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Mapping, cast
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from home_app.cache import LRUCache
+from home_app.fastjson import default
+
+DEPLOYMENT_TIMESTAMP = os.environ.get("DEPLOYMENT_TIMESTAMP", "")
+# with TEMPLATE_DEV set, edited templates show up without a restart, so nothing is cached
+_DEV = bool(os.environ.get("TEMPLATE_DEV"))
+PAGE_CACHE_BYTES = 0 if _DEV else int(os.environ.get("PAGE_CACHE_BYTES", 8 * 1024 * 1024))
+FRAGMENT_CACHE_BYTES = 0 if _DEV else int(os.environ.get("FRAGMENT_CACHE_BYTES", 1024 * 1024))
+
+
+def context_hash(context: Mapping[str, Any]) -> str:
+    """A short hash of a template context; empty for no context.
+    The context is hashed as sorted-key JSON, so equal contexts hash equally
+    whatever their key order or container types."""
+    if not context:
+        return ""
+    data = json.dumps(context, sort_keys=True, separators=(",", ":"), default=default)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class PageCache:
+    """Rendered pages, bounded by total size"""
+
+    def __init__(self, max_bytes: int = PAGE_CACHE_BYTES, deployment: str = DEPLOYMENT_TIMESTAMP):
+        self.lru = LRUCache(max_bytes=max_bytes)
+        self.deployment = deployment
+
+    def get_or_render(self, name: str, context: Dict[str, Any],
+                      render: Callable[[str, Dict[str, Any]], str]) -> str:
+        """Return the cached output for a template and context,
+        calling render(name, context) on a miss"""
+        key = (name, context_hash(context), self.deployment)
+        html = self.lru.get(key)
+        if html is None:
+            html = render(name, context)
+            self.lru.put(key, html)
+        return html
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        return self.lru.stats()
+
+
+class FragmentCacheExtension(Extension):
+    """The {% cache key, ... %} ... {% endcache %} tag"""
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        self.cache = LRUCache(max_bytes=FRAGMENT_CACHE_BYTES)
+        self.deployment = DEPLOYMENT_TIMESTAMP
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cached", [nodes.Tuple(args, "load")]),
+                               [], [], body).set_lineno(lineno)
+
+    def _cached(self, key, caller):
+        key = (key, self.deployment)
+        out = self.cache.get(key)
+        if out is None:
+            out = caller()
+            self.cache.put(key, out)
+        return out
+
+
+def fragment_cache(environment) -> LRUCache:
+    """The fragment cache of an environment that has FragmentCacheExtension"""
+    return cast(FragmentCacheExtension,
+                environment.extensions[FragmentCacheExtension.identifier]).cache
@@ -0,0 +1,213 @@
+"""
+Request routing for the Lambda handler.
+
+Routes are registered with a decorator:
+
+    ROUTER = Router()
+
+    @ROUTER.route("GET", "/api/v1/users/{user_id}")
+    def get_user(request):
+        return resp_json(200, {"user_id": request.params["user_id"]})
+
+`{name}` matches one whole path segment and `{name+}` matches the rest of the
+path (like API Gateway's `{proxy+}`). Paths without parameters are found with a
+dict lookup; the rest are stored in a per-method trie of path segments, so the
+cost of a dispatch depends on the depth of the path, not the number of routes.
+Literal segments take precedence over parameters.
+
+Middleware is a callable `(request, call_next) -> response`. Each route gets
+the router's default middleware unless it passes its own list.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+Handler = Callable[["Request"], Dict[str, Any]]
+Middleware = Callable[["Request", Handler], Dict[str, Any]]
+
+ANY_METHOD = "ANY"
+
+
+@dataclass
+class Request:
+    """The parts of an API Gateway v2 event that handlers need"""
+    method: str
+    path: str
+    headers: Mapping[str, str] = field(default_factory=dict)
+    query: Mapping[str, str] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+    event: Dict[str, Any] = field(default_factory=dict)
+    route: Optional[str] = None         # pattern of the matched route, set by Router.dispatch
+
+    @classmethod
+    def from_event(cls, event: Dict[str, Any]) -> "Request":
+        """Build a Request from a payload format 2.0 event"""
+        return cls(method=event.get("requestContext", {}).get("http", {}).get("method", "GET"),
+                   path=event.get("rawPath") or event.get("path", ""),
+                   headers=event.get("headers") or {},
+                   query=event.get("queryStringParameters") or {},
+                   event=event)
+
+
+@dataclass
+class Route:
+    """One registered route"""
+    method: str
+    pattern: str
+    handler: Handler
+    middleware: Sequence[Middleware]
+    param_names: Tuple[str, ...] = ()
+    call: Handler = field(init=False)   # handler wrapped in its middleware
+
+    def __post_init__(self):
+        params = (param_name(seg) for seg in split_path(self.pattern))
+        self.param_names = tuple(param[0] for param in params if param)
+        self.call = chain(self.middleware, self.handler)
+
+
+class Node:
+    """Trie node for one path segment"""
+    __slots__ = ("literal", "param", "greedy", "route")
+
+    def __init__(self):
+        self.literal: Dict[str, "Node"] = {}
+        self.param: Optional["Node"] = None
+        self.greedy: Optional[Route] = None
+        self.route: Optional[Route] = None
+
+    def insert(self, route: Route) -> None:
+        """Add a route below this node"""
+        node = self
+        segments = split_path(route.pattern)
+        for i, seg in enumerate(segments):
+            param = param_name(seg)
+            if param is None:
+                node = node.literal.setdefault(seg, Node())
+            elif param[1]:
+                if i != len(segments) - 1:
+                    raise ValueError(f"{route.pattern}: {{{param[0]}+}} must be the last segment")
+                if node.greedy is not None:
+                    raise ValueError(f"{route.method} {route.pattern}: "
+                                     f"already routed to {node.greedy.pattern}")
+                node.greedy = route
+                return
+            else:
+                if node.param is None:
+                    node.param = Node()
+                node = node.param
+        if node.route is not None:
+            raise ValueError(f"{route.method} {route.pattern}: "
+                             f"already routed to {node.route.pattern}")
+        node.route = route
+
+    def find(self, segments: List[str], i: int, values: List[str]) -> Optional[Route]:
+        """Return the route matching segments[i:], appending parameter values to values"""
+        if i == len(segments):
+            return self.route
+        seg = segments[i]
+        child = self.literal.get(seg)
+        if child is not None:
+            route = child.find(segments, i + 1, values)
+            if route is not None:
+                return route
+        if self.param is not None and seg:
+            values.append(seg)
+            route = self.param.find(segments, i + 1, values)
+            if route is not None:
+                return route
+            values.pop()
+        if self.greedy is not None:
+            rest = "/".join(segments[i:])
+            if rest:
+                values.append(rest)
+                return self.greedy
+        return None
+
+
+def split_path(path: str) -> List[str]:
+    """'/a/b' -> ['a', 'b']"""
+    return path[1:].split("/") if path.startswith("/") else path.split("/")
+
+
+def param_name(segment: str) -> Optional[Tuple[str, bool]]:
+    """'{id}' -> ('id', False); '{path+}' -> ('path', True); literal -> None"""
+    if not (segment.startswith("{") and segment.endswith("}")):
+        if "{" in segment or "}" in segment:
+            raise ValueError(f"parameters must be whole path segments: {segment}")
+        return None
+    name = segment[1:-1]
+    return (name[:-1], True) if name.endswith("+") else (name, False)
+
+
+def chain(middleware: Sequence[Middleware], handler: Handler) -> Handler:
+    """Wrap handler so that middleware[0] runs first"""
+    def wrap(mw: Middleware, call_next: Handler) -> Handler:
+        return lambda request: mw(request, call_next)
+
+    call = handler
+    for mw in reversed(middleware):
+        call = wrap(mw, call)
+    return call
+
+
+class Router:
+    """Method + path dispatch table"""
+
+    def __init__(self, middleware: Sequence[Middleware] = (), fallback: Optional[Handler] = None):
+        self.middleware = list(middleware)
+        self.fallback = fallback
+        self.routes: List[Route] = []
+        self._static: Dict[str, Dict[str, Route]] = {}
+        self._tries: Dict[str, Node] = {}
+
+    def add(self, method: str, pattern: str, handler: Handler,
+            middleware: Optional[Sequence[Middleware]] = None) -> Route:
+        """Register handler for method and pattern. method may be ANY."""
+        route = Route(method.upper(), pattern, handler,
+                      self.middleware if middleware is None else list(middleware))
+        if route.param_names:
+            self._tries.setdefault(route.method, Node()).insert(route)
+        else:
+            static = self._static.setdefault(route.method, {})
+            if pattern in static:
+                raise ValueError(f"{route.method} {pattern}: already routed")
+            static[pattern] = route
+        self.routes.append(route)
+        return route
+
+    def route(self, method: str, pattern: str,
+              middleware: Optional[Sequence[Middleware]] = None) -> Callable[[Handler], Handler]:
+        """Decorator form of add()"""
+        def decorator(handler: Handler) -> Handler:
+            self.add(method, pattern, handler, middleware)
+            return handler
+        return decorator
+
+    def _match_method(self, method: str, path: str) -> Tuple[Optional[Route], Dict[str, str]]:
+        route = self._static.get(method, {}).get(path)
+        if route is not None:
+            return route, {}
+        trie = self._tries.get(method)
+        if trie is None:
+            return None, {}
+        values: List[str] = []
+        route = trie.find(split_path(path), 0, values)
+        if route is None:
+            return None, {}
+        return route, dict(zip(route.param_names, values))
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Route], Dict[str, str]]:
+        """Return (route, path parameters), or (None, {}) if nothing matches"""
+        route, params = self._match_method(method.upper(), path)
+        if route is None:
+            route, params = self._match_method(ANY_METHOD, path)
+        return route, params
+
+    def dispatch(self, request: Request) -> Dict[str, Any]:
+        """Call the matching route, or the fallback wrapped in the default middleware"""
+        route, request.params = self.match(request.method, request.path)
+        if route is not None:
+            request.route = route.pattern
+            return route.call(request)
+        if self.fallback is None:
+            raise LookupError(f"no route for {request.method} {request.path}")
+        return chain(self.middleware, self.fallback)(request)
@@ -0,0 +1,251 @@
+"""
+Signed session cookies.
+
+A session is the user's id, email and role, with an id and an expiry, carried
+in the cookie itself:
+
+    v1.<key id>.<base64url JSON claims>.<base64url HMAC-SHA256 of everything before it>
+
+so checking who is logged in is an HMAC and a JSON parse, with no table lookup.
+Keys come from SESSION_KEYS ("kid:base64 secret,kid:secret,...") or, in Lambda,
+from the Secrets Manager secret SESSION_SECRET_ARN, a JSON object
+
+    {"current": "k2", "keys": {"k2": "<base64>", "k1": "<base64>"}, "revoked": ["<sid or user id>"]}
+
+and are loaded once per container. New cookies are signed with the current key;
+cookies signed with any other listed key still verify, so a key is rotated by
+adding a new current key and removing the old one after SESSION_TTL. A session
+is refused if its id or its user id is on the revocation list.
+
+Sessions are started by GET /login (main.py): a registered address asks for a
+login link, which is emailed to it and carries a token in the same format
+with version l1. Opening the link within LOGIN_TTL sets the session cookie. A
+login token is never accepted as a session, nor a session as a login token.
+
+    python -m home_app.sessions keygen            # a new kid:secret for SESSION_KEYS
+    python -m home_app.sessions issue u1 u1@example.edu instructor
+"""
+import argparse
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Mapping, Optional
+
+from home_app import fastjson
+
+VERSION = "v1"
+LOGIN_VERSION = "l1"
+COOKIE_NAME = "iga_session"
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 8 * 3600))
+LOGIN_TTL = int(os.environ.get("LOGIN_TTL", 15 * 60))
+KEY_BYTES = 32
+ROLES = ("student", "instructor")
+
+
+class SessionKeyError(ValueError):
+    """The session keys are missing or malformed"""
+
+
+def b64encode(data: bytes) -> str:
+    """Unpadded base64url"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64decode(text: str) -> bytes:
+    """Inverse of b64encode. Raises ValueError."""
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+@dataclass(frozen=True)
+class Session:
+    """A verified session"""
+    user_id: str
+    email: str
+    role: str
+    sid: str
+    issued_at: int
+    expires_at: int
+
+    @property
+    def is_instructor(self) -> bool:
+        """True for instructors"""
+        return self.role == "instructor"
+
+
+@dataclass(frozen=True)
+class Keyring:
+    """Signing keys by id; current signs, all of them verify"""
+    keys: Mapping[str, bytes]
+    current: str
+    revoked: FrozenSet[str] = frozenset()
+
+    def __post_init__(self):
+        if self.current not in self.keys:
+            raise SessionKeyError(f"no key {self.current!r}")
+        for kid, key in self.keys.items():
+            if "." in kid or len(key) < 16:
+                raise SessionKeyError(f"key {kid!r}: ids may not contain '.', keys need 16+ bytes")
+
+    @classmethod
+    def parse(cls, spec: str, revoked: Iterable[str] = ()) -> "Keyring":
+        """From "kid:base64,kid:base64,...", the first being current"""
+        keys: Dict[str, bytes] = {}
+        for item in spec.split(","):
+            kid, _, secret = item.strip().partition(":")
+            try:
+                keys[kid] = b64decode(secret)
+            except (ValueError, binascii.Error) as e:
+                raise SessionKeyError(f"key {kid!r} is not base64") from e
+        if not keys or not next(iter(keys)):
+            raise SessionKeyError("no session keys")
+        return cls(keys, next(iter(keys)), frozenset(revoked))
+
+    @classmethod
+    def from_secret(cls, secret: Mapping) -> "Keyring":
+        """From the JSON object stored in Secrets Manager"""
+        keys = {kid: b64decode(value) for kid, value in secret["keys"].items()}
+        return cls(keys, secret["current"], frozenset(secret.get("revoked", ())))
+
+    @classmethod
+    def load(cls, env: Mapping[str, str] = os.environ) -> Optional["Keyring"]:
+        """The keys configured for this container, or None if sessions are not configured"""
+        revoked = [r for r in env.get("SESSION_REVOKED", "").split(",") if r]
+        if env.get("SESSION_KEYS"):
+            return cls.parse(env["SESSION_KEYS"], revoked)
+        if env.get("SESSION_SECRET_ARN"):
+            import boto3            # pylint: disable=import-outside-toplevel
+            client = boto3.client("secretsmanager")
+            value = client.get_secret_value(SecretId=env["SESSION_SECRET_ARN"])
+            ring = cls.from_secret(json.loads(value["SecretString"]))
+            return cls(ring.keys, ring.current, ring.revoked | frozenset(revoked))
+        return None
+
+
+class SessionSigner:
+    """Issues and verifies session tokens"""
+
+    def __init__(self, keyring: Keyring, ttl: int = SESSION_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.keyring = keyring
+        self.ttl = ttl
+        self.clock = clock
+        # one HMAC object per key, copied for each token instead of re-keyed
+        self._macs = {kid: hmac.new(key, digestmod=hashlib.sha256)
+                      for kid, key in keyring.keys.items()}
+
+    def _sign(self, kid: str, signed: bytes) -> bytes:
+        mac = self._macs[kid].copy()
+        mac.update(signed)
+        return mac.digest()
+
+    def _encode(self, version: str, claims: Dict) -> str:
+        kid = self.keyring.current
+        signed = f"{version}.{kid}.{b64encode(fastjson.dumps(claims).encode('utf-8'))}"
+        return f"{signed}.{b64encode(self._sign(kid, signed.encode('ascii')))}"
+
+    def _decode(self, version: str, token: Optional[str]) -> Optional[Dict]:
+        """The claims of a token of this version, or None if it is malformed, forged or expired"""
+        if not token:
+            return None
+        signed, _, signature = token.rpartition(".")
+        token_version, _, rest = signed.partition(".")
+        kid, _, payload = rest.partition(".")
+        if token_version != version or kid not in self._macs:
+            return None
+        try:
+            expected = self._sign(kid, signed.encode("ascii"))
+            if not hmac.compare_digest(expected, b64decode(signature)):
+                return None
+            claims = fastjson.loads(b64decode(payload))
+            if claims["exp"] <= self.clock():
+                return None
+        except (ValueError, UnicodeError, binascii.Error, KeyError, TypeError):
+            return None
+        return claims
+
+    def issue(self, user_id: str, email: str, role: str = "student") -> str:
+        """A token for a new session"""
+        if role not in ROLES:
+            raise ValueError(f"unknown role {role!r}")
+        now = int(self.clock())
+        return self._encode(VERSION, {"uid": user_id, "email": email, "role": role,
+                                      "sid": secrets.token_urlsafe(12), "iat": now,
+                                      "exp": now + self.ttl})
+
+    def verify(self, token: Optional[str]) -> Optional[Session]:
+        """The session in token, or None if it is malformed, forged, expired or revoked"""
+        claims = self._decode(VERSION, token)
+        if claims is None:
+            return None
+        try:
+            session = Session(user_id=claims["uid"], email=claims["email"], role=claims["role"],
+                              sid=claims["sid"], issued_at=claims["iat"], expires_at=claims["exp"])
+        except (KeyError, TypeError):
+            return None
+        if session.sid in self.keyring.revoked or session.user_id in self.keyring.revoked:
+            return None
+        return session
+
+    def issue_login(self, email: str) -> str:
+        """A token for a login link to email, good for LOGIN_TTL seconds"""
+        return self._encode(LOGIN_VERSION, {"email": email, "exp": int(self.clock()) + LOGIN_TTL})
+
+    def verify_login(self, token: Optional[str]) -> Optional[str]:
+        """The email a login token was issued to, or None if it is not a valid login token"""
+        claims = self._decode(LOGIN_VERSION, token)
+        email = claims.get("email") if isinstance(claims, dict) else None
+        if not isinstance(email, str) or email in self.keyring.revoked:
+            return None
+        return email
+
+    def cookie(self, token: str) -> str:
+        """Set-Cookie value that stores token for the session's lifetime"""
+        return f"{COOKIE_NAME}={token}; Max-Age={self.ttl}; Path=/; Secure; HttpOnly; SameSite=Lax"
+
+
+def clear_cookie() -> str:
+    """Set-Cookie value that ends the session in the browser"""
+    return f"{COOKIE_NAME}=; Max-Age=0; Path=/; Secure; HttpOnly; SameSite=Lax"
+
+
+def session_token(cookies: Optional[Iterable[str]]) -> Optional[str]:
+    """The session cookie's value from an event's "cookies" list
+    (or a Cookie header split on ';')"""
+    prefix = COOKIE_NAME + "="
+    for cookie in cookies or ():
+        cookie = cookie.strip()
+        if cookie.startswith(prefix):
+            return cookie[len(prefix):]
+    return None
+
+
+def main():
+    """Make keys and tokens from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    keygen = sub.add_parser("keygen", help="print a new key for SESSION_KEYS")
+    keygen.add_argument("--kid", default=time.strftime("k%Y%m%d"))
+    issue = sub.add_parser("issue", help="print a session token, using SESSION_KEYS")
+    issue.add_argument("user_id")
+    issue.add_argument("email")
+    issue.add_argument("role", nargs="?", default="student", choices=ROLES)
+    args = parser.parse_args()
+
+    if args.command == "keygen":
+        print(f"{args.kid}:{b64encode(secrets.token_bytes(KEY_BYTES))}")
+        return
+    keyring = Keyring.load()
+    if keyring is None:
+        parser.error("set SESSION_KEYS")
+    print(SessionSigner(keyring).issue(args.user_id, args.email, args.role))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Answer static routes from an exported site (see export_site.py).
+
+The export writes every static asset and user-independent page under
+content-hashed names, with .gz/.br siblings, and a manifest.json mapping each
+route ("/", "/about.html", "/static/favicon.png", ...) to its files. Site loads
+the manifest once per container. A request for one of those routes is then a
+dictionary lookup: the response for each route and encoding is built on first
+use and kept in a size-bounded LRU, like the asset cache's.
+
+With SITE_URL set (e.g. the CloudFront or S3 website that the export was
+uploaded to), assets other than HTML are answered with a redirect to their
+immutable hashed URL there instead, so their bytes never pass through Lambda.
+HTML is always served here, so its relative links keep working, and carries
+the same Access-Control-Allow-Origin header as the pages main.py renders.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from home_app.binary import Payload
+from home_app.cache import LRUCache
+from home_app.negotiation import (NOT_MODIFIED_HEADERS, choose_encoding, etag_matches, header,
+                                  variant_etag)
+
+SITE_DIR = Path(os.environ.get("SITE_DIR", Path(__file__).parent / "site"))
+SITE_URL = os.environ.get("SITE_URL")        # where the export is hosted, if anywhere
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# responses (with their compressed variants) kept per container; override with SITE_CACHE_BYTES
+SITE_CACHE_BYTES = int(os.environ.get("SITE_CACHE_BYTES", 32 * 1024 * 1024))
+HTTP_OK = 200
+HTTP_FOUND = 302
+HTTP_NOT_MODIFIED = 304
+HTML_HEADERS = {"Access-Control-Allow-Origin": "*"}     # as main.resp_text sets
+
+
+@dataclass
+class Entry:
+    """One route in the manifest"""
+    file: str
+    content_type: str
+    etag: str
+    cache_control: str
+    is_binary: bool
+    encodings: Dict[str, str] = field(default_factory=dict)     # 'gzip'/'br' -> file
+    redirect: bool = False          # may be redirected to SITE_URL
+
+
+class Site:
+    """The routes of an exported site"""
+
+    def __init__(self, root: Path, manifest: Mapping[str, Any], base_url: Optional[str] = None,
+                 max_bytes: int = SITE_CACHE_BYTES):
+        self.root = Path(root)
+        self.routes = {route: Entry(**entry) for route, entry in manifest["routes"].items()}
+        self.base_url = base_url.rstrip("/") if base_url else None
+        # (route, coding) -> response
+        self.lru = LRUCache(max_bytes=max_bytes, sizeof=lambda resp: len(resp["body"]))
+
+    @classmethod
+    def load(cls, root: Path, base_url: Optional[str] = None) -> Optional["Site"]:
+        """The site exported to root, or None if there is none"""
+        try:
+            with open(Path(root) / MANIFEST_NAME, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{root}/{MANIFEST_NAME}: unsupported manifest version")
+        return cls(root, manifest, base_url)
+
+    def route(self, path: str, query: Mapping[str, str]) -> Optional[str]:
+        """The manifest route for a request path, if any.
+        The menu in base.html links pages as ?page=about.html, so those map to /about.html."""
+        if path in ("", "/") and query.get("page"):
+            path = "/" + query["page"]
+        return path if path in self.routes else None
+
+    def respond(self, method: str, path: str, query: Mapping[str, str],
+                request_headers: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        """A response for the request, or None if it is not for an exported route"""
+        if method not in ("GET", "HEAD"):
+            return None
+        route = self.route(path, query)
+        if route is None:
+            return None
+        entry = self.routes[route]
+        if etag_matches(header(request_headers, "If-None-Match"), entry.etag):
+            return {"statusCode": HTTP_NOT_MODIFIED, "body": "",
+                    "headers": {k: v for k, v in self._headers(entry, None).items()
+                                if k in NOT_MODIFIED_HEADERS or k.startswith("Access-Control-")}}
+        if self.base_url and entry.redirect:
+            return {"statusCode": HTTP_FOUND, "body": "",
+                    "headers": {"Location": f"{self.base_url}/{entry.file}",
+                                "Cache-Control": "no-cache"}}
+        coding = None
+        if entry.encodings:
+            coding = choose_encoding(header(request_headers, "Accept-Encoding"),
+                                     tuple(entry.encodings))
+        return dict(self._response(route, entry, coding))     # callers may replace the body
+
+    @staticmethod
+    def _headers(entry: Entry, coding: Optional[str]) -> Dict[str, str]:
+        headers = {"Content-Type": entry.content_type, "Cache-Control": entry.cache_control,
+                   "ETag": variant_etag(entry.etag, coding) if coding else entry.etag}
+        if entry.encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if entry.content_type.startswith("text/html"):
+            headers.update(HTML_HEADERS)
+        if coding:
+            headers["Content-Encoding"] = coding
+        return headers
+
+    def _response(self, route: str, entry: Entry, coding: Optional[str]) -> Dict[str, Any]:
+        resp = self.lru.get((route, coding))
+        if resp is None:
+            headers = self._headers(entry, coding)
+            data = (self.root / (entry.encodings[coding] if coding else entry.file)).read_bytes()
+            if coding or entry.is_binary:
+                body: Any = Payload(data, key=headers["ETag"])
+            else:
+                body = data.decode("utf-8")
+            resp = {"statusCode": HTTP_OK, "headers": headers, "body": body,
+                    "isBase64Encoded": isinstance(body, Payload)}
+            self.lru.put((route, coding), resp)
+        return resp
@@ -0,0 +1,66 @@
+"""
+Cold-start instrumentation.
+Set STARTUP_PROFILE=1 to record how long each import/init phase of the handler
+takes. The timings are logged as one JSON line at the end of the first invocation.
+Lazily created clients (DynamoDB, SES, jinja2) are recorded when first used.
+This module imports only the standard library so that it can be loaded first.
+"""
+import functools
+import json
+import os
+import time
+from typing import Any, Callable, Dict
+
+ENABLED = os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+_T0 = time.perf_counter()
+_last = _T0
+_phases: Dict[str, float] = {}
+_lazy: Dict[str, float] = {}
+_reported = False               # pylint: disable=invalid-name
+
+
+def mark(name: str) -> None:
+    """Record the time since the previous mark as phase `name`"""
+    global _last                # pylint: disable=global-statement
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    _phases[name] = now - _last
+    _last = now
+
+
+def timed_init(name: str) -> Callable:
+    """Decorator for lazy initializers; records the duration of each call.
+    Use under functools.lru_cache so that only the first call is recorded."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            t = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _lazy[name] = _lazy.get(name, 0.0) + time.perf_counter() - t
+        return wrapper
+    return decorator
+
+
+def report() -> Dict[str, Any]:
+    """Return the timings recorded so far, in milliseconds"""
+    return {
+        "event": "startup",
+        "init_ms": round((_last - _T0) * 1000, 3),
+        "phases_ms": {k: round(v * 1000, 3) for k, v in _phases.items()},
+        "lazy_ms": {k: round(v * 1000, 3) for k, v in _lazy.items()},
+    }
+
+
+def report_once(logger) -> None:
+    """Log the startup report the first time this is called in a container"""
+    global _reported            # pylint: disable=global-statement
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    logger.info("%s", json.dumps(report()))
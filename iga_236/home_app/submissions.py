@@ -0,0 +1,471 @@
+"""
+Storage for decrypt submissions (POST /api/v1/decrypt/submit).
+
+Each correct decrypt is one item in the users table, keyed by
+(user_id, sk="decrypt#<guid>"). Because the key is derived from the GUID a
+resubmission addresses the same item, and the first write wins: every
+submission is a conditional put, so of two concurrent requests carrying the
+same GUID only one records it (and notifies the listeners). A batch first
+drops the keys BatchGetItem finds, then makes its conditional puts in parallel.
+
+A store may also keep aggregates (see progress.py). Their increments for a
+submission are written in one transaction with its conditional put, so they
+change exactly when the submission is recorded. A listener runs after the write
+has succeeded; one that fails is logged and does not fail the request.
+
+The store talks to a StorageBackend. DynamoBackend is used in Lambda;
+SQLiteBackend (":memory:" or a file) is for tests and local runs.
+"""
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+SK_PREFIX = "decrypt#"
+BATCH_WRITE_MAX = 25            # DynamoDB BatchWriteItem limit
+BATCH_GET_MAX = 100             # DynamoDB BatchGetItem limit
+PUT_WORKERS = 16                # concurrent conditional puts for a batch
+MAX_SUBMISSIONS = 100           # per request
+RETRY_ATTEMPTS = 8
+RETRY_BASE_DELAY = 0.05         # seconds; doubled on every attempt, with full jitter
+LOGGER = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+Increment = Tuple[Key, Dict[str, float], Dict[str, Set[Any]]]     # key, counters, sets to add to
+
+
+class Submission(BaseModel):
+    """A student's report that they decrypted the message with this GUID"""
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+    # '#...' ids are aggregates
+    user_id: str = Field(min_length=1, max_length=128, pattern=r"^[^#]")
+    guid: UUID
+    level: Optional[int] = Field(default=None, ge=0, le=16)
+    elapsed_seconds: Optional[float] = Field(default=None, ge=0)
+
+    @property
+    def key(self) -> Key:
+        """Primary key of the item in the users table"""
+        return (self.user_id, SK_PREFIX + str(self.guid))
+
+    def item(self, now: float) -> Dict[str, Any]:
+        """The item written to the users table"""
+        user_id, sk = self.key
+        item = {"user_id": user_id, "sk": sk, "guid": str(self.guid), "submitted_at": now}
+        if self.level is not None:
+            item["level"] = self.level
+        if self.elapsed_seconds is not None:
+            item["elapsed_seconds"] = self.elapsed_seconds
+        return item
+
+
+class SubmitResponse(BaseModel):
+    """Body of the response to POST /api/v1/decrypt/submit"""
+    ok: bool = True
+    received: int
+    recorded: int
+    duplicates: int
+
+
+class ErrorResponse(BaseModel):
+    """Body of a 400 response"""
+    ok: bool = False
+    error: str
+
+
+def retry(func: Callable[[], Any], done: Callable[[Any], bool],
+          attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+          sleep: Callable[[float], None] = time.sleep) -> Any:
+    """Call func until done(result) or attempts run out, with exponential backoff.
+    Returns the last result."""
+    result = None
+    for attempt in range(attempts):
+        result = func()
+        if done(result):
+            return result
+        sleep(random.uniform(0, base_delay * (2 ** attempt)))
+    return result
+
+
+def chunks(seq: List[Any], size: int) -> Iterable[List[Any]]:
+    """Split seq into lists of at most size"""
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+class StorageBackend(ABC):
+    """The operations the submission store needs from the users table"""
+
+    @abstractmethod
+    def put_if_absent(self, item: Dict[str, Any], increments: Sequence[Increment] = ()) -> bool:
+        """Write item unless its key exists, applying increments in the same transaction
+        if it is written. Return True if it was written."""
+
+    @abstractmethod
+    def put_many_if_absent(self, items: List[Dict[str, Any]],
+                           increments: Optional[List[Sequence[Increment]]] = None) -> List[bool]:
+        """put_if_absent for each of items (unique keys), with the increments for each.
+        Return whether each was written."""
+
+    @abstractmethod
+    def batch_put(self, items: List[Dict[str, Any]]) -> None:
+        """Write items (unique keys) as efficiently as possible,
+        replacing any stored under those keys"""
+
+    @abstractmethod
+    def existing_keys(self, keys: List[Key]) -> Set[Key]:
+        """Return the subset of keys that are already stored"""
+
+    @abstractmethod
+    def query(self, user_id: str, sk_prefix: str = "") -> List[Dict[str, Any]]:
+        """Return a user's items whose sort key starts with sk_prefix"""
+
+    @abstractmethod
+    def increment(self, key: Key, counters: Dict[str, float],
+                  sets: Optional[Dict[str, Set[Any]]] = None) -> None:
+        """Atomically add to numeric attributes and set attributes of one item,
+        creating it if needed"""
+
+    @abstractmethod
+    def scan(self, sk_prefix: str) -> Iterable[Dict[str, Any]]:
+        """Every item, of every user, whose sort key starts with sk_prefix.
+        This reads the whole table, so it is for offline jobs only."""
+
+
+def json_default(value: Any) -> Any:
+    """Store sets (DynamoDB string and number sets) as sorted lists"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SQLiteBackend(StorageBackend):
+    """Local stand-in for the users table"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS items "
+                              "(user_id TEXT, sk TEXT, data TEXT, PRIMARY KEY (user_id, sk))")
+
+    def put_if_absent(self, item, increments=()):
+        return self.put_many_if_absent([item], [increments])[0]
+
+    def put_many_if_absent(self, items, increments=None):
+        written = []
+        with self.lock, self.conn:
+            for item, updates in zip(items, increments or [()] * len(items)):
+                written.append(self.conn.execute("INSERT OR IGNORE INTO items VALUES (?,?,?)",
+                                                 (item["user_id"], item["sk"],
+                                                  json.dumps(item))).rowcount == 1)
+                if written[-1]:
+                    for key, counters, sets in updates:
+                        self._increment(key, counters, sets)
+        return written
+
+    def batch_put(self, items):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO items VALUES (?,?,?)",
+                                  [(i["user_id"], i["sk"], json.dumps(i, default=json_default))
+                                   for i in items])
+
+    def existing_keys(self, keys):
+        found = set()
+        with self.lock:
+            for user_id, sk in keys:
+                if self.conn.execute("SELECT 1 FROM items WHERE user_id=? AND sk=?",
+                                     (user_id, sk)).fetchone():
+                    found.add((user_id, sk))
+        return found
+
+    def query(self, user_id, sk_prefix=""):
+        with self.lock:
+            rows = self.conn.execute("SELECT data FROM items WHERE user_id=? AND sk>=? AND sk<? "
+                                     "ORDER BY sk", (user_id, sk_prefix, sk_prefix + "\uffff"))
+            return [json.loads(data) for (data,) in rows]
+
+    def increment(self, key, counters, sets=None):
+        with self.lock, self.conn:
+            self._increment(key, counters, sets)
+
+    def _increment(self, key, counters, sets):
+        """increment(), in the caller's transaction"""
+        user_id, sk = key
+        row = self.conn.execute("SELECT data FROM items WHERE user_id=? AND sk=?", key).fetchone()
+        item = json.loads(row[0]) if row else {"user_id": user_id, "sk": sk}
+        for name, value in counters.items():
+            item[name] = item.get(name, 0) + value
+        for name, values in (sets or {}).items():
+            item[name] = sorted(set(item.get(name, [])) | set(values))
+        self.conn.execute("INSERT OR REPLACE INTO items VALUES (?,?,?)",
+                          (user_id, sk, json.dumps(item, default=json_default)))
+
+    def scan(self, sk_prefix):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT data FROM items WHERE sk>=? AND sk<? ORDER BY user_id, sk",
+                (sk_prefix, sk_prefix + "\uffff")).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+
+def to_dynamo(value: Any) -> Any:
+    """DynamoDB wants Decimal, not float"""
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_dynamo(v) for v in value]
+    return value
+
+
+def update_args(key: Key, counters: Dict[str, float],
+                sets: Optional[Dict[str, Set[Any]]]) -> Dict[str, Any]:
+    """UpdateItem arguments that ADD counters and sets to the item at key"""
+    names, values, adds = {}, {}, []
+    # no empty sets in DynamoDB
+    sets = {name: value for name, value in (sets or {}).items() if value}
+    for i, (name, value) in enumerate([*counters.items(), *sets.items()]):
+        names[f"#a{i}"] = name
+        if isinstance(value, (set, frozenset, list)):
+            value = set(value)
+        values[f":v{i}"] = to_dynamo(value)
+        adds.append(f"#a{i} :v{i}")
+    return {"Key": {"user_id": key[0], "sk": key[1]}, "UpdateExpression": "ADD " + ", ".join(adds),
+            "ExpressionAttributeNames": names, "ExpressionAttributeValues": values}
+
+
+class DynamoBackend(StorageBackend):
+    """The iga236-users table, through a boto3 Table resource"""
+
+    def __init__(self, table, sleep: Callable[[float], None] = time.sleep):
+        self.table = table
+        self.client = table.meta.client     # accepts Python types, like the resource
+        self.sleep = sleep
+
+    def put_if_absent(self, item, increments=()):
+        if increments:
+            return self.transact_put(item, increments)
+        try:
+            self.client.put_item(TableName=self.table.name, Item=to_dynamo(item),
+                                 ConditionExpression="attribute_not_exists(sk)")
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def put_many_if_absent(self, items, increments=None):
+        updates = increments or [()] * len(items)
+        if len(items) <= 1:
+            return [self.put_if_absent(i, u) for i, u in zip(items, updates)]
+        # clients are thread-safe
+        with ThreadPoolExecutor(min(PUT_WORKERS, len(items))) as pool:
+            return list(pool.map(self.put_if_absent, items, updates))
+
+    def transact_put(self, item: Dict[str, Any], increments: Sequence[Increment]) -> bool:
+        """The conditional put and the ADDs of its increments as one TransactWriteItems.
+        A transaction that collides with another one on an aggregate item is retried."""
+        actions = [{"Put": {"TableName": self.table.name, "Item": to_dynamo(item),
+                            "ConditionExpression": "attribute_not_exists(sk)"}}]
+        actions += [{"Update": {"TableName": self.table.name, **update_args(key, counters, sets)}}
+                     for key, counters, sets in increments]
+
+        def write():
+            try:
+                self.client.transact_write_items(TransactItems=actions)
+            except self.client.exceptions.TransactionCanceledException as e:
+                codes = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+                if codes[:1] == ["ConditionalCheckFailed"]:
+                    return False
+                if "TransactionConflict" in codes:
+                    return None
+                raise
+            return True
+
+        written = retry(write, lambda result: result is not None, sleep=self.sleep)
+        if written is None:
+            raise RuntimeError(f"TransactWriteItems for {item['sk']} kept conflicting")
+        return written
+
+    def batch_put(self, items):
+        for batch in chunks(items, BATCH_WRITE_MAX):
+            self._batch_write({self.table.name: [{"PutRequest": {"Item": to_dynamo(i)}}
+                                                 for i in batch]})
+
+    def _batch_write(self, pending):
+        """One BatchWriteItem, retrying the items it leaves unprocessed"""
+        def write():
+            unprocessed = self.client.batch_write_item(RequestItems=pending)["UnprocessedItems"]
+            pending.clear()
+            pending.update(unprocessed)
+            return unprocessed
+
+        if retry(write, lambda unprocessed: not unprocessed, sleep=self.sleep):
+            raise RuntimeError(f"BatchWriteItem left {len(pending[self.table.name])} "
+                               "items unprocessed")
+
+    def existing_keys(self, keys):
+        found = set()
+        for batch in chunks(keys, BATCH_GET_MAX):
+            self._batch_get({self.table.name: {
+                "Keys": [{"user_id": u, "sk": s} for u, s in batch],
+                "ProjectionExpression": "user_id, sk"}}, found)
+        return found
+
+    def _batch_get(self, pending, found):
+        """One BatchGetItem, retrying the keys it leaves unprocessed; adds the keys found"""
+        def read():
+            resp = self.client.batch_get_item(RequestItems=pending)
+            for row in resp["Responses"].get(self.table.name, []):
+                found.add((row["user_id"], row["sk"]))
+            pending.clear()
+            pending.update(resp.get("UnprocessedKeys") or {})
+            return pending
+
+        if retry(read, lambda unprocessed: not unprocessed, sleep=self.sleep):
+            raise RuntimeError("BatchGetItem left keys unprocessed")
+
+    def query(self, user_id, sk_prefix=""):
+        from boto3.dynamodb.conditions import Key as K     # pylint: disable=import-outside-toplevel
+        condition = K("user_id").eq(user_id)
+        if sk_prefix:
+            condition = condition & K("sk").begins_with(sk_prefix)
+        items, kwargs = [], {"KeyConditionExpression": condition}
+        while True:
+            resp = self.table.query(**kwargs)
+            items.extend(resp["Items"])
+            if "LastEvaluatedKey" not in resp:
+                return items
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    def increment(self, key, counters, sets=None):
+        self.table.update_item(**update_args(key, counters, sets))
+
+    def scan(self, sk_prefix):
+        """A Scan with a filter: DynamoDB reads, and charges read capacity for, every item in
+        the table, not just those returned. There is no index on sk to query instead, and
+        the only caller is progress rebuild, which runs by hand."""
+        from boto3.dynamodb.conditions import Attr    # pylint: disable=import-outside-toplevel
+        kwargs = {"FilterExpression": Attr("sk").begins_with(sk_prefix)}
+        while True:
+            resp = self.table.scan(**kwargs)
+            yield from resp["Items"]
+            if "LastEvaluatedKey" not in resp:
+                return
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+class SubmissionError(ValueError):
+    """The request body is not a valid submission"""
+
+
+class SubmissionsUnavailable(RuntimeError):
+    """Submissions cannot be checked, so none are accepted"""
+
+
+def reject_all(guid: UUID) -> Optional[Tuple[str, int]]:
+    """Resolver for a deployment without its GUID index, which fails closed"""
+    raise SubmissionsUnavailable(f"cannot check guid {guid}: the GUID index is not deployed")
+
+
+class SubmissionStore:
+    """Validates submissions and writes them to a backend.
+    With a resolver (GUID -> (email, level) or None, e.g. GuidIndex.lookup),
+    GUIDs that were never issued, or were issued to someone other than the
+    submitter, are rejected and the level is the one issued.
+    With increments (Submission -> aggregate increments, e.g. progress.increments),
+    each submission's increments are applied in the transaction that records it.
+    Each listener is called with the list of newly recorded submissions."""
+
+    def __init__(self, backend: StorageBackend, clock: Callable[[], float] = time.time,
+                 resolver: Optional[Callable[[UUID], Optional[Tuple[str, int]]]] = None,
+                 increments: Optional[Callable[[Submission], List[Increment]]] = None):
+        self.backend = backend
+        self.increments = increments
+        self.clock = clock
+        self.resolver = resolver
+        self.listeners: List[Callable[[List[Submission]], None]] = []
+
+    @staticmethod
+    def parse(payload: Any, user_id: Optional[str] = None) -> List[Submission]:
+        """Validate a request body: one submission, or {"submissions": [...]}.
+        With user_id (the session's), records may leave user_id out and may not name anyone else."""
+        if isinstance(payload, dict) and "submissions" in payload:
+            payload = payload["submissions"]
+        records = payload if isinstance(payload, list) else [payload]
+        if not records or len(records) > MAX_SUBMISSIONS:
+            raise SubmissionError(f"expected 1 to {MAX_SUBMISSIONS} submissions")
+        if user_id is not None:
+            records = [{**r, "user_id": r.get("user_id", user_id)} if isinstance(r, dict) else r
+                       for r in records]
+            if any(isinstance(r, dict) and r["user_id"] != user_id for r in records):
+                raise SubmissionError(f"submissions must be for {user_id}, who is logged in")
+        try:
+            return [Submission.model_validate(r) for r in records]
+        except ValidationError as e:
+            raise SubmissionError(str(e)) from e
+
+    def resolve(self, submissions: List[Submission],
+                email: Optional[str] = None) -> List[Submission]:
+        """Check each GUID against the resolver and take its level from there.
+        The GUID must have been issued to email (the session's), or else to the user_id."""
+        if self.resolver is None:
+            return submissions
+        resolved = []
+        for s in submissions:
+            issued = self.resolver(s.guid)
+            if issued is None:
+                raise SubmissionError(f"unknown guid {s.guid}")
+            if issued[0].strip().lower() != (email or s.user_id).strip().lower():
+                raise SubmissionError(f"guid {s.guid} was not issued to {email or s.user_id}")
+            level = issued[1]
+            resolved.append(s if s.level == level else s.model_copy(update={"level": level}))
+        return resolved
+
+    def record(self, submission: Submission) -> bool:
+        """Store one submission. Return False if it was already recorded."""
+        return self.backend.put_if_absent(submission.item(self.clock()),
+                                          self.increments(submission) if self.increments else ())
+
+    def record_many(self, submissions: List[Submission]) -> List[Submission]:
+        """Store a batch. Return the submissions this call wrote."""
+        unique: Dict[Key, Submission] = {}
+        for s in submissions:
+            unique.setdefault(s.key, s)
+        existing = self.backend.existing_keys(list(unique))      # one read instead of failed puts
+        candidates = [s for k, s in unique.items() if k not in existing]
+        if not candidates:
+            return []
+        now = self.clock()
+        written = self.backend.put_many_if_absent(
+            [s.item(now) for s in candidates],
+            [self.increments(s) for s in candidates] if self.increments else None)
+        return [s for s, ok in zip(candidates, written) if ok]
+
+    def submit(self, payload: Any, user_id: Optional[str] = None,
+               email: Optional[str] = None) -> SubmitResponse:
+        """Validate and store a request body; return the response body.
+        user_id and email are the submitter's, if known from their session."""
+        submissions = self.resolve(self.parse(payload, user_id), email)
+        if len(submissions) == 1:
+            new = [submissions[0]] if self.record(submissions[0]) else []
+        else:
+            new = self.record_many(submissions)
+        for listener in self.listeners if new else ():
+            try:
+                listener(new)
+            except Exception:           # pylint: disable=broad-exception-caught
+                # the submissions are stored; a 500 would only make the client retry into duplicates
+                LOGGER.exception("submission listener %r failed", listener)
+        return SubmitResponse(received=len(submissions), recorded=len(new),
+                              duplicates=len(submissions) - len(new))
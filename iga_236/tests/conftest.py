@@ -0,0 +1,50 @@
+"""Make home_app importable the same way the Lambda runtime does (CodeUri is iga_236/),
+and provide the fixtures the handler tests share"""
+import json
+import sys
+from os.path import dirname, abspath
+
+import pytest
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from home_app import main, progress
+from home_app.sessions import COOKIE_NAME, Keyring, SessionSigner, b64encode
+from home_app.submissions import SQLiteBackend, SubmissionStore
+
+
+def lambda_event(method, path, body=None, user=None, role="student", **fields):
+    """A function URL event; body is sent as JSON unless it is a string, and a user is
+    logged in with a cookie from the handler's session signer"""
+    event = {"rawPath": path, "requestContext": {"http": {"method": method}}, **fields}
+    if body is not None:
+        event["body"] = body if isinstance(body, str) else json.dumps(body)
+    if user is not None:
+        signer = main.session_signer()
+        assert signer, "log in with the signer fixture"
+        token = signer.issue(user, f"{user}@example.edu", role)
+        event["cookies"] = [f"{COOKIE_NAME}={token}"]
+    return event
+
+
+@pytest.fixture(name="call")
+def fixture_call():
+    """Run a request through the handler: call(method, path, body=None, user=None, ...)"""
+    return lambda *args, **kwargs: main.lambda_handler(lambda_event(*args, **kwargs), None)
+
+
+@pytest.fixture(name="signer")
+def fixture_signer(monkeypatch):
+    """Sign the handler's sessions with a fixed key"""
+    signer = SessionSigner(Keyring.parse("k1:" + b64encode(b"1" * 32)))
+    monkeypatch.setattr(main, "session_signer", lambda: signer)
+    return signer
+
+
+@pytest.fixture(name="store")
+def fixture_store(monkeypatch):
+    """Route the handler's submissions to an in-memory SQLite store, kept as it is deployed"""
+    store = SubmissionStore(SQLiteBackend(), clock=lambda: 1000.0, increments=progress.increments)
+    monkeypatch.setattr(main, "submission_store", lambda: store)
+    return store
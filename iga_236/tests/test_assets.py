@@ -0,0 +1,61 @@
+"""Tests for the static asset cache"""
+import base64
+
+from home_app import main
+from home_app.assets import AssetCache, strong_etag
+from home_app.cache import LRUCache
+
+
+def get(path):
+    """Run a GET through the handler"""
+    event = {"rawPath": path, "requestContext": {"http": {"method": "GET"}}}
+    return main.lambda_handler(event, None)
+
+
+def test_static_file_served_from_cache(monkeypatch):
+    """A static file is read once, then served from memory"""
+    first = get("/static/favicon.png")
+    raw = (main.STATIC_DIR / "favicon.png").read_bytes()
+    assert first["statusCode"] == 200
+    assert first["isBase64Encoded"] is True
+    assert base64.b64decode(first["body"]) == raw
+    assert first["headers"]["ETag"] == strong_etag(raw)
+
+    # a second hit must not touch the filesystem
+    def no_io(*_args, **_kwargs):
+        raise AssertionError("file I/O on a cache hit")
+    monkeypatch.setattr("pathlib.Path.read_bytes", no_io)
+    monkeypatch.setattr("pathlib.Path.resolve", no_io)
+    assert get("/static/favicon.png")["body"] == first["body"]
+
+
+def test_text_asset_and_variants():
+    """A text asset keeps its text and its precompressed variants"""
+    cache = AssetCache(main.STATIC_DIR)
+    asset = cache.get("lab1_crypto/index.html")
+    assert asset is not None
+    assert not asset.is_binary and isinstance(asset.body, str)
+    assert asset.body.startswith("<!")
+    assert "gzip" in asset.encodings
+    assert asset.cache_control == "no-cache"
+
+
+def test_escape_and_missing():
+    """Paths outside the static directory and missing files are not found"""
+    cache = AssetCache(main.STATIC_DIR)
+    assert cache.get("../main.py") is None
+    assert cache.get("no-such-file.css") is None
+    assert get("/static/../main.py")["statusCode"] == 404
+
+
+def test_lru_byte_budget():
+    """The least recently used entries go first, and an entry over the budget is not kept"""
+    lru = LRUCache(max_bytes=10)
+    lru.put("a", b"12345")
+    lru.put("b", b"12345")
+    lru.get("a")
+    lru.put("c", b"123")
+    assert "b" not in lru and "a" in lru and "c" in lru
+    lru.put("huge", b"x" * 11)
+    assert "huge" not in lru
+    assert lru.stats()["evictions"] == 1
@@ -0,0 +1,56 @@
+"""Tests for binary response bodies"""
+import base64
+
+from home_app import binary, main
+from home_app.binary import Payload, encode_body
+from home_app.negotiation import finalize
+
+
+def test_payload_base64_cached(monkeypatch):
+    """Payloads with the same content share one base64 encoding"""
+    binary.BASE64_CACHE.clear()
+    data = bytearray(b"\x89PNG" + bytes(range(256)) * 10)
+    payload = Payload(data)
+    assert len(payload) == len(data) and bytes(payload) == data
+    assert payload.data.readonly
+    text = payload.b64()
+    assert base64.b64decode(text) == data
+
+    calls = []
+    real = base64.b64encode
+    monkeypatch.setattr(base64, "b64encode", lambda d: calls.append(1) or real(d))
+    assert Payload(bytes(data)).b64() is text     # same content, another object: cache hit
+    assert Payload(b"other").b64() == "b3RoZXI="
+    assert len(calls) == 1
+
+
+def test_resp_png_and_encode_body():
+    """Binary bodies are base64 encoded at the end of the handler, text bodies are not"""
+    resp = main.resp_png(200, b"\x89PNG\r\n")
+    assert isinstance(resp["body"], Payload)
+    assert encode_body(resp)["body"] == base64.b64encode(b"\x89PNG\r\n").decode()
+    assert resp["isBase64Encoded"]
+    assert encode_body({"statusCode": 200, "body": "text"})["body"] == "text"
+
+
+def test_static_asset_not_reencoded(monkeypatch):
+    """A cached static asset reuses its base64 encoding"""
+    event = {"rawPath": "/static/lab1_crypto/assets/index-BHXZtTcA.js",
+             "headers": {"accept-encoding": "gzip"}, "requestContext": {"http": {"method": "GET"}}}
+    first = main.lambda_handler(dict(event), None)
+    assert first["headers"]["Content-Encoding"] == "gzip"
+
+    def no_encode(_data):
+        raise AssertionError("base64 encoded again")
+    monkeypatch.setattr(base64, "b64encode", no_encode)
+    assert main.lambda_handler(dict(event), None)["body"] is first["body"]
+    assert isinstance(main.respond(dict(event))["body"], Payload)   # what the HTTP adapter sends
+
+
+def test_dynamic_body_not_cached():
+    """A body compressed for one response is keyed by its ETag and kept out of BASE64_CACHE"""
+    binary.BASE64_CACHE.clear()
+    resp = finalize({"accept-encoding": "gzip"}, main.resp_text(200, "<p>hello</p>" * 200))
+    assert resp["headers"]["Content-Encoding"] == "gzip"
+    assert resp["body"].key == resp["headers"]["ETag"]          # not a hash of the body
+    assert encode_body(resp)["isBase64Encoded"] and len(binary.BASE64_CACHE) == 0
@@ -0,0 +1,88 @@
+"""Tests for the dashboard read-through cache"""
+import json
+import uuid
+
+import pytest
+
+from home_app import main
+from home_app.dashboard import DashboardCache
+from home_app.submissions import SQLiteBackend, SubmissionStore
+
+pytestmark = pytest.mark.usefixtures("signer")
+
+
+class CountingBackend(SQLiteBackend):
+    """SQLite backend that counts queries"""
+    queries = 0
+
+    def query(self, user_id, sk_prefix=""):
+        self.queries += 1
+        return super().query(user_id, sk_prefix)
+
+
+def test_read_through_and_invalidate(monkeypatch, call):
+    """A dashboard is queried once, then again after the user submits"""
+    backend = CountingBackend()
+    store = SubmissionStore(backend)
+    cache = DashboardCache(backend)
+    store.listeners.append(cache.recorded)
+    monkeypatch.setattr(main, "submission_store", lambda: store)
+    monkeypatch.setattr(main, "dashboard_cache", lambda: cache)
+
+    first = json.loads(call("GET", "/api/v1/dashboard/u1", user="u1")["body"])
+    assert first["submissions"] == []
+    call("GET", "/api/v1/dashboard/u1", user="u1")
+    assert backend.queries == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    call("POST", "/api/v1/decrypt/submit", {"guid": str(uuid.uuid4()), "level": 1}, user="u1")
+    data = json.loads(call("GET", "/api/v1/dashboard/u1", user="u1")["body"])
+    assert backend.queries == 2
+    assert data["levels_solved"] == [1]
+
+
+def test_only_own_dashboard(monkeypatch, call):
+    """Students see only their own dashboard; instructors see anyone's"""
+    cache = DashboardCache(SQLiteBackend())
+    monkeypatch.setattr(main, "dashboard_cache", lambda: cache)
+    assert call("GET", "/api/v1/dashboard/u1")["statusCode"] == 401
+    assert call("GET", "/api/v1/dashboard/u1", user="u2")["statusCode"] == 403
+    assert call("GET", "/api/v1/dashboard/u1", user="prof", role="instructor")["statusCode"] == 200
+
+
+def test_invalidate_during_query():
+    """A query that was running when the user's data changed is not cached"""
+    backend = CountingBackend()
+    cache = DashboardCache(backend)
+    query = backend.query
+
+    def racing_query(user_id, sk_prefix=""):
+        result = query(user_id, sk_prefix)
+        cache.invalidate(user_id)           # a decrypt is recorded meanwhile
+        return result
+
+    backend.query = racing_query
+    cache.get("u1")
+    backend.query = query
+    cache.get("u1")
+    assert backend.queries == 2
+
+
+def test_ttl_expiry():
+    """A cached dashboard is queried again once its ttl has passed"""
+    now = [0.0]
+    backend = CountingBackend()
+    cache = DashboardCache(backend, ttl=10, clock=lambda: now[0])
+    cache.get("u1")
+    now[0] = 9.0
+    cache.get("u1")
+    now[0] = 10.0
+    cache.get("u1")
+    assert backend.queries == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_stats_route(call):
+    """The cache-stats route reports the asset cache"""
+    stats = json.loads(call("GET", "/api/v1/cache-stats", user="u1")["body"])
+    assert "hits" in stats["assets"]
@@ -0,0 +1,40 @@
+"""Tests for JSON serialization of API responses"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from home_app import fastjson, main
+from home_app.dashboard import Dashboard, summarize
+from home_app.submissions import SubmitResponse
+
+GUID = uuid.UUID("12345678-1234-4234-8234-123456789abc")
+
+
+def test_dumps_types():
+    """Decimals, datetimes, UUIDs and models nested in a dict are serialized like the stdlib"""
+    when = datetime.datetime(2025, 9, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    model = SubmitResponse(received=1, recorded=1, duplicates=0)
+    out = fastjson.dumps({"n": Decimal("3"), "f": Decimal("1.5"), "when": when, "guid": GUID,
+                          "text": "é", "model": model})
+    assert json.loads(out) == {"n": 3, "f": 1.5, "when": "2025-09-01T12:00:00+00:00",
+                               "guid": str(GUID), "text": "é",
+                               "model": {"ok": True, "received": 1, "recorded": 1, "duplicates": 0}}
+    assert ", " not in out                   # compact, like orjson
+    assert fastjson.dumps(SubmitResponse(received=2, recorded=1, duplicates=1)) == \
+        '{"ok":true,"received":2,"recorded":1,"duplicates":1}'
+    with pytest.raises(fastjson.JSONDecodeError):
+        fastjson.loads("not json")
+
+
+def test_dashboard_model_from_dynamo_items():
+    """A dashboard built from DynamoDB items serializes its Decimals as numbers"""
+    items = [{"user_id": "u1", "sk": "decrypt#x", "guid": str(GUID), "level": Decimal("2"),
+              "submitted_at": Decimal("1700000000.5")}]
+    dashboard = summarize("u1", items)
+    assert isinstance(dashboard, Dashboard)
+    body = json.loads(main.resp_json(200, dashboard)["body"])
+    assert body["submissions"][0]["submitted_at"] == 1700000000.5      # not "1700000000.5"
+    assert body["levels_solved"] == [2]
@@ -0,0 +1,93 @@
+"""Tests for the memory-mapped GUID index"""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from home_app import main
+from home_app.guid_index import GuidIndex, entries_from_csv, update_index, write_index
+from home_app.submissions import reject_all
+
+LEVELS = [(4, 1), (4, 10), (3, 26), (2, 62)]
+
+
+def entries(n, email="s@example.edu"):
+    """n entries with new GUIDs, emails and levels"""
+    return [(uuid.uuid4(), f"{i}{email}", i % 4) for i in range(n)]
+
+
+def test_lookup(tmp_path):
+    """Every written GUID is found, and no other"""
+    path = tmp_path / "index.bin"
+    issued = entries(200)
+    assert write_index(path, issued) == 200
+    index = GuidIndex(path)
+    assert len(index) == 200
+    for guid, email, level in issued:
+        assert index.lookup(guid) == (email, level)
+        assert index.lookup(str(guid)) == (email, level)
+    assert index.lookup(uuid.uuid4()) is None
+    assert sorted(index) == sorted(issued)
+    assert GuidIndex.load(tmp_path / "missing.bin") is None
+
+
+def test_update(tmp_path):
+    """Updates add entries, replace reissued GUIDs and drop removed ones"""
+    path = tmp_path / "index.bin"
+    first, second = entries(10, "a@x"), entries(10, "b@x")
+    update_index(path, first)
+    update_index(path, second + [(first[0][0], "moved@x", 3)])
+    index = GuidIndex(path)
+    assert len(index) == 20
+    assert index.lookup(second[5][0]) == second[5][1:]
+    assert index.lookup(first[0][0]) == ("moved@x", 3)
+    update_index(path, [], removed=[g for g, _, _ in second])
+    assert len(GuidIndex(path)) == 10 and GuidIndex(path).lookup(second[5][0]) is None
+
+
+def test_entries_from_csv(tmp_path):
+    """Each outfile.csv row's level is found from its count and alphabet size"""
+    guids = [uuid.uuid4() for _ in range(4)]
+    path = tmp_path / "outfile.csv"
+    path.write_text("".join(f"s@x,{g},{count},{size}\n" for g, (count, size) in zip(guids, LEVELS)))
+    assert list(entries_from_csv(path, LEVELS)) == [(g, "s@x", i) for i, g in enumerate(guids)]
+
+
+def test_submit_checks_index(tmp_path, store, call):
+    """A submission must be for a GUID issued to the submitter, at the level it was issued"""
+    guid = uuid.uuid4()
+    write_index(tmp_path / "index.bin", [(guid, "s@x", 2)])
+    store.resolver = GuidIndex(tmp_path / "index.bin").lookup
+
+    def post(body):
+        return call("POST", "/api/v1/decrypt/submit", body)
+
+    resp = post({"user_id": "s@x", "guid": str(uuid.uuid4())})
+    assert resp["statusCode"] == 400 and "unknown guid" in resp["body"]
+    resp = post({"user_id": "u1", "guid": str(guid)})        # someone else's GUID
+    assert resp["statusCode"] == 400 and "not issued to u1" in resp["body"]
+    assert post({"user_id": "s@x", "guid": str(guid), "level": 0})["statusCode"] == 200
+    assert store.backend.query("s@x")[0]["level"] == 2      # the level it was issued at
+    assert store.submit({"user_id": "u2", "guid": str(guid)}, email="s@x").recorded == 1
+
+
+def test_missing_index_fails_closed(monkeypatch, call):
+    """Without the index only a local run accepts GUIDs unchecked"""
+    monkeypatch.setattr(GuidIndex, "load", staticmethod(lambda *args: None))
+    monkeypatch.setenv("SUBMISSIONS_DB", ":memory:")
+    assert main.submission_store.__wrapped__().resolver is None
+    monkeypatch.delenv("SUBMISSIONS_DB")
+    table = SimpleNamespace(meta=SimpleNamespace(client=None))
+    monkeypatch.setattr(main, "users_table", lambda: table)
+    store = main.submission_store.__wrapped__()
+    assert store.resolver is reject_all
+    monkeypatch.setattr(main, "submission_store", lambda: store)
+    resp = call("POST", "/api/v1/decrypt/submit", {"user_id": "s@x", "guid": str(uuid.uuid4())})
+    assert resp["statusCode"] == 503 and "GUID index" in resp["body"]
+
+
+@pytest.mark.parametrize("n", [0, 1])
+def test_small_indexes(tmp_path, n):
+    """Lookups in an empty or one-entry index find nothing else"""
+    write_index(tmp_path / "index.bin", entries(n))
+    assert GuidIndex(tmp_path / "index.bin").lookup(uuid.uuid4()) is None
@@ -0,0 +1,106 @@
+"""Tests for the HTTP adapter"""
+import asyncio
+import base64
+import gzip
+import http.client
+import io
+import threading
+from wsgiref.util import setup_testing_defaults
+
+from home_app import main
+from home_app.http_adapter import (RequestHandler, Server, asgi_app, from_response, to_event,
+                                   wsgi_app)
+
+
+def test_to_event():
+    """Headers, cookies, query strings and bodies are mapped as API Gateway maps them"""
+    event = to_event("post", "/api/v1/a%20b", "x=1&x=2&y=",
+                     [("Host", "example.com:8000"), ("Cookie", "a=1; b=2"), ("Accept", "text/html"),
+                      ("accept", "*/*"), ("Content-Type", "application/octet-stream")],
+                     b"\x00\xff")
+    assert event["version"] == "2.0"
+    assert event["rawPath"] == "/api/v1/a%20b"
+    assert event["requestContext"]["http"] == {
+        "method": "POST", "path": "/api/v1/a b", "protocol": "HTTP/1.1",
+        "sourceIp": "127.0.0.1", "userAgent": ""}
+    assert event["requestContext"]["domainName"] == "example.com"
+    assert event["headers"] == {"host": "example.com:8000", "accept": "text/html,*/*",
+                                "content-type": "application/octet-stream"}
+    assert event["cookies"] == ["a=1", "b=2"]
+    assert event["queryStringParameters"] == {"x": "1,2", "y": ""}
+    assert event["isBase64Encoded"]
+    assert base64.b64decode(event["body"]) == b"\x00\xff"
+
+    text = to_event("POST", "/", "", [("Content-Type", "application/json")], b'{"a": 1}')
+    assert text["body"] == '{"a": 1}' and not text["isBase64Encoded"]
+    assert "body" not in to_event("GET", "/", "", [])
+
+
+def test_from_response():
+    """Lambda responses become a status, header list and body bytes"""
+    png = main.resp_png(200, b"\x89PNG", cookies=["s=1; Secure"])
+    status, headers, body = from_response(png)
+    assert status == 200 and body == b"\x89PNG"
+    assert ("Set-Cookie", "s=1; Secure") in headers
+    assert from_response({"ok": True}) == (200, [("Content-Type", "application/json")],
+                                           b'{"ok": true}')
+
+
+def test_wsgi():
+    """The WSGI app serves compressed files and passes request bodies through"""
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": "/static/lab1_crypto/index.html",
+               "HTTP_ACCEPT_ENCODING": "gzip"}
+    setup_testing_defaults(environ)
+    started = {}
+    def start_response(status, headers):
+        started.update(status=status, headers=dict(headers))
+    body = b"".join(wsgi_app(environ, start_response))
+    assert started["status"] == "200 OK"
+    assert started["headers"]["Content-Encoding"] == "gzip"
+    assert int(started["headers"]["Content-Length"]) == len(body)
+    assert gzip.decompress(body) == (main.STATIC_DIR / "lab1_crypto" / "index.html").read_bytes()
+
+    environ = {"REQUEST_METHOD": "POST", "PATH_INFO": "/api/v1/decrypt/submit",
+               "CONTENT_TYPE": "application/json", "CONTENT_LENGTH": "8",
+               "wsgi.input": io.BytesIO(b"not json")}
+    setup_testing_defaults(environ)
+    wsgi_app(environ, lambda status, headers: started.update(status=status))
+    assert started["status"] == "400 Bad Request"
+
+
+def test_asgi():
+    """The ASGI app answers a request"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "OPTIONS", "path": "/api/v1/x", "raw_path": b"/api/v1/x",
+             "query_string": b"", "headers": [(b"host", b"localhost")], "http_version": "1.1"}
+    asyncio.run(asgi_app(scope, receive, send))
+    assert sent[0]["status"] == 200
+    assert sent[1]["body"] == b'{"ok":true}'
+
+
+def test_server_keep_alive():
+    """The standalone server answers several requests on one connection"""
+    server = Server(("127.0.0.1", 0), RequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        for _ in range(2):                  # both requests on the same connection
+            conn.request("GET", "/static/favicon.png")
+            resp = conn.getresponse()
+            assert resp.status == 200
+            assert resp.read() == (main.STATIC_DIR / "favicon.png").read_bytes()
+        conn.request("GET", "/no/such/page")
+        resp = conn.getresponse()
+        assert resp.status == 404 and b"<" in resp.read()
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
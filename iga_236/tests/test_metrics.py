@@ -0,0 +1,74 @@
+"""Tests for the per-request EMF metrics"""
+import io
+import json
+import uuid
+
+from home_app import main, metrics
+
+EMF_UNITS = {"Milliseconds", "Bytes", "Count"}
+
+
+def get(path, **headers):
+    """Run a GET through the handler"""
+    return main.lambda_handler({"rawPath": path, "headers": headers,
+                                "requestContext": {"http": {"method": "GET"}, "requestId": "r1"}},
+                               None)
+
+
+def emitted(capsys):
+    """EMF documents written to stdout"""
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if '"_aws"' in line]
+
+
+def check_emf(doc):
+    """Validate a document against the Embedded Metric Format specification"""
+    assert isinstance(doc["_aws"]["Timestamp"], int)
+    for directive in doc["_aws"]["CloudWatchMetrics"]:
+        assert isinstance(directive["Namespace"], str) and directive["Namespace"]
+        for dimension_set in directive["Dimensions"]:
+            for name in dimension_set:
+                assert isinstance(doc[name], str)
+        for metric in directive["Metrics"]:
+            assert metric["Unit"] in EMF_UNITS
+            assert isinstance(doc[metric["Name"]], (int, float))
+
+
+def test_emf_schema(capsys, monkeypatch):
+    """Each request logs one EMF document with the route, status, timings and cold start"""
+    monkeypatch.setattr(metrics, "SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(metrics, "_cold", True)
+    capsys.readouterr()
+    get("/static/favicon.png")
+    get("/static/favicon.png")
+    get(f"/no/such/page/{uuid.uuid4()}")            # a new page, so it is rendered, not cached
+    first, second, missing = emitted(capsys)
+    for doc in (first, second, missing):
+        check_emf(doc)
+    assert set(first) >= {"Route", "Status", "Duration", "ResponseBytes", "TemplateRenderTime",
+                          "CacheHits", "CacheMisses", "ColdStart", "RequestId"}
+    assert first["ColdStart"] == 1 and second["ColdStart"] == 0
+    assert second["Route"] == "/static/{path+}" and second["Status"] == "200"
+    assert second["ResponseBytes"] == (main.STATIC_DIR / "favicon.png").stat().st_size
+    assert second["CacheHits"] >= 1
+    assert missing["Route"] == metrics.UNMATCHED and missing["Status"] == "404"
+    assert missing["TemplateRenderTime"] > 0
+
+
+def test_sampling_and_ring_buffer(monkeypatch):
+    """Only sampled requests and errors are logged, but all go into the ring buffer"""
+    out = io.StringIO()
+    monkeypatch.setattr(metrics, "SAMPLE_RATE", 0.0)
+    metrics.finish(metrics.RequestMetrics(), {"statusCode": 200}, out)
+    assert out.getvalue() == ""
+
+    monkeypatch.setattr(metrics, "SAMPLE_RATE", 0.01)
+    monkeypatch.setattr(metrics.random, "random", lambda: 0.5)
+    metrics.finish(metrics.RequestMetrics(), {"statusCode": 200}, out)
+    assert out.getvalue() == ""
+    metrics.finish(metrics.RequestMetrics(), {"statusCode": 503}, out)   # errors are always written
+    assert json.loads(out.getvalue())["SampleRate"] == 0.01
+
+    for _ in range(metrics.RING_SIZE + 10):
+        metrics.finish(metrics.RequestMetrics(route="/x"), {"statusCode": 200}, out)
+    assert len(metrics.RECENT) == metrics.RING_SIZE
+    assert metrics.summary()["/x"]["count"] == metrics.RING_SIZE
@@ -0,0 +1,61 @@
+"""Tests for conditional GET and content negotiation"""
+import base64
+import gzip
+
+from home_app import main
+from home_app.negotiation import choose_encoding, etag_matches, finalize
+
+
+def get(path, **headers):
+    """Run a GET through the handler"""
+    return main.lambda_handler({"rawPath": path, "headers": headers,
+                                "requestContext": {"http": {"method": "GET"}}}, None)
+
+
+def test_if_none_match_returns_304():
+    """A matching If-None-Match gets 304 with the ETag and no body"""
+    first = get("/static/favicon.png")
+    etag = first["headers"]["ETag"]
+    second = get("/static/favicon.png", **{"if-none-match": etag})
+    assert second["statusCode"] == 304
+    assert second["body"] == ""
+    assert second["headers"]["ETag"] == etag
+
+
+def test_gzip_static_and_template():
+    """Static files and successful pages are compressed when the client accepts it"""
+    resp = get("/static/lab1_crypto/index.html", **{"accept-encoding": "gzip, deflate"})
+    assert resp["headers"]["Content-Encoding"] == "gzip"
+    assert resp["isBase64Encoded"]
+    raw = (main.STATIC_DIR / "lab1_crypto" / "index.html").read_bytes()
+    assert gzip.decompress(base64.b64decode(resp["body"])) == raw
+
+    page = get("/no-such-page", **{"accept-encoding": "gzip"})
+    assert page["statusCode"] == 404             # only 2xx bodies are negotiated
+    assert "Content-Encoding" not in page["headers"]
+
+
+def test_resp_text_pipeline():
+    """finalize() compresses large bodies, tags the variant and answers 304 for it"""
+    body = "x" * 5000
+    resp = finalize({"accept-encoding": "gzip"}, main.resp_text(200, body))
+    assert gzip.decompress(bytes(resp["body"])).decode() == body   # a Payload until lambda_handler
+    etag = resp["headers"]["ETag"]
+    assert etag.endswith('-gzip"')
+    again = finalize({"if-none-match": etag}, main.resp_text(200, body))
+    assert again["statusCode"] == 304
+
+    small = finalize({"accept-encoding": "gzip"}, main.resp_json(200, {"ok": True}))
+    assert "Content-Encoding" not in small["headers"]
+    assert small["body"] == '{"ok":true}'
+
+
+def test_choose_encoding_and_match():
+    """Accept-Encoding q-values and If-None-Match lists are parsed"""
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert choose_encoding("gzip;q=0.5", ("gzip",)) == "gzip"
+    assert choose_encoding(None) is None
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc-gzip"', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
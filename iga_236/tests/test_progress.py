@@ -0,0 +1,95 @@
+"""Tests for the class-wide progress aggregates"""
+import json
+import uuid
+
+import pytest
+
+from home_app import main
+from home_app.progress import CLASS_ID, ProgressAggregates, bucket, histogram_quantile
+
+
+@pytest.fixture(autouse=True, name="aggregates")
+def fixture_aggregates(store, monkeypatch):
+    """Read the aggregates from the shared store"""
+    aggregates = ProgressAggregates(store.backend)
+    monkeypatch.setattr(main, "progress_aggregates", lambda: aggregates)
+    return aggregates
+
+
+def submit(store, user_id, level, elapsed=None, guid=None):
+    """Record a decrypt of level by user_id"""
+    store.submit({"user_id": user_id, "guid": guid or str(uuid.uuid4()), "level": level,
+                  "elapsed_seconds": elapsed})
+
+
+def test_bucket_and_quantile():
+    """Times fall in power-of-two buckets, and quantiles land in the right bucket"""
+    assert [bucket(s) for s in (0, 1.9, 2, 3.9, 4, 1e12)] == [0, 0, 1, 1, 2, 24]
+    assert histogram_quantile({}, 0.5) is None
+    assert histogram_quantile({3: 1}, 0.5) == pytest.approx(2 ** 3.5)
+    median = histogram_quantile({1: 1, 3: 2, 10: 1}, 0.5)
+    assert median is not None and 8 <= median < 16
+
+
+def test_aggregates_follow_submissions(store):
+    """Each new submission updates its level and student, duplicates do not"""
+    guid = str(uuid.uuid4())
+    submit(store, "a", 0, 1.0, guid)
+    submit(store, "a", 0, 1.0, guid)            # duplicate: not counted again
+    submit(store, "a", 1, 100.0)
+    submit(store, "b", 1, 300.0)
+    submit(store, "c", 1)
+    progress = main.progress_aggregates().read()
+    assert progress.students == 3
+    level1 = progress.levels[1]
+    assert (level1.solves, level1.timed, level1.mean_seconds) == (3, 2, 200.0)
+    assert level1.histogram == {6: 1, 8: 1}
+    assert [s.user_id for s in progress.stragglers] == ["b", "c", "a"]
+    assert progress.stragglers[-1].levels_solved == [0, 1]
+
+
+def test_rebuild_detects_and_repairs_drift(store):
+    """rebuild reports aggregates that differ from the submissions and rewrites them"""
+    submit(store, "a", 0, 5.0)
+    submit(store, "b", 2, 50.0)
+    aggregates = main.progress_aggregates()
+    assert not aggregates.rebuild()
+    store.backend.increment((CLASS_ID, "level#2"), {"solves": 4})        # drift
+    store.backend.increment((CLASS_ID, "level#7"), {"solves": 1})        # nothing behind it
+    drift = aggregates.rebuild()
+    assert "level#2 solves: stored 5.0 recomputed 1.0" in drift
+    assert any("level#7" in d for d in drift)
+    assert aggregates.rebuild(write=True)
+    assert not aggregates.rebuild()
+    assert [level.level for level in aggregates.read().levels] == [0, 2]
+
+
+def test_rebuild_writes_no_empty_sets(store):
+    """DynamoDB rejects an empty set, so an emptied student item has no levels attribute"""
+    submit(store, "a", 0, 5.0)
+    store.backend.increment((CLASS_ID, "student#ghost"), {"submits": 1}, {"levels": {3}})
+    written = []
+    batch_put = store.backend.batch_put
+    store.backend.batch_put = lambda items: written.extend(items) or batch_put(items)
+    assert main.progress_aggregates().rebuild(write=True)
+    ghost = next(item for item in written if item["sk"] == "student#ghost")
+    assert ghost == {"user_id": CLASS_ID, "sk": "student#ghost"}
+    assert not any(value == set() for item in written for value in item.values())
+    assert main.progress_aggregates().read().students == 1
+
+
+@pytest.mark.usefixtures("signer")
+def test_progress_requires_instructor(store, call):
+    """Only instructors see the progress API and page"""
+    submit(store, "a", 0, 5.0)
+
+    def get(path, role=None):
+        return call("GET", path, user="u" if role else None, role=role)
+
+    assert get("/api/v1/progress")["statusCode"] == 401
+    assert get("/api/v1/progress", "student")["statusCode"] == 403
+    resp = get("/api/v1/progress", "instructor")
+    assert resp["statusCode"] == 200 and json.loads(resp["body"])["students"] == 1
+    assert get("/instructor", "student")["statusCode"] == 403
+    page = get("/instructor", "instructor")
+    assert page["statusCode"] == 200 and "Class progress" in page["body"]
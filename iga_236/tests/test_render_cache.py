@@ -0,0 +1,72 @@
+"""Tests for the page and fragment caches"""
+import jinja2
+
+from home_app import main
+from home_app.render_cache import PageCache, context_hash, fragment_cache
+
+
+def test_page_cache(monkeypatch):
+    """Pages are cached by template, context and deployment"""
+    cache = PageCache(deployment="d1")
+    calls = []
+
+    def render(name, context):
+        calls.append(name)
+        return f"{name} {context}"
+
+    assert cache.get_or_render("about.html", {}, render) == "about.html {}"
+    assert cache.get_or_render("about.html", {}, render) == "about.html {}"
+    cache.get_or_render("404.html", {"page": "/a"}, render)
+    cache.get_or_render("404.html", {"page": "/b"}, render)
+    cache.get_or_render("404.html", {"page": "/a"}, render)
+    assert calls == ["about.html", "404.html", "404.html"]
+    assert context_hash({"a": 1, "b": 2}) == context_hash({"b": 2, "a": 1})
+    assert context_hash({"a": 1, "b": 2}) != context_hash({"a": 2})
+    assert context_hash({"d": {"x": 1, "y": 2}}) == context_hash({"d": {"y": 2, "x": 1}})
+
+    # a new deployment does not see the old pages
+    monkeypatch.setattr(cache, "deployment", "d2")
+    cache.get_or_render("about.html", {}, render)
+    assert calls[-1] == "about.html" and len(calls) == 4
+
+
+def test_render_uses_page_cache(monkeypatch):
+    """main.render() renders a page once"""
+    cache = PageCache()
+    monkeypatch.setattr(main, "page_cache", lambda: cache)
+    first = main.render("about.html")
+    def no_env():
+        raise AssertionError("rendered again")
+    monkeypatch.setattr(main, "env", no_env)
+    assert main.render("about.html") == first
+    assert "About HKS IGA-236" in first
+
+
+def test_404_not_cached(monkeypatch):
+    """Not-found pages, one per missing path, are not cached"""
+    cache = PageCache()
+    monkeypatch.setattr(main, "page_cache", lambda: cache)
+    for path in ("/no-such-page", "/another"):
+        event = {"rawPath": path, "requestContext": {"http": {"method": "GET"}}}
+        resp = main.lambda_handler(event, None)
+        assert resp["statusCode"] == 404
+    assert len(cache.lru) == 0
+
+
+def test_fragment_cache_tag():
+    """A cached fragment is rendered once per key and shared between templates"""
+    e = main.make_env(jinja2.DictLoader({
+        "a.html": '{% cache "frag", 1 %}[{{ n }}]{% endcache %} {{ n }}',
+        "b.html": ('{% cache "frag", 1 %}[{{ n }}]{% endcache %}'
+                   '{% cache "frag", 2 %}<{{ n }}>{% endcache %}')}))
+    assert e.get_template("a.html").render(n=1) == "[1] 1"
+    assert e.get_template("a.html").render(n=2) == "[1] 2"       # fragment reused, rest rendered
+    assert e.get_template("b.html").render(n=3) == "[1]<3>"
+    assert fragment_cache(e).stats()["hits"] == 2
+
+
+def test_base_fragments_in_pages():
+    """The cached footer appears once in each page"""
+    page = main.env().get_template("about.html").render()
+    assert main.GITHUB_REPO_URL in page and "Harvard Accessibility" in page
+    assert main.env().get_template("help.html").render().count("Harvard Accessibility") == 1
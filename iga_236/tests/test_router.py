@@ -0,0 +1,72 @@
+"""Tests for the router"""
+import pytest
+
+from home_app import main
+from home_app.router import Request, Router
+
+
+def make_router():
+    """A router with one route of each kind"""
+    router = Router()
+    router.add("GET", "/a", lambda r: {"body": "a"})
+    router.add("GET", "/users/{user_id}", lambda r: {"body": "user " + r.params["user_id"]})
+    router.add("GET", "/users/{user_id}/labs/{lab}", lambda r: {"body": r.params["lab"]})
+    router.add("GET", "/files/{path+}", lambda r: {"body": r.params["path"]})
+    router.add("ANY", "/any", lambda r: {"body": r.method})
+    return router
+
+
+def test_match_and_params():
+    """Literal, parameter, greedy and ANY routes match, and nothing else does"""
+    router = make_router()
+    assert router.dispatch(Request("GET", "/a"))["body"] == "a"
+    assert router.dispatch(Request("GET", "/users/u1"))["body"] == "user u1"
+    assert router.dispatch(Request("GET", "/users/u1/labs/3"))["body"] == "3"
+    assert router.dispatch(Request("GET", "/files/x/y.css"))["body"] == "x/y.css"
+    assert router.dispatch(Request("DELETE", "/any"))["body"] == "DELETE"
+    assert router.match("POST", "/a") == (None, {})
+    assert router.match("GET", "/users/u1/") == (None, {})
+    with pytest.raises(LookupError):
+        router.dispatch(Request("GET", "/nothing"))
+
+
+def test_duplicate_route():
+    """A pattern can be routed only once per method"""
+    router = make_router()
+    for pattern in ("/a", "/users/{other}", "/files/{rest+}"):
+        with pytest.raises(ValueError):
+            router.add("GET", pattern, lambda r: {})
+    router.add("POST", "/a", lambda r: {"body": "post"})
+    assert router.dispatch(Request("GET", "/a"))["body"] == "a"
+
+
+def test_middleware_order():
+    """Middleware runs outermost first, and a route can opt out of it"""
+    calls = []
+
+    def mw(tag):
+        def middleware(request, call_next):
+            calls.append(tag)
+            return call_next(request)
+        return middleware
+
+    router = Router(middleware=[mw("outer"), mw("inner")], fallback=lambda r: {"body": "fallback"})
+    router.add("GET", "/a", lambda r: {"body": "a"})
+    router.add("GET", "/bare", lambda r: {"body": "bare"}, middleware=[])
+    router.dispatch(Request("GET", "/a"))
+    assert calls == ["outer", "inner"]
+    router.dispatch(Request("GET", "/bare"))
+    assert calls == ["outer", "inner"]
+    assert router.dispatch(Request("GET", "/zzz"))["body"] == "fallback"
+    assert calls == ["outer", "inner", "outer", "inner"]
+
+
+def test_handler_routes():
+    """The handler routes bad JSON, CORS preflights and unknown methods"""
+    event = {"rawPath": "/api/v1/decrypt/submit", "body": "not json",
+             "requestContext": {"http": {"method": "POST"}}}
+    assert main.lambda_handler(event, None)["statusCode"] == main.HTTP_BAD_REQUEST
+    event = {"rawPath": "/x", "requestContext": {"http": {"method": "OPTIONS"}}}
+    assert main.lambda_handler(event, None)["statusCode"] == 200
+    event = {"rawPath": "/x", "requestContext": {"http": {"method": "PUT"}}}
+    assert main.lambda_handler(event, None)["statusCode"] == main.HTTP_FOUND
@@ -0,0 +1,138 @@
+"""Tests for signed session cookies"""
+import json
+import re
+import uuid
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from home_app import main
+from home_app.guid_index import GuidIndex, write_index
+from home_app.sessions import (COOKIE_NAME, LOGIN_TTL, Keyring, SessionKeyError, SessionSigner,
+                               b64encode, session_token)
+
+K1 = "k1:" + b64encode(b"1" * 32)
+K2 = "k2:" + b64encode(b"2" * 32)
+
+
+@pytest.fixture(name="now")
+def fixture_now():
+    """The signer's clock, which a test can move"""
+    return [1000.0]
+
+
+@pytest.fixture(name="signer")
+def fixture_signer(now):
+    """A signer with one key and a 60 second ttl"""
+    return SessionSigner(Keyring.parse(K1), ttl=60, clock=lambda: now[0])
+
+
+def test_issue_and_verify(signer, now):
+    """A token verifies as the session it was issued for, until it expires"""
+    token = signer.issue("u1", "u1@example.edu", "instructor")
+    session = signer.verify(token)
+    assert session is not None
+    assert (session.user_id, session.email, session.role) == ("u1", "u1@example.edu", "instructor")
+    assert session.is_instructor and session.expires_at == 1060
+    assert signer.verify(signer.issue("u1", "u1@example.edu")).sid != session.sid
+
+    now[0] = 1060
+    assert signer.verify(token) is None             # expired
+
+
+def test_tampering(signer):
+    """Edited, truncated or foreign tokens do not verify"""
+    token = signer.issue("u1", "u1@example.edu")
+    version, kid, payload, signature = token.split(".")
+    forged = json.dumps({"uid": "u1", "email": "u1@example.edu", "role": "instructor",
+                         "sid": "x", "iat": 1000, "exp": 9999}).encode()
+    assert signer.verify(f"{version}.{kid}.{b64encode(forged)}.{signature}") is None
+    assert signer.verify(f"{version}.{kid}.{payload}.{signature[:-2]}AA") is None
+    assert signer.verify(f"v0.{kid}.{payload}.{signature}") is None
+    for bad in (None, "", "garbage", "v1.k1..", "v1.k1.é.é", token + "."):
+        assert signer.verify(bad) is None
+    other = SessionSigner(Keyring.parse(K2), clock=lambda: 1000.0)
+    assert other.verify(token) is None
+
+
+def test_rotation_and_revocation():
+    """Tokens signed with an older key verify; revoked sessions and users do not"""
+    old = SessionSigner(Keyring.parse(K1), clock=lambda: 1000.0)
+    token = old.issue("u1", "u1@example.edu")
+    rotated = SessionSigner(Keyring.parse(f"{K2},{K1}"), clock=lambda: 1000.0)
+    session = rotated.verify(token)
+    assert session is not None and session.user_id == "u1"     # old cookies still work
+    assert rotated.issue("u1", "u1@example.edu").startswith("v1.k2.")
+    for revoked in (session.sid, "u1"):
+        keyring = Keyring.parse(f"{K2},{K1}", revoked=[revoked])
+        signer = SessionSigner(keyring, clock=lambda: 1000.0)
+        assert signer.verify(token) is None
+    with pytest.raises(SessionKeyError):
+        Keyring.parse("k1:" + b64encode(b"short"))
+    assert Keyring.load({}) is None
+    keyring = Keyring.load({"SESSION_KEYS": K1, "SESSION_REVOKED": "u9"})
+    assert keyring is not None and keyring.revoked == {"u9"}
+
+
+def test_session_token():
+    """The session cookie is found in a cookies list or a split Cookie header"""
+    assert session_token(["a=1", f"{COOKIE_NAME}=tok"]) == "tok"
+    assert session_token(f"a=1; {COOKIE_NAME}=tok".split(";")) == "tok"
+    assert session_token(None) is None
+
+
+def test_session_api(signer, monkeypatch, call):
+    """GET /api/v1/session reports the session; /logout clears the cookie"""
+    monkeypatch.setattr(main, "session_signer", lambda: signer)
+
+    def get(**event):
+        resp = call("GET", "/api/v1/session", **event)
+        return resp["statusCode"], json.loads(resp["body"])
+
+    token = signer.issue("u1", "u1@example.edu")
+    status, body = get(cookies=[f"{COOKIE_NAME}={token}"])
+    assert status == 200 and body["user_id"] == "u1" and body["role"] == "student"
+    assert get(headers={"cookie": f"x=1; {COOKIE_NAME}={token}"})[1]["user_id"] == "u1"
+    assert get()[0] == 401
+    logout = call("GET", "/logout")
+    assert logout["statusCode"] == 302 and logout["cookies"][0].startswith(f"{COOKIE_NAME}=;")
+
+
+def test_login_flow(signer, now, store, call, monkeypatch, tmp_path):
+    """A registered student asks for a login link, opens it, and can then submit"""
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    guid = uuid.uuid4()
+    write_index(tmp_path / "index.bin", [(guid, "s@example.edu", 1)])
+    index = GuidIndex(tmp_path / "index.bin")
+    store.resolver = index.lookup
+    sent = []
+    monkeypatch.setattr(main, "session_signer", lambda: signer)
+    monkeypatch.setattr(main, "registered_emails", lambda: frozenset(index.emails()))
+    ses = SimpleNamespace(send_email=lambda **message: sent.append(message))
+    monkeypatch.setattr(main, "ses_client", lambda: ses)
+
+    assert call("GET", "/login")["statusCode"] == 200
+    unknown = call("POST", "/login", "email=nobody%40example.edu")
+    assert unknown["statusCode"] == 200 and not sent
+    resp = call("POST", "/login", "email=S%40example.edu")
+    assert resp["body"] == unknown["body"].replace("nobody", "s")       # no hint who is registered
+    assert [m["Destination"]["ToAddresses"] for m in sent] == [["s@example.edu"]]
+    link = re.search(r"https://\S+", sent[0]["Message"]["Body"]["Text"]["Data"])
+    assert link is not None
+    link = link.group(0)
+    assert link.startswith(main.LOGIN_BASE_URL + "/login?")
+    token = parse_qs(urlsplit(link).query)["token"][0]
+    assert signer.verify(token) is None                 # a login link is not a session
+
+    resp = call("GET", "/login", queryStringParameters={"token": token})
+    assert resp["statusCode"] == 302
+    cookie = resp["cookies"][0].split(";")[0]
+    assert signer.verify(session_token([cookie])).user_id == "s@example.edu"
+    resp = call("POST", "/api/v1/decrypt/submit", {"guid": str(guid)}, cookies=[cookie])
+    assert resp["statusCode"] == 200 and json.loads(resp["body"])["recorded"] == 1
+    assert store.backend.query("s@example.edu")[0]["level"] == 1
+
+    now[0] += LOGIN_TTL
+    assert call("GET", "/login", queryStringParameters={"token": token})["statusCode"] == 401
+    assert signer.verify_login(signer.issue("s@example.edu", "s@example.edu")) is None
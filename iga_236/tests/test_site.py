@@ -0,0 +1,113 @@
+"""Tests for the static-site export and serving routes from its manifest"""
+import json
+
+import pytest
+
+from home_app import main
+from home_app.binary import Payload
+from home_app.export_site import export, hashed_name
+from home_app.site import MANIFEST_NAME, Site
+
+
+@pytest.fixture(scope="module", name="site_dir")
+def fixture_site_dir(tmp_path_factory):
+    """The site, exported once for this module"""
+    out = tmp_path_factory.mktemp("site")
+    export(out)
+    return out
+
+
+def load(site_dir, base_url=None):
+    """The exported site, which must be there"""
+    site = Site.load(site_dir, base_url)
+    assert site is not None
+    return site
+
+
+def get(site, path, query=None, headers=None):
+    """site.respond() for a GET of a route the site has"""
+    resp = site.respond("GET", path, query or {}, headers or {})
+    assert resp is not None
+    return resp
+
+
+def event(path, query=None, headers=None, method="GET"):
+    """A function URL event"""
+    return {"rawPath": path, "queryStringParameters": query, "headers": headers or {},
+            "requestContext": {"http": {"method": method}}}
+
+
+def test_hashed_name():
+    """Exported names carry a hash of their content and keep their extension"""
+    assert hashed_name("static/site.css", b"x") == hashed_name("static/site.css", b"x")
+    assert hashed_name("static/site.css", b"x") != hashed_name("static/site.css", b"y")
+    assert hashed_name("static/site.css", b"x").startswith("static/site.")
+    assert hashed_name("static/site.css", b"x").endswith(".css")
+
+
+def test_export(site_dir):
+    """Every route's file and compressed variants are written and listed in the manifest"""
+    manifest = json.loads((site_dir / MANIFEST_NAME).read_text())
+    routes = manifest["routes"]
+    assert {"/", "/about.html", "/static/favicon.png"} <= set(routes)
+    for entry in routes.values():
+        assert (site_dir / entry["file"]).is_file()
+        for file in entry["encodings"].values():
+            assert (site_dir / file).is_file()
+    assert "gzip" in routes["/about.html"]["encodings"]
+    favicon = routes["/static/favicon.png"]
+    assert favicon["is_binary"] and not favicon["encodings"]
+    assert favicon["redirect"] and not routes["/about.html"]["redirect"]
+
+
+def test_serve(site_dir):
+    """Pages are served from the export, compressed, and answered with 304 when unchanged"""
+    site = load(site_dir)
+    resp = get(site, "/", {"page": "about.html"})
+    assert resp["statusCode"] == 200 and "About HKS IGA-236" in resp["body"]
+    assert resp["body"] == get(site, "/about.html")["body"]
+    assert resp["headers"]["Access-Control-Allow-Origin"] == "*"
+
+    gz = get(site, "/about.html", headers={"accept-encoding": "gzip"})
+    assert gz["headers"]["Content-Encoding"] == "gzip" and isinstance(gz["body"], Payload)
+    not_modified = get(site, "/about.html", headers={"If-None-Match": resp["headers"]["ETag"]})
+    assert not_modified["statusCode"] == 304
+    assert not_modified["headers"]["Access-Control-Allow-Origin"] == "*"   # as finalize() keeps it
+
+    png = get(site, "/static/favicon.png")
+    assert png["isBase64Encoded"] and bytes(png["body"]).startswith(b"\x89PNG")
+    assert site.respond("POST", "/about.html", {}, {}) is None
+    assert site.respond("GET", "/login", {}, {}) is None
+
+
+def test_bounded(site_dir):
+    """Responses are kept in an LRU bounded in bytes, not for every route forever"""
+    manifest = json.loads((site_dir / MANIFEST_NAME).read_text())
+    site = Site(site_dir, manifest, max_bytes=4_000)
+    for route in manifest["routes"]:
+        site.respond("GET", route, {}, {"accept-encoding": "gzip"})
+    assert 0 < site.lru.total_bytes <= 4_000 and site.lru.evictions
+
+
+def test_redirect(site_dir):
+    """With a base URL, files other than HTML are redirected there"""
+    site = load(site_dir, "https://cdn.example.org/")
+    resp = get(site, "/static/favicon.png")
+    assert resp["statusCode"] == 302
+    file = site.routes["/static/favicon.png"].file
+    assert resp["headers"]["Location"] == "https://cdn.example.org/" + file
+    assert get(site, "/about.html")["statusCode"] == 200
+
+
+def test_missing_site(tmp_path):
+    """No export, no site"""
+    assert Site.load(tmp_path) is None
+
+
+def test_handler_uses_site(site_dir, monkeypatch):
+    """The handler answers exported routes without going through the router"""
+    site = load(site_dir)
+    monkeypatch.setattr(main, "site", lambda: site)
+    monkeypatch.setattr(main.ROUTER, "dispatch", lambda request: pytest.fail("routed"))
+    resp = main.lambda_handler(event("/help.html"), None)
+    assert resp["statusCode"] == 200 and "<html" in resp["body"].lower()
@@ -0,0 +1,31 @@
+"""Tests for the cold-start profiler"""
+import json
+import logging
+
+from home_app import main, startup
+
+
+def test_report_once(monkeypatch, caplog):
+    """The startup timings are logged on the first invocation only"""
+    monkeypatch.setattr(startup, "ENABLED", True)
+    monkeypatch.setattr(startup, "_reported", False)
+    startup.mark("test_phase")
+    with caplog.at_level(logging.INFO):
+        for _ in range(2):
+            main.lambda_handler({"rawPath": "/nope", "requestContext": {"http": {"method": "GET"}}},
+                                None)
+    lines = [r.getMessage() for r in caplog.records if '"event": "startup"' in r.getMessage()]
+    assert len(lines) == 1
+    report = json.loads(lines[0])
+    assert "test_phase" in report["phases_ms"]
+    assert report["init_ms"] >= 0
+
+
+def test_jinja_not_needed_for_static(monkeypatch):
+    """Serving a static file does not create the jinja2 environment"""
+    monkeypatch.setattr(startup, "ENABLED", False)
+    main.env.cache_clear()
+    resp = main.lambda_handler({"rawPath": "/static/favicon.png",
+                                "requestContext": {"http": {"method": "GET"}}}, None)
+    assert resp["statusCode"] == 200
+    assert not main.created(main.env)
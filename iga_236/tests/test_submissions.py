@@ -0,0 +1,176 @@
+"""Tests for the decrypt submission store"""
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from home_app.submissions import DynamoBackend, SubmissionError
+
+GUID = str(uuid.uuid4())
+SUBMIT = "/api/v1/decrypt/submit"
+
+
+def test_submit_and_dedupe(store, call):
+    """A submission is recorded once; submitting it again counts as a duplicate"""
+    resp = call("POST", SUBMIT, {"user_id": "u1", "guid": GUID, "level": 2})
+    assert resp["statusCode"] == 200
+    assert json.loads(resp["body"])["recorded"] == 1
+    again = json.loads(call("POST", SUBMIT, {"user_id": "u1", "guid": GUID, "level": 2})["body"])
+    assert again["recorded"] == 0 and again["duplicates"] == 1
+    items = store.backend.query("u1", "decrypt#")
+    assert len(items) == 1 and items[0]["level"] == 2 and items[0]["submitted_at"] == 1000.0
+
+
+def test_batch(store, call):
+    """A batch records each new GUID once and counts the rest as duplicates"""
+    other = str(uuid.uuid4())
+    store.submit({"user_id": "u1", "guid": GUID})
+    body = {"submissions": [{"user_id": "u1", "guid": GUID},
+                            {"user_id": "u1", "guid": other},
+                            {"user_id": "u1", "guid": other}]}
+    result = json.loads(call("POST", SUBMIT, body)["body"])
+    assert result == {"ok": True, "received": 3, "recorded": 1, "duplicates": 2}
+    assert len(store.backend.query("u1")) == 2
+
+
+def test_batch_race(store):
+    """A key written after the BatchGetItem check is not recorded (or announced) twice"""
+    recorded = []
+    store.listeners.append(recorded.extend)
+    store.backend.existing_keys = lambda keys: set()        # the check ran before the other write
+    store.submit({"user_id": "u1", "guid": GUID})
+    other = str(uuid.uuid4())
+    result = store.submit([{"user_id": "u1", "guid": GUID}, {"user_id": "u1", "guid": other}])
+    assert result.recorded == 1 and result.duplicates == 1
+    assert [str(s.guid) for s in recorded] == [GUID, other]
+    assert store.backend.query("u1")[0]["submitted_at"] == 1000.0
+
+
+@pytest.mark.usefixtures("signer")
+def test_session_identity(store, call):
+    """A logged-in student submits as themselves, and only GUIDs issued to them"""
+    store.resolver = lambda guid: ("u1@example.edu", 1)
+    assert call("POST", SUBMIT, {"user_id": "u1", "guid": GUID})["statusCode"] == 401
+    assert call("POST", SUBMIT, {"user_id": "u2", "guid": GUID}, user="u1")["statusCode"] == 400
+    resp = call("POST", SUBMIT, {"guid": GUID}, user="u1")     # user_id and email from the session
+    assert resp["statusCode"] == 200 and json.loads(resp["body"])["recorded"] == 1
+    assert store.backend.query("u1")[0]["level"] == 1
+    assert "not issued to u2@example.edu" in call("POST", SUBMIT, {"guid": GUID}, user="u2")["body"]
+
+
+def test_listener_failure(store, call, caplog):
+    """A listener that fails after the write does not fail the request"""
+    def broken(_new):
+        raise RuntimeError("throttled")
+    recorded = []
+    store.listeners += [broken, recorded.extend]
+    resp = call("POST", SUBMIT, {"user_id": "u1", "guid": GUID})
+    assert resp["statusCode"] == 200 and len(recorded) == 1
+    assert "listener" in caplog.text and "throttled" in caplog.text
+
+
+def test_validation(store, call):
+    """Malformed submissions and empty batches are rejected"""
+    assert call("POST", SUBMIT, {"user_id": "u1", "guid": "not-a-guid"})["statusCode"] == 400
+    assert call("POST", SUBMIT, {"user_id": "u1", "guid": GUID, "extra": 1})["statusCode"] == 400
+    with pytest.raises(SubmissionError):
+        store.submit([])
+
+
+class FakeClient:
+    """Enough of a DynamoDB client to exercise the retry loop"""
+    class exceptions:   # pylint: disable=invalid-name,too-few-public-methods
+        """The client's modeled exceptions"""
+        class ConditionalCheckFailedException(Exception):
+            """The item already exists"""
+
+        class TransactionCanceledException(Exception):
+            """A transaction failed, with a reason code per item"""
+            def __init__(self, *codes):
+                super().__init__(codes)
+                self.response = {"CancellationReasons": [{"Code": code} for code in codes]}
+
+    def __init__(self):
+        self.written = []
+        self.updates = []
+        self.calls = 0
+        self.conflicts = 0
+
+    def put_item(self, TableName, Item, ConditionExpression):     # pylint: disable=invalid-name
+        """Write Item unless an item with its key was written"""
+        assert TableName == "users"
+        assert ConditionExpression == "attribute_not_exists(sk)"
+        if any(w["PutRequest"]["Item"]["sk"] == Item["sk"] for w in self.written):
+            raise self.exceptions.ConditionalCheckFailedException()
+        self.written.append({"PutRequest": {"Item": Item}})
+
+    def transact_write_items(self, TransactItems):     # pylint: disable=invalid-name
+        """Write the put and its updates together, unless the put's item exists"""
+        put, *updates = TransactItems
+        if self.conflicts:
+            self.conflicts -= 1
+            raise self.exceptions.TransactionCanceledException("None", "TransactionConflict")
+        try:
+            self.put_item(**put["Put"])
+        except self.exceptions.ConditionalCheckFailedException as e:
+            raise self.exceptions.TransactionCanceledException("ConditionalCheckFailed") from e
+        self.updates.extend(u["Update"] for u in updates)
+
+    def batch_write_item(self, RequestItems):   # pylint: disable=invalid-name
+        """Write the first call's first item only, and every item after that"""
+        self.calls += 1
+        requests = RequestItems["users"]
+        if self.calls == 1:             # throttled: only the first item goes through
+            self.written.extend(requests[:1])
+            return {"UnprocessedItems": {"users": requests[1:]}}
+        self.written.extend(requests)
+        return {"UnprocessedItems": {}}
+
+
+class FakeTable:    # pylint: disable=too-few-public-methods
+    """A boto3 Table resource: its name and its client"""
+    name = "users"
+
+    def __init__(self):
+        self.meta = SimpleNamespace(client=FakeClient())
+
+
+def test_dynamo_batch_retries_unprocessed():
+    """Items BatchWriteItem leaves unprocessed are retried after a backoff"""
+    table = FakeTable()
+    delays = []
+    backend = DynamoBackend(table, sleep=delays.append)
+    items = [{"user_id": "u", "sk": f"decrypt#{i}", "elapsed_seconds": 1.5} for i in range(30)]
+    backend.batch_put(items)
+    client = table.meta.client
+    assert len(client.written) == 30
+    assert client.calls == 3            # 25 + 5 items, the first batch retried once
+    assert len(delays) == 1
+    assert str(client.written[0]["PutRequest"]["Item"]["elapsed_seconds"]) == "1.5"
+
+
+def test_dynamo_put_many_if_absent():
+    """Only the items whose keys are new are written"""
+    table = FakeTable()
+    backend = DynamoBackend(table)
+    table.meta.client.written.append({"PutRequest": {"Item": {"user_id": "u", "sk": "decrypt#1"}}})
+    items = [{"user_id": "u", "sk": f"decrypt#{i}"} for i in range(4)]
+    assert backend.put_many_if_absent(items) == [True, False, True, True]
+    assert len(table.meta.client.written) == 4
+
+
+def test_dynamo_transact_put():
+    """The aggregate increments are written with the conditional put, or not at all"""
+    table = FakeTable()
+    delays = []
+    backend = DynamoBackend(table, sleep=delays.append)
+    client = table.meta.client
+    client.conflicts = 1                # another submit is updating the same aggregate
+    increments = [(("#class", "level#1"), {"solves": 1}, {}),
+                  (("#class", "student#u"), {"submits": 1}, {"levels": {1}})]
+    assert backend.put_if_absent({"user_id": "u", "sk": "decrypt#1"}, increments)
+    assert not backend.put_if_absent({"user_id": "u", "sk": "decrypt#1"}, increments)
+    assert len(delays) == 1 and len(client.written) == 1 and len(client.updates) == 2
+    assert client.updates[1]["UpdateExpression"] == "ADD #a0 :v0, #a1 :v1"
+    assert client.updates[1]["ExpressionAttributeValues"] == {":v0": 1, ":v1": {1}}
@@ -0,0 +1,26 @@
+"""Precompiled templates must render exactly like the sources"""
+import jinja2
+
+from home_app import build_templates, main
+
+
+def test_compiled_matches_sources(tmp_path):
+    """Each page renders the same from the build as from its source"""
+    names = build_templates.build(str(tmp_path), byte_compile=False)
+    assert "404.html" in names and "base.html" in names
+    compiled = main.make_env(jinja2.ModuleLoader(str(tmp_path)))
+    sources = main.make_env(main.source_loader())
+    for name in ("404.html", "index.html", "about.html", "help.html"):
+        assert (compiled.get_template(name).render(page="/x") ==
+                sources.get_template(name).render(page="/x"))
+
+
+def test_stale_build_is_ignored(tmp_path, monkeypatch):
+    """A build from older sources is not used, so template edits are never hidden"""
+    build_templates.build(str(tmp_path), byte_compile=False)
+    assert main.compiled_is_current(str(tmp_path))
+    monkeypatch.setattr(main, "sources_digest", lambda: "edited")
+    assert not main.compiled_is_current(str(tmp_path))
+    (tmp_path / main.SOURCES_STAMP).unlink()            # built before there were stamps
+    monkeypatch.undo()
+    assert not main.compiled_is_current(str(tmp_path))